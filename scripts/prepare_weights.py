@@ -0,0 +1,47 @@
+"""オフライン実行用の重みディレクトリを作成
+
+torchvisionの学習済み重み（キャッシュがなければダウンロード）から分類層を除いた
+チェックポイント（<weights_dir>/<モデル名>.pt）を作成する。
+作成したディレクトリをネットワークのないマシンにコピーし、
+--weights-dir（または環境変数RAW_CLUSTERER_WEIGHTS_DIR）で指定する。
+
+使い方:
+    uv run python scripts/prepare_weights.py weights/ --model resnet50 --model resnet18
+    uv run python scripts/prepare_weights.py weights/ --all
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from src.infrastructure.ml.models.backbones import (
+    DEFAULT_BACKBONE,
+    available_backbones,
+    get_backbone,
+)
+
+parser = argparse.ArgumentParser(description="分類層なしのバックボーンのチェックポイントを作成")
+parser.add_argument("weights_dir", type=Path, help="チェックポイントを保存するディレクトリ")
+parser.add_argument(
+    "--model",
+    action="append",
+    choices=available_backbones(),
+    dest="models",
+    help=f"作成するモデル（複数指定可、デフォルト: {DEFAULT_BACKBONE}）",
+)
+parser.add_argument("--all", action="store_true", help="登録されている全てのモデルを作成")
+args = parser.parse_args()
+
+model_names = available_backbones() if args.all else (args.models or [DEFAULT_BACKBONE])
+
+for name in model_names:
+    spec = get_backbone(name)
+    path = spec.save_checkpoint(args.weights_dir)
+    print(f"✓ {name}: {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+    # 保存したチェックポイントからオフラインで構築できることを確認
+    try:
+        spec.build(args.weights_dir)
+    except Exception as e:
+        print(f"✗ {name}: failed to load the saved checkpoint: {e}")
+        sys.exit(1)
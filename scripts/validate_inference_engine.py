@@ -0,0 +1,108 @@
+"""推論最適化（int8 / bf16 / channels_last / compile）の精度・速度の検証
+
+同じ入力をfp32のモデルと最適化したモデルで特徴抽出し、
+埋め込みベクトルのコサイン類似度（fp32からのずれ）と処理時間を比較する。
+
+使い方:
+    uv run python scripts/validate_inference_engine.py outputs/test_full_pipeline/thumbs \\
+        --precision int8 --channels-last --compile torchscript
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.infrastructure.ml.models.backbones import DEFAULT_BACKBONE, available_backbones
+from src.infrastructure.ml.models.inference_engine import InferenceEngine
+from src.infrastructure.ml.models.torchvision_model import TorchvisionFeatureExtractor
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+parser = argparse.ArgumentParser(description="推論最適化の精度・速度をfp32と比較")
+parser.add_argument("image_dir", type=Path, help="検証に使う画像（サムネイル）のディレクトリ")
+parser.add_argument("--model", default=DEFAULT_BACKBONE, choices=available_backbones())
+parser.add_argument("--precision", default="int8", choices=InferenceEngine.PRECISIONS)
+parser.add_argument("--channels-last", action="store_true", dest="channels_last")
+parser.add_argument("--compile", default="none", choices=InferenceEngine.COMPILE_MODES)
+parser.add_argument("--batch-size", type=int, default=16, dest="batch_size")
+parser.add_argument("--max-images", type=int, default=256, dest="max_images")
+parser.add_argument(
+    "--min-similarity",
+    type=float,
+    default=0.99,
+    dest="min_similarity",
+    help="平均コサイン類似度がこの値を下回った場合は失敗とする（デフォルト: 0.99）",
+)
+args = parser.parse_args()
+
+image_paths = sorted(
+    path for path in args.image_dir.rglob("*") if path.suffix.lower() in IMAGE_EXTENSIONS
+)[: args.max_images]
+if not image_paths:
+    print(f"画像が見つかりません: {args.image_dir}")
+    sys.exit(1)
+
+print("=" * 60)
+print("推論最適化の検証")
+print("=" * 60)
+print(f"モデル: {args.model}、画像: {len(image_paths)}枚")
+
+baseline = TorchvisionFeatureExtractor(
+    model_name=args.model, device="cpu", batch_size=args.batch_size
+)
+optimized = TorchvisionFeatureExtractor(
+    model_name=args.model,
+    device="cpu",
+    batch_size=args.batch_size,
+    engine=InferenceEngine(
+        precision=args.precision,
+        channels_last=args.channels_last,
+        compile_mode=args.compile,
+    ),
+)
+print(f"最適化: {optimized.engine_settings}")
+
+# 前処理は共通なので一度だけ行う
+inputs = np.stack([baseline.load_input(path) for path in image_paths])
+
+
+def measure(extractor: TorchvisionFeatureExtractor) -> tuple:
+    """ウォームアップ（最適化の適用・キャリブレーション）後に処理時間を計測"""
+    extractor.extract_inputs(inputs[: args.batch_size])
+    start = time.perf_counter()
+    features = extractor.extract_inputs(inputs)
+    return features, time.perf_counter() - start
+
+
+print("\n[1/2] fp32で特徴抽出中...")
+baseline_features, baseline_time = measure(baseline)
+print(f"  {baseline_time:.2f}秒（{len(image_paths) / baseline_time:.1f}枚/秒）")
+
+print("\n[2/2] 最適化したモデルで特徴抽出中...")
+optimized_features, optimized_time = measure(optimized)
+print(f"  {optimized_time:.2f}秒（{len(image_paths) / optimized_time:.1f}枚/秒）")
+
+norms = np.linalg.norm(baseline_features, axis=1) * np.linalg.norm(optimized_features, axis=1)
+similarities = np.sum(baseline_features * optimized_features, axis=1) / np.maximum(norms, 1e-12)
+
+print("\n" + "=" * 60)
+print("結果")
+print("=" * 60)
+print(
+    f"コサイン類似度: 平均 {similarities.mean():.5f}、最小 {similarities.min():.5f}、"
+    f"1パーセンタイル {np.percentile(similarities, 1):.5f}"
+)
+print(f"速度: {baseline_time / optimized_time:.2f}倍")
+
+worst = np.argsort(similarities)[:5]
+print("\n類似度が低い画像:")
+for i in worst:
+    print(f"  {image_paths[i].name}: {similarities[i]:.5f}")
+
+if similarities.mean() < args.min_similarity:
+    print(f"\n✗ 平均コサイン類似度が{args.min_similarity}を下回りました")
+    sys.exit(1)
+print("\n✓ 検証に成功しました")
@@ -11,7 +11,7 @@ class ClusterResult:
     Attributes:
         clusters: クラスタのリスト
         image_to_tags: 画像ID -> タグリストのマッピング
-        granularity: 詳細度レベル
+        granularity: 詳細度レベル（1: 細かい、2: 粗い、3以降: さらに粗い階層）
     """
 
     def __init__(self, clusters: List[Cluster], granularity: int) -> None:
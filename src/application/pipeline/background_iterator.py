@@ -0,0 +1,90 @@
+"""バックグラウンドスレッドでイテラブルを先読みするイテレータ"""
+
+import queue
+import threading
+from typing import Generic, Iterable, Iterator, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class _Done:
+    """生成側の終了を表す番兵"""
+
+
+class _Failed:
+    """生成側で発生した例外を運ぶ番兵"""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class BackgroundIterator(Generic[T]):
+    """別スレッドでイテラブルを回し、容量制限付きキュー経由で要素を渡すイテレータ
+
+    消費側が処理している間も生成側が進むため、2つのステージを並行して実行できる。
+    キューが満杯になると生成側は待機するため、先読み量はmaxsizeで制限される。
+    生成側で発生した例外は消費側で再送出される。
+    """
+
+    # 停止要求を確認する間隔（秒）
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, iterable: Iterable[T], maxsize: int = 64) -> None:
+        """バックグラウンドイテレータを初期化して生成側スレッドを開始
+
+        Args:
+            iterable: バックグラウンドで回すイテラブル
+            maxsize: キューの最大要素数（先読み量の上限）
+        """
+        self._queue: "queue.Queue[Union[T, _Done, _Failed]]" = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, args=(iterable,), daemon=True)
+        self._thread.start()
+
+    def _produce(self, iterable: Iterable[T]) -> None:
+        """生成側スレッドの処理"""
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._put(_Failed(e))
+            return
+        finally:
+            # 途中で停止した場合もジェネレータの後片付け（finally節）を実行させる
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self._put(_Done())
+
+    def _put(self, item: Union[T, _Done, _Failed]) -> bool:
+        """停止要求を確認しながらキューに追加
+
+        Returns:
+            追加できた場合True、停止要求があった場合False
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self._POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> Iterator[T]:
+        """キューから要素を取り出して返す"""
+        try:
+            while True:
+                item = self._queue.get()
+                if isinstance(item, _Done):
+                    return
+                if isinstance(item, _Failed):
+                    raise item.error
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """生成側スレッドに停止を要求"""
+        self._stop.set()
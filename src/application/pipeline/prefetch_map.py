@@ -0,0 +1,55 @@
+"""スレッドプールで関数を先行適用するイテレータ"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class PrefetchMap(Generic[T, R]):
+    """イテラブルの各要素に関数をスレッドプールで適用し、入力と同じ順序で結果を返すイテレータ
+
+    消費側が結果を処理している間に、後続の最大readahead件を先行して処理する。
+    画像のデコードやリサイズのようにGILを解放する処理を、推論と重ねて実行するために使う。
+    入力の取り出しは消費側のスレッドで行われ、例外は該当する要素の順番で再送出される
+    """
+
+    def __init__(
+        self,
+        func: Callable[[T], R],
+        iterable: Iterable[T],
+        max_workers: int = 4,
+        readahead: int = 16,
+    ) -> None:
+        """先行適用イテレータを初期化
+
+        Args:
+            func: 各要素に適用する関数（ワーカースレッドで実行される）
+            iterable: 入力のイテラブル
+            max_workers: ワーカースレッド数
+            readahead: 先行して投入する要素数の上限
+        """
+        self._func = func
+        self._iterable = iterable
+        self._max_workers = max(1, max_workers)
+        self._readahead = max(1, readahead)
+
+    def __iter__(self) -> Iterator[R]:
+        """結果を入力と同じ順序で返す"""
+        pending: Deque["Future[R]"] = deque()
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            try:
+                for item in self._iterable:
+                    pending.append(executor.submit(self._func, item))
+                    if len(pending) >= self._readahead:
+                        yield pending.popleft().result()
+
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                # 途中で中断された場合は未着手の処理を取り消す
+                for future in pending:
+                    future.cancel()
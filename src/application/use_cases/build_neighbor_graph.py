@@ -0,0 +1,49 @@
+"""k近傍グラフ構築ユースケース"""
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from src.domain.models.embedding import Embedding
+from src.domain.models.neighbor_graph import NeighborGraph
+from src.domain.services.neighbor_graph_service import NeighborGraphService
+
+
+class BuildNeighborGraph:
+    """埋め込みベクトルのk近傍グラフを構築・保存するユースケース
+
+    グラフは埋め込みベクトルと同じディレクトリに保存し、次回は前回のグラフに
+    追加・変更された画像だけを組み込む
+    """
+
+    GRAPH_FILE_NAME = "knn_graph.npz"
+
+    def __init__(self, neighbor_graph_service: NeighborGraphService) -> None:
+        """k近傍グラフ構築ユースケースを初期化
+
+        Args:
+            neighbor_graph_service: k近傍グラフ構築サービス
+        """
+        self._neighbor_graph_service = neighbor_graph_service
+
+    def execute(self, embeddings: List[Embedding], output_dir: Path) -> NeighborGraph:
+        """k近傍グラフを構築（保存されたグラフがあれば差分更新）
+
+        Args:
+            embeddings: 埋め込みベクトルのリスト（クラスタリングに使うベクトル）
+            output_dir: グラフを保存するディレクトリ（埋め込みベクトルの保存先）
+
+        Returns:
+            embeddingsと同じ順序のk近傍グラフ
+        """
+        vectors = np.array([emb.vector for emb in embeddings])
+        image_ids = [emb.image_id for emb in embeddings]
+        graph_path = output_dir / self.GRAPH_FILE_NAME
+
+        previous = self._neighbor_graph_service.load(graph_path)
+        graph = self._neighbor_graph_service.update(vectors, image_ids, previous)
+        if graph is not previous:
+            self._neighbor_graph_service.save(graph, graph_path)
+            print(f"Saved kNN graph to {graph_path}")
+        return graph
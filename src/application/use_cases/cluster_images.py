@@ -1,33 +1,107 @@
 """画像クラスタリングユースケース"""
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
 
 from src.application.dto.cluster_result import ClusterResult
+from src.application.use_cases.incremental_assignment import assign_incrementally
 from src.domain.models.cluster import Cluster
 from src.domain.models.embedding import Embedding
 from src.domain.repositories.cluster_repository import ClusterRepository
 from src.domain.services.clustering_service import ClusteringService
 
 
+def build_cluster_result(
+    embeddings: List[Embedding],
+    labels: np.ndarray,
+    granularity: int,
+    output_path: Path,
+    cluster_repository: ClusterRepository,
+) -> ClusterResult:
+    """クラスタラベルからクラスタを構築して保存
+
+    Args:
+        embeddings: 埋め込みベクトルのリスト
+        labels: クラスタラベル（embeddingsと同じ順序）
+        granularity: 詳細度レベル
+        output_path: クラスタ結果の出力先ファイルパス
+        cluster_repository: クラスタリポジトリ
+
+    Returns:
+        クラスタリング結果
+    """
+    # Clusterオブジェクトを構築
+    clusters: List[Cluster] = []
+    unique_labels = np.unique(labels)
+
+    for label in unique_labels:
+        # このクラスタに属する画像IDを取得
+        indices = np.where(labels == label)[0]
+        image_ids = [embeddings[i].image_id for i in indices]
+
+        cluster = Cluster(
+            cluster_id=int(label), image_ids=image_ids, granularity=granularity
+        )
+        clusters.append(cluster)
+
+    # クラスタを保存
+    cluster_repository.save_all(clusters, output_path)
+    print(f"Saved {len(clusters)} clusters to {output_path}")
+
+    # 統計情報を表示
+    cluster_sizes = [cluster.size for cluster in clusters]
+    print(f"\nCluster statistics:")
+    print(f"  Min size: {min(cluster_sizes)}")
+    print(f"  Max size: {max(cluster_sizes)}")
+    print(f"  Average size: {np.mean(cluster_sizes):.1f}")
+
+    # ClusterResultを返す
+    return ClusterResult(clusters=clusters, granularity=granularity)
+
+
 class ClusterImages:
-    """画像をクラスタリングするユースケース"""
+    """画像をクラスタリングするユースケース
+
+    学習したモデルはクラスタ結果と同じ場所に <結果のファイル名>_model.npz として保存し、
+    差分割り当てを有効にした場合は新しい画像だけを保存したモデルのクラスタに割り当てる
+    """
 
     def __init__(
         self,
         clustering_service: ClusteringService,
         cluster_repository: ClusterRepository,
+        incremental: bool = False,
+        refit_fraction: float = 0.1,
+        drift_threshold: float = 1.5,
     ) -> None:
         """画像クラスタリングユースケースを初期化
 
         Args:
             clustering_service: クラスタリングサービス
             cluster_repository: クラスタリポジトリ
+            incremental: 保存したモデルがあれば新しい画像だけを割り当てる
+            refit_fraction: 学習し直す新しい画像の割合
+            drift_threshold: 学習し直す割り当て距離の平均の倍率（学習時の基準に対する倍率）
         """
         self._clustering_service = clustering_service
         self._cluster_repository = cluster_repository
+        self._incremental = incremental
+        self._refit_fraction = refit_fraction
+        self._drift_threshold = drift_threshold
+
+    @staticmethod
+    def model_path(output_path: Path) -> Path:
+        """クラスタ結果に対応するモデルのファイルパスを取得
+
+        Args:
+            output_path: クラスタ結果のファイルパス
+
+        Returns:
+            ファイルパス（例: clusters_fine.json -> clusters_fine_model.npz）
+        """
+        return output_path.with_name(f"{output_path.stem}_model.npz")
 
     def execute(
         self, embeddings: List[Embedding], granularity: int, output_path: Path
@@ -36,7 +110,7 @@ class ClusterImages:
 
         Args:
             embeddings: 埋め込みベクトルのリスト
-            granularity: 詳細度レベル（1: 細かい、2: 粗い）
+            granularity: 詳細度レベル（1: 細かい、2: 粗い、3以降: さらに粗い階層）
             output_path: クラスタ結果の出力先ファイルパス
 
         Returns:
@@ -48,34 +122,53 @@ class ClusterImages:
 
         # 埋め込みベクトルを2次元配列に変換
         vectors = np.array([emb.vector for emb in embeddings])
+        image_ids = [emb.image_id for emb in embeddings]
+        model_path = self.model_path(output_path)
 
-        # クラスタリング実行
-        labels = self._clustering_service.fit_predict(vectors)
-
-        # Clusterオブジェクトを構築
-        clusters: List[Cluster] = []
-        unique_labels = np.unique(labels)
-
-        for label in unique_labels:
-            # このクラスタに属する画像IDを取得
-            indices = np.where(labels == label)[0]
-            image_ids = [embeddings[i].image_id for i in indices]
+        labels = self._assign_incrementally(vectors, image_ids, model_path)
+        if labels is None:
+            # クラスタリング実行
+            labels = self._clustering_service.fit_predict(vectors)
+            self._clustering_service.save_model(model_path, image_ids)
+            print(f"Saved cluster model to {model_path}")
 
-            cluster = Cluster(
-                cluster_id=int(label), image_ids=image_ids, granularity=granularity
-            )
-            clusters.append(cluster)
+        return build_cluster_result(
+            embeddings, labels, granularity, output_path, self._cluster_repository
+        )
 
-        # クラスタを保存
-        self._cluster_repository.save_all(clusters, output_path)
-        print(f"Saved {len(clusters)} clusters to {output_path}")
+    def _assign_incrementally(
+        self, vectors: np.ndarray, image_ids: List[str], model_path: Path
+    ) -> Optional[np.ndarray]:
+        """保存したモデルに新しい画像だけを割り当て
 
-        # 統計情報を表示
-        cluster_sizes = [cluster.size for cluster in clusters]
-        print(f"\nCluster statistics:")
-        print(f"  Min size: {min(cluster_sizes)}")
-        print(f"  Max size: {max(cluster_sizes)}")
-        print(f"  Average size: {np.mean(cluster_sizes):.1f}")
+        Args:
+            vectors: 特徴ベクトル（N x D）
+            image_ids: 画像ID
+            model_path: 保存したモデルのファイルパス
 
-        # ClusterResultを返す
-        return ClusterResult(clusters=clusters, granularity=granularity)
+        Returns:
+            クラスタラベル（差分割り当てが無効、モデルがない、
+            または学習し直す必要がある場合はNone）
+        """
+        if not self._incremental:
+            return None
+
+        model = self._clustering_service.load_model(model_path)
+        if model is None:
+            print(f"No cluster model for the current settings at {model_path}; fitting")
+            return None
+
+        def predict_levels(new_vectors: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+            # 1レベルのラベルとして返す
+            labels, distances = self._clustering_service.predict(new_vectors)
+            return [labels], distances
+
+        levels = assign_incrementally(
+            model,
+            vectors,
+            image_ids,
+            predict_levels,
+            self._refit_fraction,
+            self._drift_threshold,
+        )
+        return levels[0] if levels is not None else None
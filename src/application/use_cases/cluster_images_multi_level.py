@@ -0,0 +1,140 @@
+"""複数の詳細度をまとめてクラスタリングするユースケース"""
+
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.application.dto.cluster_result import ClusterResult
+from src.application.use_cases.build_neighbor_graph import BuildNeighborGraph
+from src.application.use_cases.cluster_images import build_cluster_result
+from src.application.use_cases.incremental_assignment import assign_incrementally
+from src.domain.models.cluster import Cluster
+from src.domain.models.embedding import Embedding
+from src.domain.repositories.cluster_repository import ClusterRepository
+from src.domain.services.hierarchical_clustering_service import HierarchicalClusteringService
+
+
+class ClusterImagesMultiLevel:
+    """1回のクラスタリングから全ての詳細度のクラスタを作成するユースケース
+
+    レベルkの結果は詳細度k（1: fine、2: coarse、3以降: levelk）として
+    clusters_<レベル名>.json に保存する。学習したモデルは cluster_model.npz に保存し、
+    差分割り当てを有効にした場合は新しい画像だけを保存したモデルのクラスタに割り当てる。
+    k近傍グラフは学習し直す場合だけ構築する（差分割り当てでは使わない）
+    """
+
+    MODEL_FILE_NAME = "cluster_model.npz"
+
+    def __init__(
+        self,
+        clustering_service: HierarchicalClusteringService,
+        cluster_repository: ClusterRepository,
+        incremental: bool = False,
+        refit_fraction: float = 0.1,
+        drift_threshold: float = 1.5,
+        build_neighbor_graph: Optional[BuildNeighborGraph] = None,
+    ) -> None:
+        """複数詳細度クラスタリングユースケースを初期化
+
+        Args:
+            clustering_service: 階層クラスタリングサービス
+            cluster_repository: クラスタリポジトリ
+            incremental: 保存したモデルがあれば新しい画像だけを割り当てる
+            refit_fraction: 学習し直す新しい画像の割合
+            drift_threshold: 学習し直す割り当て距離の平均の倍率（学習時の基準に対する倍率）
+            build_neighbor_graph: 学習に使うk近傍グラフの構築ユースケース
+                （Noneの場合はグラフを使わない）
+        """
+        self._clustering_service = clustering_service
+        self._cluster_repository = cluster_repository
+        self._incremental = incremental
+        self._refit_fraction = refit_fraction
+        self._drift_threshold = drift_threshold
+        self._build_neighbor_graph = build_neighbor_graph
+
+    @staticmethod
+    def output_path(output_dir: Path, granularity: int) -> Path:
+        """詳細度ごとのクラスタ結果のファイルパスを取得
+
+        Args:
+            output_dir: 出力先ディレクトリ
+            granularity: 詳細度レベル
+
+        Returns:
+            ファイルパス（例: clusters_fine.json）
+        """
+        return output_dir / f"clusters_{Cluster.level_name(granularity)}.json"
+
+    def execute(self, embeddings: List[Embedding], output_dir: Path) -> List[ClusterResult]:
+        """埋め込みベクトルをクラスタリングし、全ての詳細度の結果を保存
+
+        Args:
+            embeddings: 埋め込みベクトルのリスト
+            output_dir: クラスタ結果・モデル・k近傍グラフの出力先ディレクトリ
+
+        Returns:
+            詳細度ごとのクラスタリング結果（細かい順）
+        """
+        num_levels = self._clustering_service.get_n_levels()
+        print(f"\nClustering {len(embeddings)} images into {num_levels} levels...")
+
+        # 埋め込みベクトルを2次元配列に変換
+        vectors = np.array([emb.vector for emb in embeddings])
+        image_ids = [emb.image_id for emb in embeddings]
+        model_path = output_dir / self.MODEL_FILE_NAME
+
+        levels = self._assign_incrementally(vectors, image_ids, model_path)
+        if levels is None:
+            neighbor_graph = None
+            if self._build_neighbor_graph is not None:
+                neighbor_graph = self._build_neighbor_graph.execute(embeddings, output_dir)
+            # クラスタリング実行（階層の構築は一度だけ）
+            levels = self._clustering_service.fit_predict_levels(vectors, neighbor_graph)
+            self._clustering_service.save_model(model_path, image_ids)
+            print(f"Saved cluster model to {model_path}")
+
+        results: List[ClusterResult] = []
+        for granularity, labels in enumerate(levels, start=1):
+            print(f"\nGranularity: {granularity} ({Cluster.level_name(granularity)})")
+            results.append(
+                build_cluster_result(
+                    embeddings,
+                    labels,
+                    granularity,
+                    self.output_path(output_dir, granularity),
+                    self._cluster_repository,
+                )
+            )
+        return results
+
+    def _assign_incrementally(
+        self, vectors: np.ndarray, image_ids: List[str], model_path: Path
+    ) -> Optional[List[np.ndarray]]:
+        """保存したモデルに新しい画像だけを割り当て
+
+        Args:
+            vectors: 特徴ベクトル（N x D）
+            image_ids: 画像ID
+            model_path: 保存したモデルのファイルパス
+
+        Returns:
+            レベルごとのクラスタラベル（差分割り当てが無効、モデルがない、
+            または学習し直す必要がある場合はNone）
+        """
+        if not self._incremental:
+            return None
+
+        model = self._clustering_service.load_model(model_path)
+        if model is None:
+            print(f"No cluster model for the current settings at {model_path}; fitting")
+            return None
+
+        return assign_incrementally(
+            model,
+            vectors,
+            image_ids,
+            self._clustering_service.predict_levels,
+            self._refit_fraction,
+            self._drift_threshold,
+        )
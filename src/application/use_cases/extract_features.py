@@ -1,69 +1,281 @@
 """特徴抽出ユースケース"""
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
+import numpy as np
+
+from src.application.pipeline.prefetch_map import PrefetchMap
 from src.domain.models.embedding import Embedding
 from src.domain.models.thumbnail import Thumbnail
 from src.domain.repositories.embedding_repository import EmbeddingRepository
 from src.domain.services.feature_extraction_service import FeatureExtractionService
+from src.infrastructure.cache.content_hash import ContentHasher
+from src.infrastructure.cache.crop_cache import CropCache
+from src.infrastructure.cache.embedding_cache import EmbeddingCache
+from src.infrastructure.system.resources import SystemResources
+
+
+class _ExtractionItem:
+    """1枚のサムネイルの特徴抽出の途中状態"""
+
+    def __init__(self, index: int, thumbnail: Thumbnail, image_id: str) -> None:
+        self.index = index
+        self.thumbnail = thumbnail
+        self.image_id = image_id
+        # 元RAWの内容ハッシュ（埋め込みベクトルキャッシュ使用時）
+        self.content_hash: Optional[str] = None
+        # クロップキャッシュのフィンガープリント
+        self.fingerprint: Optional[str] = None
+        # クロップ（モデル入力）とキャッシュから読んだかどうか
+        self.crop: Optional[np.ndarray] = None
+        self.crop_cached = False
+        # キャッシュから読んだ特徴ベクトル
+        self.vector: Optional[np.ndarray] = None
+
+    def loaded_crop(self) -> np.ndarray:
+        """読み込み済みのクロップを取得
+
+        Returns:
+            クロップ（モデル入力）
+
+        Raises:
+            RuntimeError: クロップが読み込まれていない場合
+        """
+        if self.crop is None:
+            raise RuntimeError(f"Crop has not been loaded for {self.image_id}")
+        return self.crop
 
 
 class ExtractFeatures:
-    """サムネイル画像から特徴ベクトルを抽出するユースケース"""
+    """サムネイル画像から特徴ベクトルを抽出するユースケース
+
+    画像のデコードと前処理はスレッドプールで先行して行い、推論と重ねて実行する
+    """
+
+    # 先読みスレッド数の上限（未指定時）
+    MAX_LOADER_WORKERS = 8
+    # 先読みする画像数（readahead・batch_sizeがどちらも未指定の場合）
+    DEFAULT_READAHEAD = 128
 
     def __init__(
         self,
         feature_extractor: FeatureExtractionService,
         embedding_repository: EmbeddingRepository,
+        crop_cache: Optional[CropCache] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        batch_size: Optional[int] = None,
+        loader_workers: Optional[int] = None,
+        readahead: Optional[int] = None,
     ) -> None:
         """特徴抽出ユースケースを初期化
 
         Args:
             feature_extractor: 特徴抽出サービス
             embedding_repository: 埋め込みベクトルリポジトリ
+            crop_cache: 前処理済みクロップのキャッシュ（指定時は2回目以降の
+                JPEGデコードとリサイズを省略）
+            embedding_cache: 埋め込みベクトルのキャッシュ（指定時は内容が変わっていない
+                画像の特徴抽出を省略）
+            batch_size: まとめて推論する画像数（未指定時は最初に推論が必要になった時点で
+                特徴抽出サービスから取得するため、全てキャッシュから読めれば計測しない）
+            loader_workers: 画像のデコードと前処理を行うスレッド数
+                （未指定時はCPUコア数、最大MAX_LOADER_WORKERS）
+            readahead: 推論と並行して先読みする画像数の上限（未指定時はbatch_sizeの2倍、
+                batch_sizeも未指定の場合はDEFAULT_READAHEAD）
         """
         self._feature_extractor = feature_extractor
         self._embedding_repository = embedding_repository
+        self._crop_cache = crop_cache
+        self._embedding_cache = embedding_cache
+        self._content_hasher = ContentHasher()
+        self._batch_size = batch_size
+        self._loader_workers = loader_workers or min(
+            self.MAX_LOADER_WORKERS, SystemResources.cpu_count()
+        )
+        self._readahead = readahead
 
     def execute(
-        self, thumbnails: List[Thumbnail], output_dir: Path, base_dir: Optional[Path] = None
+        self,
+        thumbnails: Iterable[Thumbnail],
+        output_dir: Path,
+        base_dir: Optional[Path] = None,
     ) -> List[Embedding]:
         """サムネイル画像から特徴ベクトルを抽出
 
         Args:
-            thumbnails: サムネイルのリスト
+            thumbnails: サムネイルのリスト、またはサムネイル生成と並行して
+                サムネイルを順次返すイテラブル（件数は事前に分からなくてもよい）
             output_dir: 埋め込みベクトルの出力先ディレクトリ
             base_dir: RAW画像のベースディレクトリ（相対パス計算用）
 
         Returns:
             埋め込みベクトルのリスト
         """
-        print(f"\nExtracting features from {len(thumbnails)} thumbnails...")
+        total = len(thumbnails) if isinstance(thumbnails, list) else None
+        if total is not None:
+            print(f"\nExtracting features from {total} thumbnails...")
+        else:
+            print("\nExtracting features from thumbnails as they are generated...")
         print(f"Model: {self._feature_extractor.get_model_name()}")
 
-        embeddings: List[Embedding] = []
+        # 入力と同じ順序で返すため、位置ごとに結果を格納する
+        results: List[Optional[Embedding]] = []
+        batch_size = self._batch_size
+        pending: List[_ExtractionItem] = []
+        num_cached = 0
 
-        for i, thumbnail in enumerate(thumbnails, 1):
-            if i % 10 == 0 or i == len(thumbnails):
-                print(f"  Progress: {i}/{len(thumbnails)}")
+        # 後続の画像のデコードと前処理を推論と並行して進める
+        loaded = PrefetchMap(
+            self._load_crop,
+            self._items(thumbnails, base_dir),
+            max_workers=self._loader_workers,
+            readahead=self._readahead or (batch_size * 2 if batch_size else self.DEFAULT_READAHEAD),
+        )
 
-            # 特徴ベクトルを抽出
-            vector = self._feature_extractor.extract(thumbnail.path)
+        try:
+            for i, item in enumerate(loaded, 1):
+                if total is None:
+                    if i % 10 == 0:
+                        print(f"  Progress: {i}")
+                elif i % 10 == 0 or i == total:
+                    print(f"  Progress: {i}/{total}")
 
-            # 一意のIDを取得（ネストしたディレクトリ構造に対応）
-            image_id = thumbnail.get_unique_id(base_dir)
+                results.append(None)
+                if item.vector is not None:
+                    results[item.index] = self._to_embedding(item.image_id, item.vector)
+                    num_cached += 1
+                    continue
 
-            # Embeddingオブジェクトを作成
-            embedding = Embedding(
-                image_id=image_id,
-                vector=vector,
-                model_name=self._feature_extractor.get_model_name(),
-            )
-            embeddings.append(embedding)
+                crop = item.loaded_crop()
+                if not item.crop_cached and self._crop_cache is not None and item.fingerprint:
+                    self._crop_cache.put(item.image_id, item.fingerprint, crop)
 
-        # 埋め込みベクトルを保存
-        self._embedding_repository.save_all(embeddings, output_dir)
-        print(f"Saved {len(embeddings)} embeddings to {output_dir}")
+                pending.append(item)
+                if batch_size is None:
+                    # 推論が必要になった時点で決める（計測にはモデルの読み込みと試行推論を伴う）
+                    batch_size = self._feature_extractor.get_batch_size()
+
+                # バッチが揃ったらまとめて特徴ベクトルを抽出
+                if len(pending) >= batch_size:
+                    self._extract_pending(pending, results)
+                    pending = []
+
+            self._extract_pending(pending, results)
+            embeddings = [embedding for embedding in results if embedding is not None]
+
+            if num_cached:
+                print(f"Reused {num_cached} cached embeddings")
+
+            # 埋め込みベクトルを保存
+            self._embedding_repository.save_all(embeddings, output_dir)
+            print(f"Saved {len(embeddings)} embeddings to {output_dir}")
+        finally:
+            # 途中で失敗した場合もキャッシュのメモリマップを閉じる
+            for cache in (self._crop_cache, self._embedding_cache):
+                if cache is not None:
+                    cache.close()
 
         return embeddings
+
+    def _extract_pending(
+        self, items: List[_ExtractionItem], results: List[Optional[Embedding]]
+    ) -> None:
+        """溜まったクロップから1バッチで特徴ベクトルを抽出
+
+        Args:
+            items: クロップを読み込み済みの要素のリスト
+            results: 結果の格納先（各要素のindexの位置に格納する）
+        """
+        if not items:
+            return
+
+        crops = np.stack([item.loaded_crop() for item in items])
+        vectors = self._feature_extractor.extract_inputs(crops)
+        for item, vector in zip(items, vectors):
+            results[item.index] = self._to_embedding(item.image_id, vector)
+            if self._embedding_cache is not None and item.content_hash is not None:
+                self._embedding_cache.put(item.content_hash, vector)
+
+    def _to_embedding(self, image_id: str, vector: np.ndarray) -> Embedding:
+        """特徴ベクトルからEmbeddingを作成"""
+        return Embedding(
+            image_id=image_id,
+            vector=vector,
+            model_name=self._feature_extractor.get_model_name(),
+        )
+
+    def _items(
+        self, thumbnails: Iterable[Thumbnail], base_dir: Optional[Path]
+    ) -> Iterator[_ExtractionItem]:
+        """サムネイルごとにキャッシュを確認して特徴抽出の要素を作成
+
+        キャッシュへのアクセスは呼び出し元のスレッドでのみ行う
+
+        Args:
+            thumbnails: サムネイルのイテラブル
+            base_dir: RAW画像のベースディレクトリ
+
+        Yields:
+            特徴抽出の要素
+        """
+        for index, thumbnail in enumerate(thumbnails):
+            # 一意のIDを取得（ネストしたディレクトリ構造に対応）
+            item = _ExtractionItem(index, thumbnail, thumbnail.get_unique_id(base_dir))
+
+            if self._embedding_cache is not None:
+                item.content_hash = self._content_hasher.hash(thumbnail.source.path)
+                item.vector = self._embedding_cache.get(item.content_hash)
+                if item.vector is not None:
+                    thumbnail.image = None
+                    yield item
+                    continue
+
+            item.fingerprint = self._fingerprint(thumbnail)
+            if self._crop_cache is not None:
+                item.crop = self._crop_cache.get(item.image_id, item.fingerprint)
+                if item.crop is not None:
+                    item.crop_cached = True
+                    thumbnail.image = None
+
+            yield item
+
+    def _load_crop(self, item: _ExtractionItem) -> _ExtractionItem:
+        """要素のモデル入力用クロップを作成（ワーカースレッドで実行）
+
+        Args:
+            item: 特徴抽出の要素
+
+        Returns:
+            クロップを設定した要素（キャッシュで済む場合はそのまま）
+        """
+        if item.vector is not None or item.crop is not None:
+            return item
+
+        # 画素がメモリ上にあればファイルを読まない
+        thumbnail = item.thumbnail
+        if thumbnail.image is not None:
+            item.crop = self._feature_extractor.prepare_input(thumbnail.image)
+            # 前処理後は画素を保持し続けないよう解放
+            thumbnail.image = None
+        else:
+            item.crop = self._feature_extractor.load_input(thumbnail.path)
+
+        return item
+
+    @staticmethod
+    def _fingerprint(thumbnail: Thumbnail) -> str:
+        """クロップの元になった画像のフィンガープリントを作成
+
+        サムネイルファイルがあればそのサイズと更新時刻（再生成で変わる）、
+        なければ元のRAWファイルのサイズと更新時刻を使う
+
+        Args:
+            thumbnail: サムネイル
+
+        Returns:
+            フィンガープリント文字列
+        """
+        path = thumbnail.path if thumbnail.exists else thumbnail.source.path
+        stat = path.stat()
+        return f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
@@ -1,47 +1,134 @@
 """サムネイル生成ユースケース"""
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from src.domain.models.raw_image import RawImage
 from src.domain.models.thumbnail import Thumbnail
 from src.domain.repositories.raw_image_repository import RawImageRepository
 from src.domain.repositories.thumbnail_repository import ThumbnailRepository
+from src.infrastructure.cache.cache_manager import CacheManager
 from src.infrastructure.converters.raw_to_jpeg_converter import RawToJpegConverter
+from src.infrastructure.converters.shared_image_buffer import SharedImageBuffer, SharedImageRef
+from src.infrastructure.system.resources import SystemResources
+
+# ワーカープロセスごとに1度だけ構築する変換器と動作設定（_init_workerで設定）
+_worker_converter: Optional[RawToJpegConverter] = None
+_worker_in_memory_handoff = False
+_worker_write_thumbnails = True
+
+# ワーカーからの変換結果: (RAW画像パス, サムネイルパス, 共有メモリ上の画素への参照)
+# 失敗時のサムネイルパスはNone、画素を受け渡さない場合の参照はNone
+ConversionResult = Tuple[Path, Optional[Path], Optional[SharedImageRef]]
 
 
-def _convert_thumbnail(args: tuple) -> Optional[Thumbnail]:
-    """単一のRAW画像をサムネイルに変換（並列処理用）
+def _init_worker(
+    base_dir: Path,
+    cache_dir: Path,
+    converter_settings: Dict[str, Any],
+    in_memory_handoff: bool,
+    write_thumbnails: bool,
+) -> None:
+    """ワーカープロセスの初期化（並列処理用）
 
     Args:
-        args: (raw_image_path, cache_manager_base_dir, cache_dir, size) のタプル
+        base_dir: キャッシュマネージャーのベースディレクトリ
+        cache_dir: キャッシュディレクトリ
+        converter_settings: 変換器の設定（RawToJpegConverter.settings）
+        in_memory_handoff: 生成した画素を共有メモリ経由でメインプロセスへ渡すか
+        write_thumbnails: サムネイルJPEGをファイルに書き出すか
+    """
+    global _worker_converter, _worker_in_memory_handoff, _worker_write_thumbnails
+
+    # 各プロセスでCacheManagerを再作成（プロセス間で共有できないため）
+    cache_manager = CacheManager(base_dir=base_dir, cache_dir=cache_dir)
+    _worker_converter = RawToJpegConverter(
+        cache_manager=cache_manager,
+        # マッピングはメインプロセスでまとめて記録する
+        record_mapping=False,
+        **converter_settings,
+    )
+    _worker_in_memory_handoff = in_memory_handoff
+    _worker_write_thumbnails = write_thumbnails
+
+
+def _get_worker_converter() -> RawToJpegConverter:
+    """ワーカープロセスの変換器を取得
 
     Returns:
-        生成されたサムネイル、失敗時はNone
+        _init_workerで構築した変換器
+
+    Raises:
+        RuntimeError: _init_workerで初期化されていないプロセスから呼ばれた場合
     """
-    from pathlib import Path
-    from src.domain.models.raw_image import RawImage
-    from src.infrastructure.cache.cache_manager import CacheManager
-    from src.infrastructure.converters.raw_to_jpeg_converter import RawToJpegConverter
+    if _worker_converter is None:
+        raise RuntimeError("Thumbnail worker has not been initialized")
+    return _worker_converter
 
-    raw_image_path, cache_manager_base_dir, cache_dir, size = args
-    raw_image = RawImage(raw_image_path)
-    # 各プロセスでCacheManagerを再作成（プロセス間で共有できないため）
-    cache_manager = CacheManager(base_dir=Path(cache_manager_base_dir), cache_dir=Path(cache_dir))
-    converter = RawToJpegConverter(size=size, cache_manager=cache_manager)
-    return converter.convert(raw_image)
+
+def _convert_chunk(raw_image_paths: List[Path]) -> List[ConversionResult]:
+    """複数のRAW画像をまとめてサムネイルに変換（並列処理用）
+
+    Args:
+        raw_image_paths: RAW画像パスのリスト
+
+    Returns:
+        変換結果のリスト
+    """
+    results: List[ConversionResult] = []
+    converter = _get_worker_converter()
+
+    for raw_image_path in raw_image_paths:
+        try:
+            raw_image = RawImage(raw_image_path)
+
+            if not _worker_in_memory_handoff:
+                thumbnail = converter.convert(raw_image)
+                results.append((raw_image_path, thumbnail.path if thumbnail else None, None))
+                continue
+
+            img = converter.render(raw_image)
+            if _worker_write_thumbnails:
+                thumbnail_path = converter.save(raw_image, img).path
+            else:
+                thumbnail_path = converter.get_output_path(raw_image)
+            image_ref = SharedImageBuffer.publish(np.asarray(img.convert("RGB")))
+            results.append((raw_image_path, thumbnail_path, image_ref))
+
+        except Exception as e:
+            print(f"Failed to convert {raw_image_path}: {e}")
+            results.append((raw_image_path, None, None))
+
+    return results
 
 
 class GenerateThumbnails:
     """RAW画像からサムネイルを生成するユースケース"""
 
+    # マッピングをまとめて記録する件数
+    MAPPING_BATCH_SIZE = 256
+    # 1チャンクあたりの最大ファイル数（chunk_size未指定時）
+    MAX_CHUNK_SIZE = 16
+    # メモリ予算未指定時に使う、空きメモリに対する割合
+    MEMORY_BUDGET_FRACTION = 0.75
+    # ワーカープロセス1つが変換処理以外で常に使うメモリ（インタプリタ・ライブラリ）
+    WORKER_BASE_MEMORY = 128 * 1024 * 1024
+
     def __init__(
         self,
         raw_repository: RawImageRepository,
         thumbnail_repository: ThumbnailRepository,
         converter: RawToJpegConverter,
-        max_workers: int = 8,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        in_memory_handoff: bool = False,
+        write_thumbnails: bool = True,
     ) -> None:
         """サムネイル生成ユースケースを初期化
 
@@ -49,12 +136,30 @@ class GenerateThumbnails:
             raw_repository: RAW画像リポジトリ
             thumbnail_repository: サムネイルリポジトリ
             converter: RAW→JPEG変換器
-            max_workers: 並列処理のワーカー数（デフォルト: 8）
+            max_workers: 並列処理のワーカー数（未指定時はCPUコア数とメモリ予算から自動決定）
+            chunk_size: ワーカーに一度に渡すファイル数（未指定時はファイル数から自動決定）
+            memory_budget: 同時に実行するデコードに割り当てるメモリ量（バイト）
+                （未指定時は空きメモリのMEMORY_BUDGET_FRACTION）
+            in_memory_handoff: 生成した画素を共有メモリ経由で受け取り、Thumbnail.imageに
+                保持して返すか（特徴抽出でJPEGを読み直さない。全件を保持すると
+                メモリを消費するため、iter_executeで順次消費する場合に使用する）
+            write_thumbnails: サムネイルJPEGをファイルに書き出すか
+                （Falseはin_memory_handoffと併用する場合のみ有効）
+
+        Raises:
+            ValueError: in_memory_handoffなしでwrite_thumbnails=Falseを指定した場合
         """
+        if not write_thumbnails and not in_memory_handoff:
+            raise ValueError("write_thumbnails=False requires in_memory_handoff=True")
+
         self._raw_repository = raw_repository
         self._thumbnail_repository = thumbnail_repository
         self._converter = converter
         self._max_workers = max_workers
+        self._chunk_size = chunk_size
+        self._memory_budget = memory_budget
+        self._in_memory_handoff = in_memory_handoff
+        self._write_thumbnails = write_thumbnails
 
     def execute(self, directory: Path) -> List[Thumbnail]:
         """指定ディレクトリのRAW画像からサムネイルを生成
@@ -65,41 +170,247 @@ class GenerateThumbnails:
         Returns:
             生成されたサムネイルのリスト
         """
+        thumbnails = list(self.iter_execute(directory))
+        print(f"Successfully generated {len(thumbnails)} thumbnails")
+        return thumbnails
+
+    def iter_execute(self, directory: Path) -> Iterator[Thumbnail]:
+        """指定ディレクトリのRAW画像からサムネイルを生成し、準備できた順に返す
+
+        再利用可能なサムネイルを先に返し、その後は変換が完了した順に返す。
+        後続の処理（特徴抽出など）と並行して変換を進める場合に使用する
+
+        Args:
+            directory: RAW画像が格納されているディレクトリ
+
+        Yields:
+            サムネイル
+        """
         # RAW画像を取得
         raw_images = self._raw_repository.find_all(directory)
 
-        # 並列処理でサムネイルを生成
-        thumbnails: List[Thumbnail] = []
-        raw_image_paths = [img.path for img in raw_images]
-
-        # コンバーターの設定を取得
-        size = self._converter._size
-        cache_manager = self._converter._cache_manager
+        cache_manager = self._converter.cache_manager
         if cache_manager is None:
             raise ValueError("CacheManager is required for thumbnail generation")
 
-        cache_manager_base_dir = cache_manager.base_dir
-        cache_dir = cache_manager.cache_dir
+        size = self._converter.size
+        settings = self._converter.settings
 
-        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
-            # 並列処理を開始
-            futures = {
-                executor.submit(_convert_thumbnail, (path, cache_manager_base_dir, cache_dir, size)): path
-                for path in raw_image_paths
-            }
+        # 変更のないRAW画像は既存のサムネイルを再利用
+        valid_thumbnails = cache_manager.find_valid_thumbnails(
+            [img.path for img in raw_images], settings
+        )
+        if valid_thumbnails:
+            print(f"Reusing {len(valid_thumbnails)} up-to-date thumbnails")
 
-            # 完了した順に結果を取得
-            for i, future in enumerate(as_completed(futures), 1):
-                path = futures[future]
-                print(f"Converting {i}/{len(raw_images)}: {path.name}")
+        for raw_image in raw_images:
+            thumbnail_path = valid_thumbnails.get(raw_image.path)
+            if thumbnail_path is not None:
+                yield Thumbnail(path=thumbnail_path, source=raw_image, size=size)
 
+        # 残りを並列処理で生成
+        raw_images_to_convert = {
+            img.path: img for img in raw_images if img.path not in valid_thumbnails
+        }
+        pending_mappings: List[Tuple[Path, Path, Dict[str, Any]]] = []
+
+        try:
+            results = self._convert_in_pool(list(raw_images_to_convert), cache_manager)
+            for i, (raw_image_path, thumbnail_path, image_ref) in enumerate(results, 1):
+                # 受け取った画素は共有メモリに残さないよう、他の処理より先に取り出す
+                image = SharedImageBuffer.consume(image_ref) if image_ref else None
+                print(f"Converting {i}/{len(raw_images_to_convert)}: {raw_image_path.name}")
+
+                if thumbnail_path is None:
+                    continue
+
+                thumbnail = Thumbnail(
+                    path=thumbnail_path,
+                    source=raw_images_to_convert[raw_image_path],
+                    size=size,
+                    image=image,
+                )
                 try:
-                    thumbnail = future.result()
-                    if thumbnail:
-                        self._thumbnail_repository.save(thumbnail)
-                        thumbnails.append(thumbnail)
+                    self._thumbnail_repository.save(thumbnail)
                 except Exception as e:
-                    print(f"Error converting {path.name}: {e}")
+                    print(f"Error converting {raw_image_path.name}: {e}")
+                    continue
 
-        print(f"Successfully generated {len(thumbnails)} thumbnails")
-        return thumbnails
+                if not self._write_thumbnails:
+                    # ファイルを書き出していないためマッピングは記録しない
+                    yield thumbnail
+                    continue
+
+                pending_mappings.append((raw_image_path, thumbnail_path, settings))
+                if len(pending_mappings) >= self.MAPPING_BATCH_SIZE:
+                    cache_manager.add_raw_thumbnail_mappings(pending_mappings)
+                    pending_mappings = []
+
+                yield thumbnail
+        finally:
+            # 途中で中断された場合も、生成済みのサムネイルは記録しておく
+            cache_manager.add_raw_thumbnail_mappings(pending_mappings)
+
+    def _convert_in_pool(
+        self, raw_image_paths: List[Path], cache_manager: CacheManager
+    ) -> Iterator[ConversionResult]:
+        """ワーカープールでRAW画像をチャンク単位に変換し、完了した順に結果を返す
+
+        各ワーカーは初期化時に変換器を1度だけ構築する。
+        各ファイルのデコードに必要なメモリをRAWのヘッダーから見積もり、
+        実行中のチャンクの合計がメモリ予算を超えないようにチャンクを投入する
+        （チャンク内のファイルは順に処理されるため、チャンクの見積もりは最大のファイルの値）。
+        予算を超えるファイルでも、他に実行中のチャンクがなければ1つずつ実行する
+
+        Args:
+            raw_image_paths: 変換するRAW画像パスのリスト
+            cache_manager: キャッシュマネージャー
+
+        Yields:
+            変換結果
+        """
+        if not raw_image_paths:
+            return
+
+        if self._in_memory_handoff:
+            SharedImageBuffer.prepare()
+
+        costs = [self._converter.estimate_decode_memory(path) for path in raw_image_paths]
+        memory_budget = self._resolve_memory_budget()
+        max_workers = self._resolve_max_workers(costs, memory_budget)
+
+        chunk_size = self._chunk_size or self._auto_chunk_size(len(raw_image_paths), max_workers)
+        chunks = [
+            (raw_image_paths[i : i + chunk_size], max(costs[i : i + chunk_size]))
+            for i in range(0, len(raw_image_paths), chunk_size)
+        ]
+
+        if memory_budget is None:
+            # 予算がなければ待ち時間を減らすためワーカー数の2倍まで投入
+            max_in_flight = max_workers * 2
+            decode_budget: Optional[int] = None
+        else:
+            # 投入済みのチャンクはすぐに実行されるものとして予算を割り当てる
+            max_in_flight = max_workers
+            decode_budget = max(0, memory_budget - max_workers * self.WORKER_BASE_MEMORY)
+            print(
+                f"Using {max_workers} workers "
+                f"(memory budget: {memory_budget // (1024 * 1024)} MiB)"
+            )
+
+        # ストリーミング時はバックグラウンドスレッドから呼ばれ、メインスレッドではtorchや
+        # OpenMPのスレッドが動いているため、forkせずspawnでワーカーを起動する
+        # （fork時点で他スレッドが保持していたロックを子プロセスが引き継ぐとデッドロックする）
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                cache_manager.base_dir,
+                cache_manager.cache_dir,
+                self._converter.settings,
+                self._in_memory_handoff,
+                self._write_thumbnails,
+            ),
+        ) as executor:
+            in_flight: Dict[Future, Tuple[List[Path], int]] = {}
+            in_flight_cost = 0
+            next_chunk = 0
+            # 完了したチャンクのうち、まだ返していない変換結果
+            unyielded: Deque[ConversionResult] = deque()
+
+            try:
+                while True:
+                    # 件数とメモリ予算の上限まで新しいチャンクを投入
+                    while next_chunk < len(chunks) and len(in_flight) < max_in_flight:
+                        chunk, cost = chunks[next_chunk]
+                        if (
+                            decode_budget is not None
+                            and in_flight
+                            and in_flight_cost + cost > decode_budget
+                        ):
+                            break
+                        in_flight[executor.submit(_convert_chunk, chunk)] = (chunk, cost)
+                        in_flight_cost += cost
+                        next_chunk += 1
+
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk, cost = in_flight.pop(future)
+                        in_flight_cost -= cost
+                        try:
+                            unyielded.extend(future.result())
+                        except Exception as e:
+                            # ワーカーの異常終了などでチャンク全体が失敗した場合
+                            print(f"Error converting {len(chunk)} files: {e}")
+                            unyielded.extend(
+                                (raw_image_path, None, None) for raw_image_path in chunk
+                            )
+                        while unyielded:
+                            yield unyielded.popleft()
+            finally:
+                # 途中で中断された場合、返していない画素の共有メモリを解放する
+                # （未着手のチャンクは取り消し、実行中のチャンクは完了を待って解放する）
+                for future in in_flight:
+                    future.cancel()
+                for future in in_flight:
+                    if not future.cancelled() and future.exception() is None:
+                        unyielded.extend(future.result())
+                for _, _, image_ref in unyielded:
+                    if image_ref is not None:
+                        SharedImageBuffer.discard(image_ref)
+
+    def _resolve_memory_budget(self) -> Optional[int]:
+        """デコードに使うメモリ予算を決定
+
+        Returns:
+            バイト数、指定がなく空きメモリも取得できない場合はNone（予算による制限なし）
+        """
+        if self._memory_budget is not None:
+            return self._memory_budget
+
+        available = SystemResources.available_memory()
+        if available is None:
+            return None
+        return int(available * self.MEMORY_BUDGET_FRACTION)
+
+    def _resolve_max_workers(self, costs: List[int], memory_budget: Optional[int]) -> int:
+        """ワーカー数を決定
+
+        指定がなければ、CPUコア数と「メモリ予算で同時に実行できる典型的なデコード数」
+        の小さい方とする（典型的なデコードの見積もりは中央値）
+
+        Args:
+            costs: 各ファイルのデコードに必要なメモリの見積もり
+            memory_budget: メモリ予算（制限なしの場合はNone）
+
+        Returns:
+            ワーカー数
+        """
+        if self._max_workers is not None:
+            return self._max_workers
+
+        max_workers = SystemResources.cpu_count()
+        if memory_budget is not None:
+            typical_cost = sorted(costs)[len(costs) // 2]
+            max_workers = min(
+                max_workers, memory_budget // (typical_cost + self.WORKER_BASE_MEMORY)
+            )
+        return max(1, min(max_workers, len(costs)))
+
+    def _auto_chunk_size(self, num_files: int, max_workers: int) -> int:
+        """ファイル数からチャンクサイズを決定
+
+        各ワーカーに少なくとも4チャンクが行き渡るようにし、負荷の偏りを抑える
+
+        Args:
+            num_files: 変換するファイル数
+            max_workers: ワーカー数
+
+        Returns:
+            チャンクサイズ
+        """
+        return max(1, min(self.MAX_CHUNK_SIZE, num_files // (max_workers * 4)))
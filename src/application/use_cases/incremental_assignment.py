@@ -0,0 +1,77 @@
+"""保存したクラスタモデルへの新しい画像の差分割り当て"""
+
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.domain.models.cluster_model import ClusterModel
+from src.domain.models.fingerprint import fingerprint_vectors
+
+# 新しいベクトルのレベルごとのラベルと割り当て距離を返す関数
+PredictLevels = Callable[[np.ndarray], Tuple[List[np.ndarray], np.ndarray]]
+
+
+def assign_incrementally(
+    model: ClusterModel,
+    vectors: np.ndarray,
+    image_ids: List[str],
+    predict_levels: PredictLevels,
+    refit_fraction: float,
+    drift_threshold: float,
+) -> Optional[List[np.ndarray]]:
+    """学習済みの画像はラベルをそのまま使い、新しい画像だけを既存のクラスタに割り当てる
+
+    新しい画像（学習に使っていない、またはベクトルが変わった画像）の割合が
+    refit_fractionを超えた場合、または新しい画像の割り当て距離の平均が学習時の基準の
+    drift_threshold倍を超えた場合（分布が変わった）は割り当てずにNoneを返す。
+    学習に使った画像が1枚も含まれない場合（次元削減の設定を変えた場合など）もNoneを返す
+
+    Args:
+        model: 読み込んだクラスタモデル
+        vectors: 特徴ベクトル（N x D、image_idsと同じ順序）
+        image_ids: 画像ID
+        predict_levels: 新しいベクトルのレベルごとのラベルと割り当て距離を返す関数
+        refit_fraction: 学習し直す新しい画像の割合（学習に使った画像数に対する割合）
+        drift_threshold: 学習し直す割り当て距離の平均の倍率
+
+    Returns:
+        レベルごとのクラスタラベル（細かい順、各要素はN個）。学習し直す必要がある場合はNone
+    """
+    if model.size == 0:
+        return None
+
+    rows = model.known_rows(image_ids, fingerprint_vectors(vectors))
+    new = np.flatnonzero(rows < 0)
+    new_fraction = len(new) / model.size
+    if len(new) == len(image_ids):
+        print("No images match the saved cluster model; refitting")
+        return None
+    if new_fraction > refit_fraction:
+        print(
+            f"New images: {len(new)} ({new_fraction:.1%} of the model), "
+            f"exceeds {refit_fraction:.1%}; refitting"
+        )
+        return None
+
+    levels = [labels[np.maximum(rows, 0)] for labels in model.labels]
+    if len(new) == 0:
+        print("No new images; reused cluster labels from the saved model")
+        return levels
+
+    new_levels, distances = predict_levels(vectors[new])
+    mean_distance = float(distances.mean())
+    if model.reference_distance > 0:
+        drift = mean_distance / model.reference_distance
+    else:
+        drift = np.inf if mean_distance > 0 else 1.0
+    if drift > drift_threshold:
+        print(f"Assignment distance drift {drift:.2f} exceeds {drift_threshold:.2f}; refitting")
+        return None
+
+    for labels, new_labels in zip(levels, new_levels):
+        labels[new] = new_labels
+    print(
+        f"Assigned {len(new)} new images to existing clusters "
+        f"(new {new_fraction:.1%}, drift {drift:.2f})"
+    )
+    return levels
@@ -1,13 +1,18 @@
 """RAW画像整理ユースケース（全体orchestration）"""
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
 from src.application.dto.cluster_result import ClusterResult
+from src.application.pipeline.background_iterator import BackgroundIterator
 from src.application.use_cases.cluster_images import ClusterImages
+from src.application.use_cases.cluster_images_multi_level import ClusterImagesMultiLevel
 from src.application.use_cases.extract_features import ExtractFeatures
 from src.application.use_cases.generate_thumbnails import GenerateThumbnails
+from src.application.use_cases.reduce_dimensions import ReduceDimensions
 from src.application.use_cases.update_xmp_metadata import UpdateXmpMetadata
+from src.domain.models.embedding import Embedding
+from src.domain.models.thumbnail import Thumbnail
 from src.infrastructure.cache.cache_manager import CacheManager
 from src.ui.cli.presenters.console_presenter import ConsolePresenter
 
@@ -17,38 +22,71 @@ class OrganizeRawImages:
 
     以下の処理を順番に実行:
     1. サムネイル生成
-    2. 特徴抽出
+    2. 特徴抽出（次元削減が指定された場合は続けて射影）
     3. クラスタリング（詳細度1: Fine）
     4. クラスタリング（詳細度2: Coarse）
     5. XMPメタデータ更新
     6. キャッシュクリーンアップ
+
+    複数詳細度のクラスタリングが指定された場合は、3と4の代わりに
+    共通の階層から全ての詳細度を一度に抽出する
+
+    ストリーミングモードでは1と2を並行して実行し、生成されたサムネイルから
+    順次特徴抽出を行う（サムネイルの先読み量はstream_buffer_sizeで制限）
     """
 
     def __init__(
         self,
         generate_thumbnails: GenerateThumbnails,
         extract_features: ExtractFeatures,
-        cluster_images_fine: ClusterImages,
-        cluster_images_coarse: ClusterImages,
+        cluster_images_fine: Optional[ClusterImages],
+        cluster_images_coarse: Optional[ClusterImages],
         update_xmp: UpdateXmpMetadata,
         cache_manager: Optional[CacheManager] = None,
+        streaming: bool = False,
+        stream_buffer_size: int = 64,
+        reduce_dimensions: Optional[ReduceDimensions] = None,
+        cluster_images_multi_level: Optional[ClusterImagesMultiLevel] = None,
     ) -> None:
         """RAW画像整理ユースケースを初期化
 
         Args:
             generate_thumbnails: サムネイル生成ユースケース
             extract_features: 特徴抽出ユースケース
-            cluster_images_fine: クラスタリングユースケース（詳細度1: Fine）
-            cluster_images_coarse: クラスタリングユースケース（詳細度2: Coarse）
+            cluster_images_fine: クラスタリングユースケース（詳細度1: Fine、
+                cluster_images_multi_levelを指定する場合はNone）
+            cluster_images_coarse: クラスタリングユースケース（詳細度2: Coarse、
+                cluster_images_multi_levelを指定する場合はNone）
             update_xmp: XMP更新ユースケース
             cache_manager: キャッシュマネージャー
+            streaming: サムネイル生成と特徴抽出を並行して実行するか
+            stream_buffer_size: ストリーミング時に特徴抽出待ちで保持するサムネイルの最大数
+            reduce_dimensions: クラスタリング前の次元削減ユースケース（Noneの場合は削減しない）
+            cluster_images_multi_level: 全ての詳細度を1回のクラスタリングで作成するユースケース
+
+        Raises:
+            ValueError: cluster_images_multi_levelも、cluster_images_fineと
+                cluster_images_coarseの組も指定されていない場合
         """
+        # 複数詳細度のクラスタリング、または詳細度1・2のクラスタリングの組
+        self._cluster_images: Union[ClusterImagesMultiLevel, Tuple[ClusterImages, ClusterImages]]
+        if cluster_images_multi_level is not None:
+            self._cluster_images = cluster_images_multi_level
+        elif cluster_images_fine is not None and cluster_images_coarse is not None:
+            self._cluster_images = (cluster_images_fine, cluster_images_coarse)
+        else:
+            raise ValueError(
+                "Either cluster_images_multi_level or both cluster_images_fine and "
+                "cluster_images_coarse are required"
+            )
+
         self._generate_thumbnails = generate_thumbnails
         self._extract_features = extract_features
-        self._cluster_images_fine = cluster_images_fine
-        self._cluster_images_coarse = cluster_images_coarse
         self._update_xmp = update_xmp
         self._cache_manager = cache_manager
+        self._streaming = streaming
+        self._stream_buffer_size = stream_buffer_size
+        self._reduce_dimensions = reduce_dimensions
 
     def execute(
         self,
@@ -70,49 +108,81 @@ class OrganizeRawImages:
         print("RAW画像自動分類ツール")
         print("=" * 70)
 
-        # 1. サムネイル生成
-        print("\n[Step 1/5] サムネイル生成")
-        print("-" * 70)
-        thumbnails = self._generate_thumbnails.execute(directory)
-        ConsolePresenter.show_info(f"Generated {len(thumbnails)} thumbnails")
+        if self._streaming:
+            # 1-2. サムネイル生成と特徴抽出を並行実行
+            print("\n[Step 1-2/5] サムネイル生成 + 特徴抽出（ストリーミング）")
+            print("-" * 70)
+            thumbnails, embeddings = self._generate_and_extract_streaming(
+                directory, output_dir
+            )
+            ConsolePresenter.show_info(f"Generated {len(thumbnails)} thumbnails")
 
-        if len(thumbnails) == 0:
-            ConsolePresenter.show_error("No RAW images found")
-            return []
+            if len(thumbnails) == 0:
+                ConsolePresenter.show_error("No RAW images found")
+                return []
+        else:
+            # 1. サムネイル生成
+            print("\n[Step 1/5] サムネイル生成")
+            print("-" * 70)
+            thumbnails = self._generate_thumbnails.execute(directory)
+            ConsolePresenter.show_info(f"Generated {len(thumbnails)} thumbnails")
+
+            if len(thumbnails) == 0:
+                ConsolePresenter.show_error("No RAW images found")
+                return []
+
+            # 2. 特徴抽出
+            print("\n[Step 2/5] 特徴抽出")
+            print("-" * 70)
+            embeddings = self._extract_features.execute(
+                thumbnails, output_dir, base_dir=directory
+            )
 
-        # 2. 特徴抽出
-        print("\n[Step 2/5] 特徴抽出（ResNet50）")
-        print("-" * 70)
-        embeddings = self._extract_features.execute(
-            thumbnails, output_dir, base_dir=directory
-        )
         ConsolePresenter.show_info(
             f"Extracted {len(embeddings)} feature vectors ({embeddings[0].dimension}D)"
         )
 
-        # 3. クラスタリング（詳細度1: Fine）
-        print("\n[Step 3/5] クラスタリング - 詳細度1（Fine: ほぼ同じ被写体）")
-        print("-" * 70)
-        cluster_file_fine = output_dir / "clusters_fine.json"
-        result_fine = self._cluster_images_fine.execute(
-            embeddings, granularity=1, output_path=cluster_file_fine
-        )
-        ConsolePresenter.show_cluster_result(result_fine)
-
-        # 4. クラスタリング（詳細度2: Coarse）
-        print("\n[Step 4/5] クラスタリング - 詳細度2（Coarse: 同じ場所・似た被写体）")
-        print("-" * 70)
-        cluster_file_coarse = output_dir / "clusters_coarse.json"
-        result_coarse = self._cluster_images_coarse.execute(
-            embeddings, granularity=2, output_path=cluster_file_coarse
-        )
-        ConsolePresenter.show_cluster_result(result_coarse)
+        # クラスタリングには射影したベクトルを使う（保存する埋め込みベクトルは元の次元のまま）
+        cluster_inputs = embeddings
+        if self._reduce_dimensions is not None:
+            print("\n次元削減")
+            print("-" * 70)
+            cluster_inputs = self._reduce_dimensions.execute(embeddings, output_dir)
+
+        if isinstance(self._cluster_images, ClusterImagesMultiLevel):
+            # 3-4. クラスタリング（共通の階層から全ての詳細度を抽出）
+            print("\n[Step 3-4/5] クラスタリング - 全ての詳細度（共通の階層から抽出）")
+            print("-" * 70)
+            cluster_results = self._cluster_images.execute(cluster_inputs, output_dir)
+            for result in cluster_results:
+                ConsolePresenter.show_cluster_result(result)
+        else:
+            cluster_images_fine, cluster_images_coarse = self._cluster_images
+
+            # 3. クラスタリング（詳細度1: Fine）
+            print("\n[Step 3/5] クラスタリング - 詳細度1（Fine: ほぼ同じ被写体）")
+            print("-" * 70)
+            cluster_file_fine = output_dir / "clusters_fine.json"
+            result_fine = cluster_images_fine.execute(
+                cluster_inputs, granularity=1, output_path=cluster_file_fine
+            )
+            ConsolePresenter.show_cluster_result(result_fine)
+
+            # 4. クラスタリング（詳細度2: Coarse）
+            print("\n[Step 4/5] クラスタリング - 詳細度2（Coarse: 同じ場所・似た被写体）")
+            print("-" * 70)
+            cluster_file_coarse = output_dir / "clusters_coarse.json"
+            result_coarse = cluster_images_coarse.execute(
+                cluster_inputs, granularity=2, output_path=cluster_file_coarse
+            )
+            ConsolePresenter.show_cluster_result(result_coarse)
+            cluster_results = [result_fine, result_coarse]
 
         # 5. XMPメタデータ更新
         print("\n[Step 5/5] XMPメタデータ更新")
         print("-" * 70)
         updated_count = self._update_xmp.execute(
-            directory, cluster_results=[result_fine, result_coarse], dry_run=dry_run
+            directory, cluster_results=cluster_results, dry_run=dry_run
         )
 
         if dry_run:
@@ -128,8 +198,39 @@ class OrganizeRawImages:
         print("=" * 70)
         print(f"\n📊 統計情報:")
         print(f"  処理画像数: {len(thumbnails)}枚")
-        print(f"  詳細度1クラスタ数: {result_fine.num_clusters}")
-        print(f"  詳細度2クラスタ数: {result_coarse.num_clusters}")
+        for result in cluster_results:
+            print(f"  詳細度{result.granularity}クラスタ数: {result.num_clusters}")
         print(f"  XMPファイル: {updated_count}個")
 
-        return [result_fine, result_coarse]
+        return cluster_results
+
+    def _generate_and_extract_streaming(
+        self, directory: Path, output_dir: Path
+    ) -> Tuple[List[Thumbnail], List[Embedding]]:
+        """サムネイル生成と特徴抽出を並行して実行
+
+        サムネイル生成はバックグラウンドスレッドで進め、生成されたサムネイルを
+        容量制限付きキュー経由で特徴抽出に渡す
+
+        Args:
+            directory: RAW画像が格納されているディレクトリ
+            output_dir: 出力先ディレクトリ
+
+        Returns:
+            (サムネイルのリスト, 埋め込みベクトルのリスト)
+        """
+        thumbnails: List[Thumbnail] = []
+
+        def collect(stream: Iterable[Thumbnail]) -> Iterator[Thumbnail]:
+            for thumbnail in stream:
+                thumbnails.append(thumbnail)
+                yield thumbnail
+
+        stream = BackgroundIterator(
+            self._generate_thumbnails.iter_execute(directory),
+            maxsize=self._stream_buffer_size,
+        )
+        embeddings = self._extract_features.execute(
+            collect(stream), output_dir, base_dir=directory
+        )
+        return thumbnails, embeddings
@@ -0,0 +1,66 @@
+"""埋め込みベクトルの次元削減ユースケース"""
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from src.domain.models.embedding import Embedding
+from src.domain.services.dimensionality_reduction_service import DimensionalityReductionService
+
+
+class ReduceDimensions:
+    """クラスタリングの前に埋め込みベクトルを低次元に射影するユースケース
+
+    学習した射影は埋め込みベクトルと同じディレクトリに保存し、
+    設定・入力の次元数・モデル名が同じであれば次回以降も再利用する
+    （画像が少なく成分数が制限されていた射影は、画像が増えた時点で学習し直す）
+    """
+
+    PROJECTION_FILE_NAME = "projection.npz"
+
+    def __init__(
+        self, reduction_service: DimensionalityReductionService, refit: bool = False
+    ) -> None:
+        """次元削減ユースケースを初期化
+
+        Args:
+            reduction_service: 次元削減サービス
+            refit: 保存された射影があっても学習し直すか
+        """
+        self._reduction_service = reduction_service
+        self._refit = refit
+
+    def execute(self, embeddings: List[Embedding], output_dir: Path) -> List[Embedding]:
+        """埋め込みベクトルを射影
+
+        Args:
+            embeddings: 埋め込みベクトルのリスト
+            output_dir: 射影を保存するディレクトリ（埋め込みベクトルの保存先）
+
+        Returns:
+            射影した埋め込みベクトルのリスト（image_id・モデル名・順序は入力と同じ）
+        """
+        if not embeddings:
+            return []
+
+        vectors = np.array([emb.vector for emb in embeddings])
+        model_name = embeddings[0].model_name
+        projection_path = output_dir / self.PROJECTION_FILE_NAME
+
+        if not self._refit and self._reduction_service.load(
+            projection_path, vectors.shape[1], model_name, num_samples=len(vectors)
+        ):
+            reduced = self._reduction_service.transform(vectors)
+            print(f"Reused projection: {projection_path}")
+        else:
+            reduced = self._reduction_service.fit_transform(vectors)
+            self._reduction_service.save(projection_path, model_name)
+            print(f"Saved projection to {projection_path}")
+
+        print(f"Reduced {len(embeddings)} vectors: {vectors.shape[1]}D -> {reduced.shape[1]}D")
+
+        return [
+            Embedding(image_id=emb.image_id, vector=vector, model_name=emb.model_name)
+            for emb, vector in zip(embeddings, reduced)
+        ]
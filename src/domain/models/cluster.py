@@ -9,9 +9,11 @@ class Cluster:
     Attributes:
         cluster_id: クラスタID
         image_ids: クラスタに含まれる画像IDのリスト
-        granularity: 詳細度レベル（1: 細かい、2: 粗い）
+        granularity: 詳細度レベル（1: 細かい、2: 粗い、3以降: さらに粗い階層）
     """
 
+    LEVEL_NAMES = {1: "fine", 2: "coarse"}
+
     def __init__(
         self, cluster_id: int, image_ids: List[str], granularity: int = 1
     ) -> None:
@@ -20,21 +22,33 @@ class Cluster:
         Args:
             cluster_id: クラスタID
             image_ids: クラスタに含まれる画像IDのリスト
-            granularity: 詳細度レベル（1 or 2）
+            granularity: 詳細度レベル（1以上）
 
         Raises:
-            ValueError: cluster_idが負、またはgranularityが1か2でない場合
+            ValueError: cluster_idが負、またはgranularityが1未満の場合
         """
         if cluster_id < 0:
             raise ValueError("cluster_id must be non-negative")
 
-        if granularity not in (1, 2):
-            raise ValueError("granularity must be 1 or 2")
+        if granularity < 1:
+            raise ValueError("granularity must be at least 1")
 
         self.cluster_id = cluster_id
         self.image_ids = list(image_ids)
         self.granularity = granularity
 
+    @classmethod
+    def level_name(cls, granularity: int) -> str:
+        """詳細度レベルの名前を取得
+
+        Args:
+            granularity: 詳細度レベル
+
+        Returns:
+            レベル名（1: "fine"、2: "coarse"、3以降: "level3"のような連番）
+        """
+        return cls.LEVEL_NAMES.get(granularity, f"level{granularity}")
+
     @property
     def size(self) -> int:
         """クラスタに含まれる画像数を取得"""
@@ -73,10 +87,9 @@ class Cluster:
         """クラスタのタグを生成
 
         Returns:
-            タグ文字列（例: "fine_003", "coarse_042"）
+            タグ文字列（例: "fine_003", "coarse_042", "level3_007"）
         """
-        level_name = "fine" if self.granularity == 1 else "coarse"
-        return f"{level_name}_{self.cluster_id:03d}"
+        return f"{self.level_name(self.granularity)}_{self.cluster_id:03d}"
 
     def get_hierarchical_tag(self) -> str:
         """階層キーワードを生成
@@ -84,8 +97,7 @@ class Cluster:
         Returns:
             階層タグ文字列（例: "cluster/fine/003", "cluster/coarse/042"）
         """
-        level_name = "fine" if self.granularity == 1 else "coarse"
-        return f"cluster/{level_name}/{self.cluster_id:03d}"
+        return f"cluster/{self.level_name(self.granularity)}/{self.cluster_id:03d}"
 
     def __eq__(self, other: object) -> bool:
         """等価性の比較"""
@@ -0,0 +1,77 @@
+"""学習済みクラスタモデル値オブジェクト"""
+
+from typing import List
+
+import numpy as np
+
+from src.domain.models.fingerprint import matching_fingerprints
+
+
+class ClusterModel:
+    """保存されたクラスタモデルのうち、差分割り当てに使う情報を表す値オブジェクト
+
+    予測に使うデータ（クラスタ中心・HDBSCANの予測用データ）はクラスタリングサービスが保持し、
+    この値オブジェクトは学習に使った画像とそのラベルだけを持つ
+
+    Attributes:
+        image_ids: 学習に使った画像ID
+        labels: 学習時のレベルごとのクラスタラベル（細かい順、各要素はlen(image_ids)個）
+        fingerprints: 学習に使ったベクトルの指紋（len(image_ids) x 指紋の長さ）
+        reference_distance: 学習に使った画像の割り当て距離の平均（ドリフトの判定の基準）
+    """
+
+    def __init__(
+        self,
+        image_ids: List[str],
+        labels: List[np.ndarray],
+        fingerprints: np.ndarray,
+        reference_distance: float,
+    ) -> None:
+        """クラスタモデルを初期化
+
+        Args:
+            image_ids: 学習に使った画像ID
+            labels: レベルごとのクラスタラベル
+            fingerprints: 学習に使ったベクトルの指紋
+            reference_distance: 割り当て距離の平均
+
+        Raises:
+            ValueError: ラベル・指紋の数が画像IDの数と合わない場合
+        """
+        num_images = len(image_ids)
+        for level_labels in labels:
+            if len(level_labels) != num_images:
+                raise ValueError(f"Expected {num_images} labels, got {len(level_labels)}")
+        if len(fingerprints) != num_images:
+            raise ValueError(f"Expected {num_images} fingerprints, got {len(fingerprints)}")
+
+        self.image_ids = list(image_ids)
+        self.labels = list(labels)
+        self.fingerprints = fingerprints
+        self.reference_distance = reference_distance
+
+    @property
+    def size(self) -> int:
+        """学習に使った画像数を取得"""
+        return len(self.image_ids)
+
+    def known_rows(self, image_ids: List[str], fingerprints: np.ndarray) -> np.ndarray:
+        """画像ごとに、学習に使った画像のうち同じ画像の行番号を求める
+
+        Args:
+            image_ids: 画像ID
+            fingerprints: 各画像のベクトルの指紋
+
+        Returns:
+            行番号（len(image_ids)個、学習に使っていない、またはベクトルが変わった画像は-1）
+        """
+        model_rows = {image_id: row for row, image_id in enumerate(self.image_ids)}
+        rows = np.array([model_rows.get(image_id, -1) for image_id in image_ids], dtype=np.int64)
+        known = np.flatnonzero(rows >= 0)
+        changed = known[~matching_fingerprints(self.fingerprints[rows[known]], fingerprints[known])]
+        rows[changed] = -1
+        return rows
+
+    def __repr__(self) -> str:
+        """文字列表現"""
+        return f"ClusterModel(size={self.size}, levels={len(self.labels)})"
@@ -0,0 +1,39 @@
+"""特徴ベクトルの指紋
+
+保存したグラフ・クラスタモデルに含まれる画像のベクトルが変わったかを、
+ベクトルそのものを保存せずに判定するために使う
+"""
+
+import numpy as np
+
+# 指紋の長さ（固定の乱数ベクトルとの内積の数）
+FINGERPRINT_SIZE = 4
+
+
+def fingerprint_vectors(vectors: np.ndarray) -> np.ndarray:
+    """ベクトルの指紋（固定の乱数ベクトルとの内積）を計算
+
+    Args:
+        vectors: 特徴ベクトル（N x D）
+
+    Returns:
+        指紋（N x FINGERPRINT_SIZE、float64）
+    """
+    rng = np.random.default_rng(0)
+    probes = rng.standard_normal((vectors.shape[1], FINGERPRINT_SIZE))
+    return np.asarray(vectors, dtype=np.float64) @ probes
+
+
+def matching_fingerprints(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """指紋が一致するか（行ごと）
+
+    Args:
+        previous: 前回の指紋
+        current: 今回の指紋（previousと同じ行数）
+
+    Returns:
+        行ごとの判定（bool配列）。指紋の形状が異なる場合は全てFalse
+    """
+    if previous.shape != current.shape:
+        return np.zeros(len(current), dtype=bool)
+    return np.isclose(previous, current, rtol=1e-6, atol=1e-6).all(axis=1)
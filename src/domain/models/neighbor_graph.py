@@ -0,0 +1,63 @@
+"""k近傍グラフ値オブジェクト"""
+
+from typing import List
+
+import numpy as np
+
+
+class NeighborGraph:
+    """埋め込みベクトルのk近傍グラフを表す値オブジェクト
+
+    Attributes:
+        image_ids: 各ノードの画像ID（行の順序）
+        indices: 各ノードの近傍ノードの行番号（N x k、近い順、見つからない場合は-1）
+        distances: 近傍ノードまでのユークリッド距離（N x k、見つからない場合はinf）
+        fingerprints: 各ベクトルの指紋（ベクトルが変わったかの判定に使う、N x 指紋の長さ）
+    """
+
+    def __init__(
+        self,
+        image_ids: List[str],
+        indices: np.ndarray,
+        distances: np.ndarray,
+        fingerprints: np.ndarray,
+    ) -> None:
+        """k近傍グラフを初期化
+
+        Args:
+            image_ids: 各ノードの画像ID
+            indices: 近傍ノードの行番号（N x k）
+            distances: 近傍ノードまでの距離（N x k）
+            fingerprints: 各ベクトルの指紋（N x 指紋の長さ）
+
+        Raises:
+            ValueError: 配列の形状が画像IDの数と合わない場合
+        """
+        num_nodes = len(image_ids)
+        if indices.ndim != 2 or indices.shape[0] != num_nodes:
+            raise ValueError(f"indices must be {num_nodes} x k, got {indices.shape}")
+        if distances.shape != indices.shape:
+            raise ValueError(
+                f"distances must have the shape of indices {indices.shape}, got {distances.shape}"
+            )
+        if len(fingerprints) != num_nodes:
+            raise ValueError(f"Expected {num_nodes} fingerprints, got {len(fingerprints)}")
+
+        self.image_ids = list(image_ids)
+        self.indices = indices
+        self.distances = distances
+        self.fingerprints = fingerprints
+
+    @property
+    def size(self) -> int:
+        """ノード数を取得"""
+        return len(self.image_ids)
+
+    @property
+    def n_neighbors(self) -> int:
+        """ノードあたりの近傍数を取得"""
+        return self.indices.shape[1]
+
+    def __repr__(self) -> str:
+        """文字列表現"""
+        return f"NeighborGraph(size={self.size}, n_neighbors={self.n_neighbors})"
@@ -3,6 +3,8 @@
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
 from src.domain.models.raw_image import RawImage
 
 
@@ -13,19 +15,28 @@ class Thumbnail:
         path: サムネイル画像ファイルのパス
         source: 元のRAW画像
         size: サムネイルのサイズ（長辺のピクセル数）
+        image: メモリ上に保持したRGB画素（H x W x 3 のuint8配列）、ファイルから読む場合はNone
     """
 
-    def __init__(self, path: Path, source: RawImage, size: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        path: Path,
+        source: RawImage,
+        size: Optional[int] = None,
+        image: Optional[np.ndarray] = None,
+    ) -> None:
         """サムネイルエンティティを初期化
 
         Args:
             path: サムネイル画像ファイルのパス
             source: 元のRAW画像
             size: サムネイルのサイズ（長辺のピクセル数）
+            image: デコード済みのRGB画素（ファイルを経由せずに特徴抽出へ渡す場合）
         """
         self.path = path
         self.source = source
         self.size = size
+        self.image = image
 
     @property
     def filename(self) -> str:
@@ -1,10 +1,14 @@
 """XMPメタデータエンティティ"""
 
+import re
 from pathlib import Path
 from typing import List, Set
 
 from src.domain.models.raw_image import RawImage
 
+# クラスタタグのレベル名（fine / coarse / level3 以降）
+_CLUSTER_LEVEL_PATTERN = re.compile(r"^(fine|coarse|level\d+)$")
+
 
 class XmpMetadata:
     """XMPメタデータを表すエンティティ
@@ -79,9 +83,9 @@ class XmpMetadata:
         # "fine_001" -> ["fine", "001"]
         parts = tag.split("_")
 
-        if len(parts) == 2 and parts[0] in ("fine", "coarse"):
+        if len(parts) == 2 and _CLUSTER_LEVEL_PATTERN.match(parts[0]):
             # cluster/fine/001 の形式に変換
-            level = parts[0]  # "fine" or "coarse"
+            level = parts[0]  # "fine", "coarse", "level3", ...
             number = parts[1]  # "001"
             return f"cluster/{level}/{number}"
 
@@ -5,13 +5,20 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import numpy as np
 
+from src.domain.models.cluster_model import ClusterModel
+
 
 class ClusteringService(ABC):
-    """埋め込みベクトルをクラスタリングするサービスのインターフェース"""
+    """埋め込みベクトルをクラスタリングするサービスのインターフェース
+
+    学習したモデルを保存しておけば、次回は学習し直さずに新しいベクトルを
+    既存のクラスタに割り当てられる（predict）
+    """
 
     @abstractmethod
     def fit_predict(self, vectors: np.ndarray) -> np.ndarray:
@@ -36,3 +43,43 @@ class ClusteringService(ABC):
             クラスタ数
         """
         pass
+
+    @abstractmethod
+    def predict(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """学習済み（または読み込んだ）モデルで新しいベクトルのクラスタを予測
+
+        Args:
+            vectors: 特徴ベクトル（M x D の2次元配列）
+
+        Returns:
+            (クラスタラベル（M個）, 割り当て先までの距離（M個、ドリフトの判定に使う）)
+
+        Raises:
+            RuntimeError: モデルが学習・読み込みされていない場合
+        """
+        pass
+
+    @abstractmethod
+    def save_model(self, path: Path, image_ids: List[str]) -> None:
+        """直前のfit_predictで学習したモデルを保存
+
+        Args:
+            path: 保存先のファイルパス
+            image_ids: 学習に使った各ベクトルの画像ID
+
+        Raises:
+            RuntimeError: モデルが学習されていない場合
+        """
+        pass
+
+    @abstractmethod
+    def load_model(self, path: Path) -> Optional[ClusterModel]:
+        """保存されたモデルを読み込み（以降のpredictで使う）
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            学習に使った画像とラベル（ファイルがない、または設定が異なる場合はNone）
+        """
+        pass
@@ -0,0 +1,90 @@
+"""次元削減ドメインサービス
+
+このサービスはインターフェースのみを定義し、
+実際の実装はInfrastructure層で行う
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+class DimensionalityReductionService(ABC):
+    """埋め込みベクトルを低次元に射影するサービスのインターフェース
+
+    学習した射影は保存・読み込みでき、後の実行や追加画像の割り当てで同じ射影を再利用する
+    """
+
+    @abstractmethod
+    def fit_transform(self, vectors: np.ndarray) -> np.ndarray:
+        """射影を学習してベクトルを変換
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+
+        Returns:
+            射影したベクトル（N x 出力次元数 の2次元配列）
+
+        Raises:
+            ValueError: 入力が2次元配列でない場合
+        """
+        pass
+
+    @abstractmethod
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """学習済みの射影でベクトルを変換
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+
+        Returns:
+            射影したベクトル（N x 出力次元数 の2次元配列）
+
+        Raises:
+            RuntimeError: 射影が学習・読み込みされていない場合
+            ValueError: 入力の次元数が学習時と異なる場合
+        """
+        pass
+
+    @abstractmethod
+    def get_output_dimension(self) -> int:
+        """射影後の次元数を取得
+
+        Returns:
+            次元数（学習前は指定された次元数）
+        """
+        pass
+
+    @abstractmethod
+    def save(self, path: Path, model_name: Optional[str] = None) -> None:
+        """学習済みの射影を保存
+
+        Args:
+            path: 保存先のファイルパス
+            model_name: 射影を学習したベクトルのモデル名
+        """
+        pass
+
+    @abstractmethod
+    def load(
+        self,
+        path: Path,
+        input_dimension: int,
+        model_name: Optional[str] = None,
+        num_samples: Optional[int] = None,
+    ) -> bool:
+        """保存された射影を読み込み
+
+        Args:
+            path: 保存されたファイルパス
+            input_dimension: 変換するベクトルの次元数
+            model_name: 変換するベクトルのモデル名
+            num_samples: 変換するベクトルの数（学習時より多くの成分を学習できるかの判定に使う）
+
+        Returns:
+            読み込めた場合True（ファイルがない、設定・次元数・モデル名が異なる場合、
+            または現在のサンプル数で成分数を増やせる場合はFalse）
+        """
+        pass
@@ -6,6 +6,7 @@
 
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Any, Dict, List
 
 import numpy as np
 
@@ -28,6 +29,102 @@ class FeatureExtractionService(ABC):
         """
         pass
 
+    @abstractmethod
+    def extract_batch(self, image_paths: List[Path]) -> np.ndarray:
+        """複数の画像からまとめて特徴ベクトルを抽出
+
+        Args:
+            image_paths: 画像ファイルのパスのリスト
+
+        Returns:
+            特徴ベクトル（画像数 x 次元数のnumpy配列、image_pathsと同じ順序）
+
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        pass
+
+    @abstractmethod
+    def extract_array(self, image: np.ndarray) -> np.ndarray:
+        """メモリ上のRGB画像から特徴ベクトルを抽出
+
+        Args:
+            image: RGB画素（H x W x 3 のuint8配列）
+
+        Returns:
+            特徴ベクトル（1次元numpy配列）
+        """
+        pass
+
+    @abstractmethod
+    def load_input(self, image_path: Path) -> np.ndarray:
+        """画像ファイルを読み込み、モデル入力用に前処理（正規化前のクロップ）
+
+        Args:
+            image_path: 画像ファイルのパス
+
+        Returns:
+            クロップ（H x W x 3 のuint8配列）
+
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        pass
+
+    @abstractmethod
+    def prepare_input(self, image: np.ndarray) -> np.ndarray:
+        """メモリ上のRGB画像をモデル入力用に前処理（正規化前のクロップ）
+
+        Args:
+            image: RGB画素（H x W x 3 のuint8配列）
+
+        Returns:
+            クロップ（H x W x 3 のuint8配列）
+        """
+        pass
+
+    @abstractmethod
+    def extract_inputs(self, inputs: np.ndarray) -> np.ndarray:
+        """前処理済みのクロップから特徴ベクトルを抽出
+
+        Args:
+            inputs: load_input / prepare_inputで作成したクロップ（N x H x W x 3 のuint8配列）
+
+        Returns:
+            特徴ベクトル（N x 次元数のnumpy配列）
+        """
+        pass
+
+    @abstractmethod
+    def get_batch_size(self) -> int:
+        """1回の推論でまとめて処理する画像数を取得
+
+        Returns:
+            バッチサイズ
+        """
+        pass
+
+    @abstractmethod
+    def get_preprocessing_signature(self) -> Dict[str, Any]:
+        """前処理（load_input / prepare_input）の内容を表すシグネチャを取得
+
+        シグネチャが同じモデル同士は前処理済みのクロップを共有できる
+
+        Returns:
+            前処理のパラメータ（crop_sizeを含む）
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def engine_settings(self) -> Dict[str, Any]:
+        """推論の設定（埋め込みベクトルの数値に影響する）
+
+        Returns:
+            推論の設定（precisionを含む）
+        """
+        pass
+
     @abstractmethod
     def get_model_name(self) -> str:
         """使用しているモデル名を取得
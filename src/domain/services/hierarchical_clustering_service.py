@@ -0,0 +1,101 @@
+"""階層クラスタリングドメインサービス
+
+このサービスはインターフェースのみを定義し、
+実際の実装はInfrastructure層で行う
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.domain.models.cluster_model import ClusterModel
+from src.domain.models.neighbor_graph import NeighborGraph
+
+
+class HierarchicalClusteringService(ABC):
+    """1回のクラスタリングから複数の詳細度のラベルを得るサービスのインターフェース
+
+    レベルは細かい順に並び、各レベルのクラスタは1つ前のレベルのクラスタを
+    まとめたもの（入れ子）になる。学習したモデルを保存しておけば、次回は学習し直さずに
+    新しいベクトルを既存のクラスタに割り当てられる（predict_levels）
+    """
+
+    @abstractmethod
+    def fit_predict_levels(
+        self, vectors: np.ndarray, neighbor_graph: Optional[NeighborGraph] = None
+    ) -> List[np.ndarray]:
+        """クラスタリングを実行して全レベルのラベルを予測
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列、N:サンプル数、D:次元数）
+            neighbor_graph: vectorsと同じ行順のk近傍グラフ（指定した場合は
+                グラフの辺だけで距離を扱う）
+
+        Returns:
+            レベルごとのクラスタラベル（細かい順、各要素はN個の整数配列）
+
+        Raises:
+            ValueError: 入力が2次元配列でない、またはグラフがvectorsと合わない場合
+        """
+        pass
+
+    @abstractmethod
+    def get_n_levels(self) -> int:
+        """レベル数を取得
+
+        Returns:
+            レベル数
+        """
+        pass
+
+    @abstractmethod
+    def get_n_clusters(self) -> List[int]:
+        """レベルごとのクラスタ数を取得
+
+        Returns:
+            クラスタ数のリスト（細かい順）
+        """
+        pass
+
+    @abstractmethod
+    def predict_levels(self, vectors: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+        """学習済み（または読み込んだ）モデルで新しいベクトルの全レベルのクラスタを予測
+
+        Args:
+            vectors: 特徴ベクトル（M x D の2次元配列）
+
+        Returns:
+            (レベルごとのクラスタラベル（細かい順、各要素はM個）,
+            割り当て先までの距離（M個、ドリフトの判定に使う）)
+
+        Raises:
+            RuntimeError: モデルが学習・読み込みされていない場合
+        """
+        pass
+
+    @abstractmethod
+    def save_model(self, path: Path, image_ids: List[str]) -> None:
+        """直前のfit_predict_levelsで学習したモデルを保存
+
+        Args:
+            path: 保存先のファイルパス
+            image_ids: 学習に使った各ベクトルの画像ID
+
+        Raises:
+            RuntimeError: モデルが学習されていない場合
+        """
+        pass
+
+    @abstractmethod
+    def load_model(self, path: Path) -> Optional[ClusterModel]:
+        """保存されたモデルを読み込み（以降のpredict_levelsで使う）
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            学習に使った画像とラベル（ファイルがない、または設定が異なる場合はNone）
+        """
+        pass
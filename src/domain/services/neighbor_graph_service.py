@@ -0,0 +1,65 @@
+"""k近傍グラフドメインサービス
+
+このサービスはインターフェースのみを定義し、
+実際の実装はInfrastructure層で行う
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.domain.models.neighbor_graph import NeighborGraph
+
+
+class NeighborGraphService(ABC):
+    """埋め込みベクトルのk近傍グラフを構築するサービスのインターフェース
+
+    保存したグラフに含まれる画像は再計算せず、追加・変更された画像だけを
+    グラフに組み込む（差分更新）
+    """
+
+    @abstractmethod
+    def update(
+        self,
+        vectors: np.ndarray,
+        image_ids: List[str],
+        previous: Optional[NeighborGraph] = None,
+    ) -> NeighborGraph:
+        """k近傍グラフを構築（前回のグラフがあれば差分更新）
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+            image_ids: 各ベクトルの画像ID（N個）
+            previous: 前回のグラフ（Noneの場合は最初から構築）
+
+        Returns:
+            vectorsと同じ行順のk近傍グラフ
+
+        Raises:
+            ValueError: 入力が2次元配列でない、または画像IDの数が合わない場合
+        """
+        pass
+
+    @abstractmethod
+    def save(self, graph: NeighborGraph, path: Path) -> None:
+        """グラフを保存
+
+        Args:
+            graph: k近傍グラフ
+            path: 保存先のファイルパス
+        """
+        pass
+
+    @abstractmethod
+    def load(self, path: Path) -> Optional[NeighborGraph]:
+        """保存されたグラフを読み込み
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            k近傍グラフ（ファイルがない、または設定が異なる場合はNone）
+        """
+        pass
@@ -2,21 +2,43 @@
 
 import json
 import shutil
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.infrastructure.cache.mapping_store import SqliteMappingStore
 
 
 class CacheManager:
     """実行時のキャッシュを管理するクラス
 
     .cache/
-    ├── mapping.json    # RAW画像とサムネイルの対応
-    └── thumbnails/     # サムネイル画像
+    ├── mapping.sqlite3 # RAW画像とサムネイルの対応（生成時のファイル情報と変換設定を含む）
+    ├── thumbnails/     # サムネイル画像
+    ├── crops/          # 特徴抽出モデル入力用の前処理済みクロップ（CropCache）
+    ├── embedding_cache/ # RAWの内容ハッシュをキーにした埋め込みベクトル（EmbeddingCache）
+    ├── onnx_models/    # エクスポートしたONNXモデル（--backend onnx）
+    ├── calibration/    # int8量子化のキャリブレーション状態（--precision int8）
+    └── hdbscan_trees/  # HDBSCANの単連結木・最小全域木（HierarchyCache）
+
+    マッピングの各エントリは以下の形式:
+        {"thumbnail": サムネイル相対パス, "size": RAWのバイト数,
+         "mtime_ns": RAWの更新時刻, "settings": 変換設定}
+    旧形式のmapping.jsonが存在する場合は初期化時に取り込み、
+    mapping.json.migratedにリネームする
+
+    マッピングは初回参照時にメモリへ読み込み、以降の検索はメモリ上で行う。
+    自プロセスの書き込みはメモリ上にも反映し、他プロセスの書き込みは
+    SQLiteの世代番号（data_version）の変化で検知して再読み込みする
     """
 
-    MAPPING_FILE_NAME = "mapping.json"
+    MAPPING_DB_NAME = "mapping.sqlite3"
+    LEGACY_MAPPING_FILE_NAME = "mapping.json"
     THUMBNAILS_DIR_NAME = "thumbnails"
+    CROPS_DIR_NAME = "crops"
+    EMBEDDING_CACHE_DIR_NAME = "embedding_cache"
+    ONNX_MODELS_DIR_NAME = "onnx_models"
+    CALIBRATION_DIR_NAME = "calibration"
+    HDBSCAN_TREES_DIR_NAME = "hdbscan_trees"
 
     def __init__(self, base_dir: Path, cache_dir: Optional[Path] = None) -> None:
         """キャッシュマネージャーを初期化
@@ -27,8 +49,17 @@ class CacheManager:
         """
         self._base_dir = base_dir.resolve()
         self._cache_dir = cache_dir.resolve() if cache_dir else self._base_dir / ".cache"
-        self._mapping_path = self._cache_dir / self.MAPPING_FILE_NAME
+        self._mapping_path = self._cache_dir / self.MAPPING_DB_NAME
+        self._legacy_mapping_path = self._cache_dir / self.LEGACY_MAPPING_FILE_NAME
         self._thumbnails_dir = self._cache_dir / self.THUMBNAILS_DIR_NAME
+        self._crops_dir = self._cache_dir / self.CROPS_DIR_NAME
+        self._embedding_cache_dir = self._cache_dir / self.EMBEDDING_CACHE_DIR_NAME
+        self._onnx_models_dir = self._cache_dir / self.ONNX_MODELS_DIR_NAME
+        self._calibration_dir = self._cache_dir / self.CALIBRATION_DIR_NAME
+        self._hdbscan_trees_dir = self._cache_dir / self.HDBSCAN_TREES_DIR_NAME
+        self._store = SqliteMappingStore(self._mapping_path)
+        self._mapping_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._mapping_version: Optional[int] = None
 
     @property
     def cache_dir(self) -> Path:
@@ -40,9 +71,34 @@ class CacheManager:
         """サムネイルディレクトリのパスを取得"""
         return self._thumbnails_dir
 
+    @property
+    def crops_dir(self) -> Path:
+        """前処理済みクロップのディレクトリのパスを取得"""
+        return self._crops_dir
+
+    @property
+    def embedding_cache_dir(self) -> Path:
+        """埋め込みベクトルキャッシュのディレクトリのパスを取得"""
+        return self._embedding_cache_dir
+
+    @property
+    def onnx_models_dir(self) -> Path:
+        """エクスポートしたONNXモデルのディレクトリのパスを取得"""
+        return self._onnx_models_dir
+
+    @property
+    def calibration_dir(self) -> Path:
+        """int8量子化のキャリブレーション状態のディレクトリのパスを取得"""
+        return self._calibration_dir
+
+    @property
+    def hdbscan_trees_dir(self) -> Path:
+        """HDBSCANの階層を保存するディレクトリのパスを取得"""
+        return self._hdbscan_trees_dir
+
     @property
     def mapping_path(self) -> Path:
-        """マッピングファイルのパスを取得"""
+        """マッピングデータベースのパスを取得"""
         return self._mapping_path
 
     @property
@@ -56,82 +112,105 @@ class CacheManager:
         self._cache_dir.mkdir(parents=True, exist_ok=True)
         self._thumbnails_dir.mkdir(parents=True, exist_ok=True)
 
-        # マッピングファイルが存在しない場合のみ作成
-        if not self._mapping_path.exists():
-            mapping = {}
-            self._save_mapping(mapping)
+        # 旧形式のmapping.jsonがあれば取り込む
+        if self._legacy_mapping_path.exists():
+            self._migrate_legacy_mapping()
+
+        # データベースとテーブルを作成
+        self._store.count()
+
+    def _migrate_legacy_mapping(self) -> None:
+        """旧形式のmapping.jsonをSQLiteストアに取り込む
 
-    def load_mapping(self) -> Dict[str, str]:
+        値が文字列のエントリ（ファイル情報なし）は次回のサムネイル生成で再生成される
+        """
+        try:
+            with open(self._legacy_mapping_path, "r", encoding="utf-8") as f:
+                legacy_mapping = json.load(f)
+        except Exception:
+            # 壊れている場合は取り込まずに破棄
+            legacy_mapping = {}
+
+        entries = [
+            (
+                raw_relative,
+                entry if isinstance(entry, dict) else {"thumbnail": entry},
+            )
+            for raw_relative, entry in legacy_mapping.items()
+        ]
+        self._store.put_many(entries)
+        self._legacy_mapping_path.rename(
+            self._legacy_mapping_path.with_name(self.LEGACY_MAPPING_FILE_NAME + ".migrated")
+        )
+
+    def load_mapping(self) -> Dict[str, Dict[str, Any]]:
         """マッピングを読み込み
 
         Returns:
-            RAW相対パス → サムネイル相対パスのマッピング
+            RAW相対パス → マッピングエントリの辞書
         """
-        if not self._mapping_path.exists():
-            return {}
+        return dict(self._cached_mapping())
 
-        try:
-            with open(self._mapping_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            # マッピングファイルが壊れている場合は削除して空のマッピングを返す
-            if self._mapping_path.exists():
-                self._mapping_path.unlink()
+    def _cached_mapping(self) -> Dict[str, Dict[str, Any]]:
+        """メモリ上のマッピングを取得（他プロセスの更新があれば再読み込み）
+
+        Returns:
+            RAW相対パス → マッピングエントリの辞書（内部状態のため変更しないこと）
+        """
+        if not self._mapping_path.exists():
             return {}
 
-    def _save_mapping(self, mapping: Dict[str, str]) -> None:
-        """マッピングを保存
+        version = self._store.data_version()
+        if self._mapping_cache is None or version != self._mapping_version:
+            self._mapping_cache = self._store.all()
+            self._mapping_version = version
 
-        Args:
-            mapping: RAW相対パス → サムネイル相対パスのマッピング
-        """
-        try:
-            with open(self._mapping_path, "w", encoding="utf-8") as f:
-                json.dump(mapping, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            raise Exception(f"Failed to save mapping: {self._mapping_path}") from e
+        return self._mapping_cache
 
     def add_raw_thumbnail_mapping(
-        self, raw_path: Path, thumbnail_path: Path
+        self,
+        raw_path: Path,
+        thumbnail_path: Path,
+        settings: Optional[Dict[str, Any]] = None,
     ) -> None:
         """RAW画像とサムネイルの対応を追加
 
         Args:
             raw_path: RAW画像の絶対パス
             thumbnail_path: サムネイルの絶対パス
+            settings: サムネイル生成時の変換設定（再生成要否の判定に使用）
         """
-        import fcntl
-        import time
+        self.add_raw_thumbnail_mappings([(raw_path, thumbnail_path, settings)])
+
+    def add_raw_thumbnail_mappings(
+        self, mappings: Iterable[Tuple[Path, Path, Optional[Dict[str, Any]]]]
+    ) -> None:
+        """RAW画像とサムネイルの対応を一括追加（1トランザクション）
 
-        # ファイルロックを使用して競合を回避
-        max_retries = 5
-        for attempt in range(max_retries):
+        Args:
+            mappings: (RAW絶対パス, サムネイル絶対パス, 変換設定) のイテラブル
+        """
+        entries = []
+        for raw_path, thumbnail_path, settings in mappings:
+            # ベースディレクトリからの相対パスを取得
             try:
-                # ロックファイルを使用
-                lock_path = self._mapping_path.with_suffix(".lock")
-                with open(lock_path, "w") as lock_file:
-                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
-                    try:
-                        mapping = self.load_mapping()
-
-                        # ベースディレクトリからの相対パスを取得
-                        try:
-                            raw_relative = raw_path.relative_to(self._base_dir)
-                            thumbnail_relative = thumbnail_path.relative_to(self._cache_dir)
-                        except ValueError as e:
-                            return
-
-                        # マッピングを追加
-                        mapping[str(raw_relative)] = str(thumbnail_relative)
-                        self._save_mapping(mapping)
-                        break
-                    finally:
-                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    time.sleep(0.1 * (attempt + 1))  # Exponential backoff
-                else:
-                    raise Exception(f"Failed to update mapping after {max_retries} attempts") from e
+                raw_relative = raw_path.relative_to(self._base_dir)
+                thumbnail_relative = thumbnail_path.relative_to(self._cache_dir)
+            except ValueError:
+                continue
+
+            entries.append(
+                (str(raw_relative), self._build_entry(raw_path, thumbnail_relative, settings))
+            )
+
+        try:
+            self._store.put_many(entries)
+        except Exception as e:
+            raise Exception(f"Failed to save mapping: {self._mapping_path}") from e
+
+        # 自接続の書き込みは世代番号を変えないため、メモリ上のマッピングにも反映
+        if self._mapping_cache is not None:
+            self._mapping_cache.update(entries)
 
     def get_thumbnail_path(self, raw_path: Path) -> Optional[Path]:
         """RAW画像に対応するサムネイルパスを取得
@@ -142,18 +221,121 @@ class CacheManager:
         Returns:
             サムネイルの絶対パス、存在しない場合はNone
         """
-        mapping = self.load_mapping()
+        try:
+            raw_relative = str(raw_path.relative_to(self._base_dir))
+        except ValueError:
+            return None
+
+        entry = self._cached_mapping().get(raw_relative)
+        if entry is None:
+            return None
+
+        return self._cache_dir / str(entry["thumbnail"])
+
+    def get_valid_thumbnail_path(
+        self, raw_path: Path, settings: Dict[str, Any]
+    ) -> Optional[Path]:
+        """再利用可能なサムネイルパスを取得
 
+        RAWのサイズ・更新時刻と変換設定が記録時から変わっておらず、
+        サムネイルファイルが存在する場合のみパスを返す
+
+        Args:
+            raw_path: RAW画像の絶対パス
+            settings: 現在の変換設定
+
+        Returns:
+            サムネイルの絶対パス、再生成が必要な場合はNone
+        """
         try:
             raw_relative = str(raw_path.relative_to(self._base_dir))
         except ValueError:
             return None
 
-        thumbnail_relative = mapping.get(raw_relative)
-        if thumbnail_relative is None:
+        return self._valid_thumbnail_path(
+            raw_path, self._cached_mapping().get(raw_relative), settings
+        )
+
+    def find_valid_thumbnails(
+        self, raw_paths: List[Path], settings: Dict[str, Any]
+    ) -> Dict[Path, Path]:
+        """複数のRAW画像について再利用可能なサムネイルをまとめて検索
+
+        Args:
+            raw_paths: RAW画像の絶対パスのリスト
+            settings: 現在の変換設定
+
+        Returns:
+            RAW絶対パス → サムネイル絶対パスの辞書（再利用可能なもののみ）
+        """
+        mapping = self._cached_mapping()
+        valid: Dict[Path, Path] = {}
+
+        for raw_path in raw_paths:
+            try:
+                raw_relative = str(raw_path.relative_to(self._base_dir))
+            except ValueError:
+                continue
+
+            thumbnail_path = self._valid_thumbnail_path(
+                raw_path, mapping.get(raw_relative), settings
+            )
+            if thumbnail_path is not None:
+                valid[raw_path] = thumbnail_path
+
+        return valid
+
+    def _valid_thumbnail_path(
+        self, raw_path: Path, entry: Optional[Dict[str, Any]], settings: Dict[str, Any]
+    ) -> Optional[Path]:
+        """マッピングエントリが現在のRAWと変換設定に一致する場合にサムネイルパスを返す
+
+        Args:
+            raw_path: RAW画像の絶対パス
+            entry: マッピングエントリ（存在しない場合はNone）
+            settings: 現在の変換設定
+
+        Returns:
+            サムネイルの絶対パス、一致しない場合はNone
+        """
+        if entry is None or entry.get("settings") != settings:
             return None
 
-        return self._cache_dir / thumbnail_relative
+        try:
+            stat = raw_path.stat()
+        except OSError:
+            return None
+
+        if entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+
+        thumbnail_path = self._cache_dir / str(entry["thumbnail"])
+        if not thumbnail_path.exists():
+            return None
+
+        return thumbnail_path
+
+    @staticmethod
+    def _build_entry(
+        raw_path: Path, thumbnail_relative: Path, settings: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """マッピングエントリを構築
+
+        Args:
+            raw_path: RAW画像の絶対パス
+            thumbnail_relative: キャッシュディレクトリからのサムネイル相対パス
+            settings: 変換設定
+
+        Returns:
+            マッピングエントリ
+        """
+        stat = raw_path.stat()
+        return {
+            "thumbnail": str(thumbnail_relative),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "settings": settings,
+        }
 
     def exists(self) -> bool:
         """キャッシュディレクトリが存在するか確認
@@ -165,6 +347,9 @@ class CacheManager:
 
     def clear(self) -> None:
         """キャッシュディレクトリを削除"""
+        self._store.close()
+        self._mapping_cache = None
+        self._mapping_version = None
         if self._cache_dir.exists():
             try:
                 shutil.rmtree(self._cache_dir)
@@ -177,4 +362,7 @@ class CacheManager:
         Returns:
             RAW相対パス → サムネイル相対パスのマッピング
         """
-        return self.load_mapping()
+        return {
+            raw_relative: entry["thumbnail"]
+            for raw_relative, entry in self._cached_mapping().items()
+        }
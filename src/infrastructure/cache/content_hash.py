@@ -0,0 +1,46 @@
+"""ファイル内容のサンプリングハッシュ"""
+
+import hashlib
+from pathlib import Path
+
+
+class ContentHasher:
+    """ファイルの先頭・末尾とサイズからハッシュを計算するクラス
+
+    ファイル全体を読まずに内容を識別するため、大きなRAWファイルでも高速に計算できる。
+    パスや更新時刻を含まないため、ファイルを移動・リネームしても同じ値になる
+    """
+
+    DEFAULT_SAMPLE_SIZE = 64 * 1024
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        """ハッシュ計算器を初期化
+
+        Args:
+            sample_size: 先頭・末尾からそれぞれ読むバイト数
+        """
+        self._sample_size = sample_size
+
+    def hash(self, path: Path) -> str:
+        """ファイルの内容ハッシュを計算
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            16進数のハッシュ文字列
+        """
+        digest = hashlib.blake2b(digest_size=16)
+
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            digest.update(size.to_bytes(8, "little"))
+
+            f.seek(0)
+            digest.update(f.read(self._sample_size))
+            if size > self._sample_size:
+                f.seek(max(self._sample_size, size - self._sample_size))
+                digest.update(f.read(self._sample_size))
+
+        return digest.hexdigest()
@@ -0,0 +1,78 @@
+"""前処理済み入力画像（クロップ）のキャッシュ"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.infrastructure.cache.row_store import AppendOnlyRowStore
+
+
+class CropCache:
+    """特徴抽出モデルに入力するuint8クロップを1つのメモリマップ配列に保存するキャッシュ
+
+    .cache/crops/<前処理シグネチャのハッシュ>/
+    ├── signature.json  # 前処理の内容（リサイズ・クロップサイズなど）
+    ├── rows.bin        # crop_size x crop_size x 3 のuint8クロップを連結した配列
+    └── index.tsv       # 画像ID・フィンガープリント・行番号
+
+    クロップは正規化前のuint8で保存するため、同じ前処理を使うモデルであれば
+    モデルを変えてもJPEGのデコードやリサイズを行わずに再抽出できる。
+    前処理が異なる場合は別のディレクトリになる
+    """
+
+    SIGNATURE_FILE_NAME = "signature.json"
+
+    def __init__(self, crops_dir: Path, signature: Dict[str, Any]) -> None:
+        """クロップキャッシュを初期化
+
+        Args:
+            crops_dir: クロップキャッシュのルートディレクトリ（.cache/crops）
+            signature: 前処理のシグネチャ（crop_sizeを含む）
+        """
+        crop_size = signature["crop_size"]
+        digest = hashlib.blake2b(
+            json.dumps(signature, sort_keys=True).encode("utf-8"), digest_size=8
+        ).hexdigest()
+
+        self._signature = signature
+        self._store = AppendOnlyRowStore(crops_dir / digest, row_shape=(crop_size, crop_size, 3))
+
+    @property
+    def directory(self) -> Path:
+        """このシグネチャのクロップを保存するディレクトリ"""
+        return self._store.directory
+
+    def get(self, image_id: str, fingerprint: str) -> Optional[np.ndarray]:
+        """クロップを取得
+
+        Args:
+            image_id: 画像ID
+            fingerprint: 元画像のフィンガープリント
+
+        Returns:
+            クロップ（H x W x 3 のuint8配列）、存在しないか古い場合はNone
+        """
+        return self._store.get(image_id, fingerprint)
+
+    def put(self, image_id: str, fingerprint: str, crop: np.ndarray) -> None:
+        """クロップを保存
+
+        Args:
+            image_id: 画像ID
+            fingerprint: 元画像のフィンガープリント
+            crop: クロップ（H x W x 3 のuint8配列）
+        """
+        signature_path = self._store.directory / self.SIGNATURE_FILE_NAME
+        if not signature_path.exists():
+            self._store.directory.mkdir(parents=True, exist_ok=True)
+            with open(signature_path, "w", encoding="utf-8") as f:
+                json.dump(self._signature, f, indent=2, sort_keys=True)
+
+        self._store.put(image_id, fingerprint, crop)
+
+    def close(self) -> None:
+        """メモリマップを閉じる"""
+        self._store.close()
@@ -0,0 +1,104 @@
+"""埋め込みベクトルのキャッシュ"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.infrastructure.cache.row_store import AppendOnlyRowStore
+
+
+class EmbeddingCache:
+    """元画像の内容ハッシュをキーに埋め込みベクトルを保存するキャッシュ
+
+    .cache/embedding_cache/<シグネチャのハッシュ>/
+    ├── signature.json  # モデル名・前処理・サムネイル設定と次元数
+    ├── rows.bin        # float32ベクトルを連結した配列
+    └── index.tsv       # 内容ハッシュ・行番号
+
+    シグネチャ（モデル・前処理・サムネイル設定）が変わると別のディレクトリになる。
+    キーはファイルの内容のみから計算するため、フォルダの移動やリネームでは無効にならない
+    """
+
+    SIGNATURE_FILE_NAME = "signature.json"
+
+    def __init__(self, root_dir: Path, signature: Dict[str, Any]) -> None:
+        """埋め込みベクトルキャッシュを初期化
+
+        Args:
+            root_dir: キャッシュのルートディレクトリ（.cache/embedding_cache）
+            signature: 埋め込みベクトルを決める設定（モデル名・前処理など）
+        """
+        digest = hashlib.blake2b(
+            json.dumps(signature, sort_keys=True).encode("utf-8"), digest_size=8
+        ).hexdigest()
+
+        self._signature = signature
+        self._directory = root_dir / digest
+        self._store: Optional[AppendOnlyRowStore] = None
+
+    @property
+    def directory(self) -> Path:
+        """このシグネチャのベクトルを保存するディレクトリ"""
+        return self._directory
+
+    def _open_store(self, dimension: Optional[int] = None) -> Optional[AppendOnlyRowStore]:
+        """行ストアを開く（次元数は保存済みのシグネチャから取得）
+
+        Args:
+            dimension: 新規作成時の次元数（未作成で指定がなければ開かない）
+
+        Returns:
+            行ストア、まだ作成されていない場合はNone
+        """
+        if self._store is not None:
+            return self._store
+
+        signature_path = self._directory / self.SIGNATURE_FILE_NAME
+        if signature_path.exists():
+            with open(signature_path, "r", encoding="utf-8") as f:
+                dimension = json.load(f)["dimension"]
+        elif dimension is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            with open(signature_path, "w", encoding="utf-8") as f:
+                json.dump({**self._signature, "dimension": dimension}, f, indent=2, sort_keys=True)
+        else:
+            return None
+
+        self._store = AppendOnlyRowStore(self._directory, row_shape=(dimension,), dtype=np.float32)
+        return self._store
+
+    def get(self, content_hash: str) -> Optional[np.ndarray]:
+        """埋め込みベクトルを取得
+
+        Args:
+            content_hash: 元画像の内容ハッシュ
+
+        Returns:
+            特徴ベクトル（1次元のfloat32配列）、存在しない場合はNone
+        """
+        store = self._open_store()
+        if store is None:
+            return None
+        vector = store.get(content_hash, "")
+        return None if vector is None else np.array(vector)
+
+    def put(self, content_hash: str, vector: np.ndarray) -> None:
+        """埋め込みベクトルを保存
+
+        Args:
+            content_hash: 元画像の内容ハッシュ
+            vector: 特徴ベクトル（1次元配列）
+        """
+        store = self._open_store(dimension=len(vector))
+        if store is None:
+            # 次元数を指定した場合は必ず作成されるため、ここには来ない
+            raise RuntimeError(f"Embedding cache could not be opened: {self._directory}")
+        store.put(content_hash, "", vector)
+
+    def close(self) -> None:
+        """メモリマップを閉じる"""
+        if self._store is not None:
+            self._store.close()
@@ -0,0 +1,117 @@
+"""HDBSCANの階層（単連結木・最小全域木）のキャッシュ"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class HierarchyCache:
+    """クラスタリングするベクトルとmin_samplesをキーにHDBSCANの階層を保存するキャッシュ
+
+    .cache/hdbscan_trees/
+    └── <ベクトルと設定のハッシュ>.npz  # 単連結木・最小全域木
+
+    相互到達距離の最小全域木とそこから作る単連結木はmin_cluster_sizeや
+    cluster_selection_epsilonに依存しないため、これらを変えて再実行する場合は
+    保存した木からクラスタを選択し直すだけで済む。
+    ベクトルの内容・min_samples・距離メトリックのいずれかが変わると別のキーになる
+    """
+
+    MAX_ENTRIES = 8
+
+    def __init__(self, cache_dir: Path, max_entries: int = MAX_ENTRIES) -> None:
+        """階層キャッシュを初期化
+
+        Args:
+            cache_dir: キャッシュディレクトリ（.cache/hdbscan_trees）
+            max_entries: 保持する階層の最大数（超えた場合は古いものから削除）
+        """
+        self._cache_dir = cache_dir
+        self._max_entries = max_entries
+
+    @staticmethod
+    def key(vectors: np.ndarray, params: Dict[str, Any]) -> str:
+        """ベクトルと階層を決める設定からキーを計算
+
+        Args:
+            vectors: クラスタリングするベクトル（N x D）
+            params: 階層を決める設定（min_samples・metricなど）
+
+        Returns:
+            キー文字列
+        """
+        data = np.ascontiguousarray(vectors)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        digest.update(json.dumps([list(data.shape), data.dtype.str]).encode("utf-8"))
+        digest.update(data.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """キーに対応するファイルパス"""
+        return self._cache_dir / f"{key}.npz"
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """保存された階層を読み込み
+
+        Args:
+            key: キー
+
+        Returns:
+            (単連結木, 最小全域木)、保存されていない・読み込めない場合はNone
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                trees = (data["single_linkage_tree"], data["minimum_spanning_tree"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # 最近使った階層として残るよう更新時刻を更新
+        os.utime(path)
+        return trees
+
+    def save(
+        self, key: str, single_linkage_tree: np.ndarray, minimum_spanning_tree: np.ndarray
+    ) -> Path:
+        """階層を保存
+
+        書き込み途中のファイルが残らないよう、一時ファイルに書き出してから置き換える
+
+        Args:
+            key: キー
+            single_linkage_tree: 単連結木（scipyのlinkage形式）
+            minimum_spanning_tree: 相互到達距離の最小全域木（始点・終点・距離）
+
+        Returns:
+            保存したファイルパス
+        """
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(
+                    f,
+                    single_linkage_tree=single_linkage_tree,
+                    minimum_spanning_tree=minimum_spanning_tree,
+                )
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        """保持数を超えた古い階層を削除"""
+        entries = sorted(self._cache_dir.glob("*.npz"), key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[: max(0, len(entries) - self._max_entries)]:
+            entry.unlink(missing_ok=True)
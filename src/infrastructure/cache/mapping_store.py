@@ -0,0 +1,137 @@
+"""RAW→サムネイルマッピングのSQLiteストア"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class SqliteMappingStore:
+    """RAW画像とサムネイルの対応をSQLite（WALモード）に保存するストア
+
+    RAW相対パスを主キーとするテーブルに1画像1行で保存するため、
+    追加・検索はファイル全体の読み書きを伴わない。
+    複数プロセスからの同時書き込みはSQLiteのロックで直列化される。
+    """
+
+    # 他プロセスの書き込み完了を待つ最大時間（秒）
+    BUSY_TIMEOUT_SECONDS = 30.0
+
+    def __init__(self, db_path: Path) -> None:
+        """マッピングストアを初期化
+
+        Args:
+            db_path: SQLiteデータベースファイルのパス
+        """
+        self._db_path = db_path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def db_path(self) -> Path:
+        """データベースファイルのパスを取得"""
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を取得（初回のみ接続してスキーマを作成）
+
+        Returns:
+            SQLite接続
+        """
+        if self._connection is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self._db_path), timeout=self.BUSY_TIMEOUT_SECONDS)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    raw TEXT PRIMARY KEY,
+                    thumbnail TEXT NOT NULL,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    settings TEXT
+                )
+                """)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """全エントリを取得
+
+        Returns:
+            RAW相対パス → マッピングエントリの辞書
+        """
+        rows = self._connect().execute(
+            "SELECT raw, thumbnail, size, mtime_ns, settings FROM thumbnails"
+        )
+        return {row[0]: self._row_to_entry(row[1:]) for row in rows}
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """エントリを1トランザクションで一括登録（既存エントリは上書き）
+
+        Args:
+            entries: (RAW相対パス, マッピングエントリ) のイテラブル
+        """
+        rows = [
+            (
+                raw_relative,
+                entry["thumbnail"],
+                entry.get("size"),
+                entry.get("mtime_ns"),
+                (
+                    json.dumps(entry["settings"], sort_keys=True)
+                    if entry.get("settings") is not None
+                    else None
+                ),
+            )
+            for raw_relative, entry in entries
+        ]
+        if not rows:
+            return
+
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO thumbnails (raw, thumbnail, size, mtime_ns, settings) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def data_version(self) -> int:
+        """他の接続によるコミットを検知するための世代番号を取得
+
+        同じ接続からの書き込みでは変化せず、他の接続（他プロセス）が
+        コミットした場合のみ値が変わる（PRAGMA data_version）
+
+        Returns:
+            世代番号
+        """
+        return int(self._connect().execute("PRAGMA data_version").fetchone()[0])
+
+    def count(self) -> int:
+        """登録済みエントリ数を取得"""
+        return int(self._connect().execute("SELECT COUNT(*) FROM thumbnails").fetchone()[0])
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _row_to_entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """DBの行をマッピングエントリに変換
+
+        Args:
+            row: (thumbnail, size, mtime_ns, settings) の行
+
+        Returns:
+            マッピングエントリ
+        """
+        thumbnail, size, mtime_ns, settings = row
+        return {
+            "thumbnail": thumbnail,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "settings": json.loads(settings) if settings is not None else None,
+        }
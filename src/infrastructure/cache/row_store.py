@@ -0,0 +1,162 @@
+"""固定形状の配列を1ファイルに追記していく行ストア"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+
+class AppendOnlyRowStore:
+    """同じ形状・型の配列（行）を1つのバイナリファイルに追記し、メモリマップで読むストア
+
+    directory/
+    ├── rows.bin    # 行データを連結したバイナリ（読み込みはnp.memmap）
+    └── index.tsv   # キー・フィンガープリント・行番号（追記のみ、後の行が優先）
+
+    行の内容が変わった場合も既存の行は書き換えず、新しい行を追記して索引を差し替える。
+    索引は行データの書き込み後に追記するため、途中で中断しても索引が
+    書きかけの行を指すことはない
+    """
+
+    DATA_FILE_NAME = "rows.bin"
+    INDEX_FILE_NAME = "index.tsv"
+
+    def __init__(
+        self, directory: Path, row_shape: Tuple[int, ...], dtype: DTypeLike = np.uint8
+    ) -> None:
+        """行ストアを初期化
+
+        Args:
+            directory: データを保存するディレクトリ
+            row_shape: 1行の配列の形状
+            dtype: 配列の型
+        """
+        self._directory = directory
+        self._row_shape = tuple(row_shape)
+        self._dtype = np.dtype(dtype)
+        self._row_bytes = int(np.prod(self._row_shape)) * self._dtype.itemsize
+        self._data_path = directory / self.DATA_FILE_NAME
+        self._index_path = directory / self.INDEX_FILE_NAME
+
+        self._index: Optional[Dict[str, Tuple[str, int]]] = None
+        self._num_rows = 0
+        self._memmap: Optional[np.memmap] = None
+        self._memmap_rows = 0
+
+    @property
+    def directory(self) -> Path:
+        """データを保存するディレクトリ"""
+        return self._directory
+
+    @property
+    def row_shape(self) -> Tuple[int, ...]:
+        """1行の配列の形状"""
+        return self._row_shape
+
+    def __len__(self) -> int:
+        """索引に登録されているキーの数"""
+        return len(self._load_index())
+
+    def _load_index(self) -> Dict[str, Tuple[str, int]]:
+        """索引を読み込み（初回のみ）
+
+        Returns:
+            キー → (フィンガープリント, 行番号) の辞書
+        """
+        if self._index is not None:
+            return self._index
+
+        self._num_rows = (
+            self._data_path.stat().st_size // self._row_bytes if self._data_path.exists() else 0
+        )
+
+        index: Dict[str, Tuple[str, int]] = {}
+        if self._index_path.exists():
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        # 書きかけの行は無視
+                        continue
+                    key, fingerprint, row = parts
+                    try:
+                        row_number = int(row)
+                    except ValueError:
+                        continue
+                    if row_number < self._num_rows:
+                        index[key] = (fingerprint, row_number)
+
+        self._index = index
+        return index
+
+    def get(self, key: str, fingerprint: str) -> Optional[np.ndarray]:
+        """行を取得
+
+        Args:
+            key: 行のキー
+            fingerprint: 行の元データのフィンガープリント（一致する場合のみ返す）
+
+        Returns:
+            行の配列（メモリマップ上のビュー）、存在しないか古い場合はNone
+        """
+        entry = self._load_index().get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+
+        row_number = entry[1]
+        memmap = self._memmap
+        if memmap is None or row_number >= self._memmap_rows:
+            memmap = self._open_memmap()
+        return np.asarray(memmap[row_number])
+
+    def put(self, key: str, fingerprint: str, row: np.ndarray) -> None:
+        """行を追記して索引に登録
+
+        Args:
+            key: 行のキー
+            fingerprint: 行の元データのフィンガープリント
+            row: 行の配列（row_shapeと同じ形状）
+
+        Raises:
+            ValueError: 形状が一致しない場合
+        """
+        if tuple(row.shape) != self._row_shape:
+            raise ValueError(f"Row shape mismatch: expected {self._row_shape}, got {row.shape}")
+        if "\t" in key or "\n" in key:
+            raise ValueError(f"Key must not contain tabs or newlines: {key!r}")
+
+        index = self._load_index()
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        with open(self._data_path, "ab") as f:
+            # 中断で残った書きかけの行があれば切り詰めてから追記
+            f.truncate(self._num_rows * self._row_bytes)
+            f.write(np.ascontiguousarray(row, dtype=self._dtype).tobytes())
+
+        row_number = self._num_rows
+        self._num_rows += 1
+
+        with open(self._index_path, "a", encoding="utf-8") as f:
+            f.write(f"{key}\t{fingerprint}\t{row_number}\n")
+        index[key] = (fingerprint, row_number)
+
+    def _open_memmap(self) -> np.memmap:
+        """現在の行数でメモリマップを開き直す
+
+        Returns:
+            開き直したメモリマップ
+        """
+        self._memmap = np.memmap(
+            self._data_path,
+            dtype=self._dtype,
+            mode="r",
+            shape=(self._num_rows,) + self._row_shape,
+        )
+        self._memmap_rows = self._num_rows
+        return self._memmap
+
+    def close(self) -> None:
+        """メモリマップを閉じる"""
+        self._memmap = None
+        self._memmap_rows = 0
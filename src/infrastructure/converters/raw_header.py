@@ -0,0 +1,186 @@
+"""RAWファイルのヘッダーから画像サイズを読み取る処理"""
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Set, Tuple
+
+
+class RawHeaderReader:
+    """TIFFベースのRAW（CR2 / NEF / ARW / DNG / ORF / RW2 / PEF など）のヘッダーから
+    センサーの画素数を読み取るクラス
+
+    ファイル全体は読まず、IFDチェーンとSubIFDをたどって最大の画像サイズを求める。
+    TIFF構造でないファイル（CR3 / RAFなど）や読み取りに失敗した場合は
+    ファイルサイズから画素数を推定する
+    """
+
+    # TIFFタグ
+    TAG_IMAGE_WIDTH = 256
+    TAG_IMAGE_LENGTH = 257
+    TAG_SUB_IFDS = 330
+    # RW2ではセンサーサイズを独自タグに格納している
+    TAG_RW2_SENSOR_WIDTH = 2
+    TAG_RW2_SENSOR_HEIGHT = 3
+
+    # 走査するIFDの最大数（壊れたファイルでの無限ループ防止）
+    MAX_IFDS = 32
+    # 1 IFDあたりの最大エントリ数
+    MAX_ENTRIES = 1024
+    # ファイルサイズから推定する場合の1画素あたりのバイト数
+    # （非圧縮12〜14bitで約1.5〜2バイト。過小評価を避けるため小さめの値を使う）
+    FALLBACK_BYTES_PER_PIXEL = 1.0
+
+    def read_dimensions(self, raw_path: Path) -> Optional[Tuple[int, int]]:
+        """ヘッダーから最大の画像サイズを読み取る
+
+        Args:
+            raw_path: RAWファイルのパス
+
+        Returns:
+            (幅, 高さ)、TIFF構造として読めない場合はNone
+        """
+        try:
+            with open(raw_path, "rb") as f:
+                return self._read_tiff_dimensions(f)
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def estimate_pixels(self, raw_path: Path) -> int:
+        """RAWの画素数を推定
+
+        Args:
+            raw_path: RAWファイルのパス
+
+        Returns:
+            画素数（ヘッダーから読めない場合はファイルサイズからの推定値）
+        """
+        dimensions = self.read_dimensions(raw_path)
+        if dimensions is not None:
+            width, height = dimensions
+            return width * height
+
+        try:
+            file_size = raw_path.stat().st_size
+        except OSError:
+            return 0
+        return int(file_size / self.FALLBACK_BYTES_PER_PIXEL)
+
+    def _read_tiff_dimensions(self, f: BinaryIO) -> Optional[Tuple[int, int]]:
+        """TIFFヘッダーをたどって最大の画像サイズを求める
+
+        Args:
+            f: バイナリモードで開いたファイル
+
+        Returns:
+            (幅, 高さ)、TIFF構造でない場合はNone
+        """
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+
+        if header[:2] == b"II":
+            endian = "<"
+        elif header[:2] == b"MM":
+            endian = ">"
+        else:
+            return None
+
+        # 42: TIFF / DNG / CR2 / NEF / ARW など、0x4F52・0x5352: ORF、0x55: RW2
+        magic = struct.unpack(endian + "H", header[2:4])[0]
+        if magic not in (42, 0x4F52, 0x5352, 0x55):
+            return None
+
+        is_rw2 = magic == 0x55
+        first_ifd = struct.unpack(endian + "I", header[4:8])[0]
+        pending = [first_ifd]
+        visited: Set[int] = set()
+        best: Optional[Tuple[int, int]] = None
+
+        while pending and len(visited) < self.MAX_IFDS:
+            offset = pending.pop()
+            if offset == 0 or offset in visited:
+                continue
+            visited.add(offset)
+
+            width, height, sub_ifds, next_ifd = self._read_ifd(f, endian, offset, is_rw2)
+            if width and height and (best is None or width * height > best[0] * best[1]):
+                best = (width, height)
+            pending.extend(sub_ifds)
+            pending.append(next_ifd)
+
+        return best
+
+    def _read_ifd(
+        self, f: BinaryIO, endian: str, offset: int, is_rw2: bool = False
+    ) -> Tuple[int, int, List[int], int]:
+        """IFDを1つ読み取る
+
+        Args:
+            f: バイナリモードで開いたファイル
+            endian: structのバイトオーダー指定
+            offset: IFDのファイル先頭からのオフセット
+            is_rw2: RW2の独自タグ（センサーサイズ）も読むか
+
+        Returns:
+            (幅, 高さ, SubIFDオフセットのリスト, 次のIFDオフセット)
+        """
+        f.seek(offset)
+        count_bytes = f.read(2)
+        if len(count_bytes) < 2:
+            return 0, 0, [], 0
+
+        count = struct.unpack(endian + "H", count_bytes)[0]
+        if count > self.MAX_ENTRIES:
+            return 0, 0, [], 0
+
+        entries = f.read(count * 12)
+        next_bytes = f.read(4)
+        next_ifd = struct.unpack(endian + "I", next_bytes)[0] if len(next_bytes) == 4 else 0
+
+        width_tags = {self.TAG_IMAGE_WIDTH}
+        height_tags = {self.TAG_IMAGE_LENGTH}
+        if is_rw2:
+            width_tags.add(self.TAG_RW2_SENSOR_WIDTH)
+            height_tags.add(self.TAG_RW2_SENSOR_HEIGHT)
+
+        width = height = 0
+        sub_ifds: List[int] = []
+
+        for i in range(len(entries) // 12):
+            tag, value_type, value_count = struct.unpack(
+                endian + "HHI", entries[i * 12 : i * 12 + 8]
+            )
+            value_field = entries[i * 12 + 8 : i * 12 + 12]
+
+            if tag in width_tags:
+                width = max(width, self._read_scalar(endian, value_type, value_field))
+            elif tag in height_tags:
+                height = max(height, self._read_scalar(endian, value_type, value_field))
+            elif tag == self.TAG_SUB_IFDS and value_type in (4, 13):
+                if value_count == 1:
+                    sub_ifds.append(struct.unpack(endian + "I", value_field)[0])
+                elif value_count <= self.MAX_IFDS:
+                    position = f.tell()
+                    f.seek(struct.unpack(endian + "I", value_field)[0])
+                    data = f.read(4 * value_count)
+                    f.seek(position)
+                    sub_ifds.extend(struct.unpack(endian + "I" * (len(data) // 4), data))
+
+        return width, height, sub_ifds, next_ifd
+
+    def _read_scalar(self, endian: str, value_type: int, value_field: bytes) -> int:
+        """エントリの値フィールドから整数値を1つ読み取る
+
+        Args:
+            endian: structのバイトオーダー指定
+            value_type: TIFFの型
+            value_field: 4バイトの値フィールド
+
+        Returns:
+            整数値（SHORT / LONG 以外の型は0）
+        """
+        if value_type == 3:
+            return int(struct.unpack(endian + "H", value_field[:2])[0])
+        if value_type == 4:
+            return int(struct.unpack(endian + "I", value_field)[0])
+        return 0
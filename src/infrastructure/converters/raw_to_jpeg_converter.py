@@ -1,32 +1,137 @@
 """RAW画像からJPEGサムネイルへの変換処理"""
 
+import io
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-import rawpy
-from PIL import Image
+from PIL import Image, ImageOps
 
 from src.domain.models.raw_image import RawImage
 from src.domain.models.thumbnail import Thumbnail
 from src.infrastructure.cache.cache_manager import CacheManager
+from src.infrastructure.converters.raw_header import RawHeaderReader
+
+if TYPE_CHECKING:
+    import rawpy
 
 
 class RawToJpegConverter:
     """RAW画像をJPEGサムネイルに変換するクラス"""
 
+    # フルデコード時のrawpy.postprocessパラメータ（デコードプロファイル）
+    # demosaic_algorithmはrawpy.DemosaicAlgorithmのメンバー名で指定する
+    DECODE_PROFILES: Dict[str, Dict[str, Any]] = {
+        # 最速: 半分の解像度でデコード（2x2ビニングのためデモザイク不要）、自動明るさ補正なし
+        "draft": {
+            "half_size": True,
+            "demosaic_algorithm": "LINEAR",
+            "use_camera_wb": True,
+            "no_auto_bright": True,
+            "output_bps": 8,
+        },
+        # 半分の解像度でデコードし、明るさ補正はrawpyの既定に従う
+        "balanced": {
+            "half_size": True,
+            "use_camera_wb": True,
+            "output_bps": 8,
+        },
+        # rawpyの既定値（フル解像度、AHDデモザイク）
+        "quality": {},
+    }
+    DEFAULT_DECODE_PROFILE = "quality"
+
+    # フルデコード時に1画素あたり確保されるメモリ（バイト）
+    # RAWデータ（uint16: 2）に加え、デモザイク用バッファ（4ch x uint16: 8）、
+    # postprocessの出力（RGB8: 3）とPIL画像（RGB8: 3）を確保する。
+    # half_sizeの場合、RAWデータ以外は1/4になる
+    RAW_BYTES_PER_PIXEL = 2
+    DECODED_BYTES_PER_PIXEL = 8 + 3 + 3
+
     def __init__(
         self,
         size: int = 512,
         cache_manager: Optional[CacheManager] = None,
+        use_embedded_preview: bool = False,
+        decode_profile: str = DEFAULT_DECODE_PROFILE,
+        record_mapping: bool = True,
     ) -> None:
         """RAW→JPEG変換器を初期化
 
         Args:
             size: サムネイルの長辺サイズ（ピクセル）
             cache_manager: キャッシュマネージャー（指定時は.cache/thumbnailsに出力）
+            use_embedded_preview: RAWに埋め込まれたプレビューJPEGを優先して使用するか
+                （十分な解像度のプレビューがない場合はフルデコードにフォールバック）
+            decode_profile: フルデコード時のプロファイル（draft / balanced / quality）
+            record_mapping: 変換ごとにキャッシュマネージャーへマッピングを記録するか
+                （呼び出し側でまとめて記録する場合はFalse）
+
+        Raises:
+            ValueError: 未知のデコードプロファイルが指定された場合
         """
+        if decode_profile not in self.DECODE_PROFILES:
+            raise ValueError(
+                f"Unknown decode profile: {decode_profile}. "
+                f"Available profiles: {sorted(self.DECODE_PROFILES)}"
+            )
+
         self._size = size
         self._cache_manager = cache_manager
+        self._use_embedded_preview = use_embedded_preview
+        self._decode_profile = decode_profile
+        self._record_mapping = record_mapping
+        self._header_reader = RawHeaderReader()
+
+    @property
+    def size(self) -> int:
+        """サムネイルの長辺サイズ"""
+        return self._size
+
+    @property
+    def cache_manager(self) -> Optional[CacheManager]:
+        """キャッシュマネージャー"""
+        return self._cache_manager
+
+    @property
+    def use_embedded_preview(self) -> bool:
+        """埋め込みプレビューを使用するか"""
+        return self._use_embedded_preview
+
+    @property
+    def decode_profile(self) -> str:
+        """フルデコード時のプロファイル名"""
+        return self._decode_profile
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """サムネイルの内容に影響する変換設定（キャッシュの有効性判定に使用）
+
+        キーはコンストラクタの引数名と一致するため、同じ設定の変換器を
+        ワーカープロセスで再構築する際にもそのまま渡せる
+        """
+        return {
+            "size": self._size,
+            "use_embedded_preview": self._use_embedded_preview,
+            "decode_profile": self._decode_profile,
+        }
+
+    def estimate_decode_memory(self, raw_path: Path) -> int:
+        """1ファイルの変換に必要なメモリ量を推定
+
+        画素数はRAWのヘッダーから読み取る（読めない場合はファイルサイズから推定）。
+        埋め込みプレビューを使う場合もフルデコードへのフォールバックに備え、
+        フルデコード時の量を返す
+
+        Args:
+            raw_path: RAWファイルのパス
+
+        Returns:
+            推定メモリ量（バイト）
+        """
+        pixels = self._header_reader.estimate_pixels(raw_path)
+        # half_sizeでは縦横1/2で展開するため、展開後の画素数は1/4になる
+        divisor = 4 if self.DECODE_PROFILES[self._decode_profile].get("half_size") else 1
+        return int(pixels * (self.RAW_BYTES_PER_PIXEL + self.DECODED_BYTES_PER_PIXEL / divisor))
 
     def convert(self, raw_image: RawImage) -> Optional[Thumbnail]:
         """RAW画像をJPEGサムネイルに変換
@@ -38,32 +143,104 @@ class RawToJpegConverter:
             生成されたサムネイル、失敗時はNone
         """
         try:
-            # RAW画像を読み込んでRGBに変換
-            with rawpy.imread(str(raw_image.path)) as raw:
-                rgb = raw.postprocess()
+            return self.save(raw_image, self.render(raw_image))
+        except Exception as e:
+            print(f"Failed to convert {raw_image.path}: {e}")
+            return None
 
-            # PIL Imageに変換してサムネイル化
-            img = Image.fromarray(rgb)
-            img.thumbnail((self._size, self._size), Image.Resampling.LANCZOS)
+    def render(self, raw_image: RawImage) -> Image.Image:
+        """RAW画像をデコードしてサムネイルサイズのRGB画像を生成（保存はしない）
 
-            # 出力パスを決定して保存
-            output_path = self._get_output_path(raw_image)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            img.save(output_path, "JPEG", quality=85, optimize=True)
+        Args:
+            raw_image: 変換元のRAW画像
 
-            # キャッシュマネージャーがある場合はマッピングを記録
-            if self._cache_manager:
-                self._cache_manager.add_raw_thumbnail_mapping(
-                    raw_image.path, output_path
-                )
+        Returns:
+            長辺がサムネイルサイズ以下のRGB画像
+        """
+        # rawpyはデコードが必要になった時点で読み込む（キャッシュ済みのみの実行では不要）
+        import rawpy
 
-            return Thumbnail(path=output_path, source=raw_image, size=self._size)
+        with rawpy.imread(str(raw_image.path)) as raw:
+            img = None
+            if self._use_embedded_preview:
+                img = self._load_embedded_preview(raw)
 
-        except Exception as e:
-            print(f"Failed to convert {raw_image.path}: {e}")
+            if img is None:
+                # プレビューが使えない場合はフルデコードしてRGBに変換
+                img = Image.fromarray(raw.postprocess(**self._postprocess_params()))
+
+        # サムネイル化
+        img.thumbnail((self._size, self._size), Image.Resampling.LANCZOS)
+        return img
+
+    def save(self, raw_image: RawImage, img: Image.Image) -> Thumbnail:
+        """生成したRGB画像をJPEGサムネイルとして保存
+
+        Args:
+            raw_image: 変換元のRAW画像
+            img: renderで生成したRGB画像
+
+        Returns:
+            保存したサムネイル
+        """
+        # 出力パスを決定して保存
+        output_path = self.get_output_path(raw_image)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        img.save(output_path, "JPEG", quality=85, optimize=True)
+
+        # キャッシュマネージャーがある場合はマッピングを記録
+        if self._cache_manager and self._record_mapping:
+            self._cache_manager.add_raw_thumbnail_mapping(
+                raw_image.path, output_path, settings=self.settings
+            )
+
+        return Thumbnail(path=output_path, source=raw_image, size=self._size)
+
+    def _postprocess_params(self) -> Dict[str, Any]:
+        """デコードプロファイルからrawpy.postprocessの引数を構築
+
+        Returns:
+            postprocessに渡すキーワード引数
+        """
+        import rawpy
+
+        params = dict(self.DECODE_PROFILES[self._decode_profile])
+        if "demosaic_algorithm" in params:
+            params["demosaic_algorithm"] = rawpy.DemosaicAlgorithm[params["demosaic_algorithm"]]
+        return params
+
+    def _load_embedded_preview(self, raw: "rawpy.RawPy") -> Optional[Image.Image]:
+        """RAWに埋め込まれたプレビュー画像を読み込み
+
+        Args:
+            raw: 開いているRAWファイル
+
+        Returns:
+            RGBのプレビュー画像、使用できるプレビューがない場合はNone
+        """
+        import rawpy
+
+        try:
+            thumb = raw.extract_thumb()
+        except (rawpy.LibRawNoThumbnailError, rawpy.LibRawUnsupportedThumbnailError):
+            return None
+
+        if thumb.format == rawpy.ThumbFormat.JPEG:
+            img = Image.open(io.BytesIO(thumb.data))
+            # プレビューJPEGはEXIFの回転情報を持つことがあるため適用
+            img = ImageOps.exif_transpose(img)
+        elif thumb.format == rawpy.ThumbFormat.BITMAP:
+            img = Image.fromarray(thumb.data)
+        else:
             return None
 
-    def _get_output_path(self, raw_image: RawImage) -> Path:
+        # 長辺がサムネイルサイズに満たないプレビューは使わない
+        if max(img.size) < self._size:
+            return None
+
+        return img.convert("RGB")
+
+    def get_output_path(self, raw_image: RawImage) -> Path:
         """サムネイルの出力パスを取得
 
         Args:
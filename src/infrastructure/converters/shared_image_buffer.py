@@ -0,0 +1,77 @@
+"""プロセス間で画像画素を受け渡す共有メモリバッファ"""
+
+from multiprocessing import resource_tracker, shared_memory
+from typing import Tuple
+
+import numpy as np
+
+# 共有メモリ上の画像への参照: (共有メモリ名, 配列の形状)
+SharedImageRef = Tuple[str, Tuple[int, ...]]
+
+
+class SharedImageBuffer:
+    """uint8画像を共有メモリ経由でワーカープロセスからメインプロセスへ渡すヘルパー
+
+    ワーカー側でpublishした共有メモリは、メインプロセス側でconsumeした時点で解放される
+    （受け取らない場合はdiscardで解放する）。
+    ワーカーが先に終了しても共有メモリが回収されないよう、ワーカープールを作成する前に
+    メインプロセスでprepareを呼び、全プロセスで同じリソーストラッカーを共有すること
+    """
+
+    @staticmethod
+    def prepare() -> None:
+        """共有メモリを追跡するリソーストラッカーを起動（ワーカープール作成前に呼ぶ）"""
+        resource_tracker.ensure_running()
+
+    @staticmethod
+    def publish(image: np.ndarray) -> SharedImageRef:
+        """画像を共有メモリにコピー（ワーカープロセス側）
+
+        Args:
+            image: uint8の画像配列
+
+        Returns:
+            共有メモリ上の画像への参照
+        """
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+        try:
+            np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf)[...] = image
+            return shm.name, image.shape
+        finally:
+            shm.close()
+
+    @staticmethod
+    def consume(ref: SharedImageRef) -> np.ndarray:
+        """共有メモリから画像を取り出して共有メモリを解放（メインプロセス側）
+
+        Args:
+            ref: publishが返した参照
+
+        Returns:
+            画像配列（共有メモリから切り離したコピー）
+        """
+        name, shape = ref
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @staticmethod
+    def discard(ref: SharedImageRef) -> None:
+        """画像を取り出さずに共有メモリを解放（メインプロセス側）
+
+        処理を中断して受け取らなくなった画像に使う。解放済みの場合は何もしない
+
+        Args:
+            ref: publishが返した参照
+        """
+        name, _ = ref
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
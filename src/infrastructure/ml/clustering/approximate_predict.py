@@ -0,0 +1,99 @@
+"""学習済みHDBSCANのクラスタへの新しい点の近似割り当て"""
+
+from typing import Tuple
+
+import numpy as np
+
+from src.infrastructure.ml.neighbors.blocked_search import DEFAULT_BLOCK_SIZE, nearest_neighbors
+
+# ドリフトの基準となるコア距離の平均を求める標本数の上限
+REFERENCE_SAMPLE_SIZE = 1000
+
+
+def _reference_core_distances(
+    rows: np.ndarray, reference: np.ndarray, min_samples: int, block_size: int
+) -> np.ndarray:
+    """学習に使った点のコア距離を求める（自分自身を除いてmin_samples番目の近傍までの距離）
+
+    Args:
+        rows: コア距離を求める学習点の行番号
+        reference: 学習に使ったベクトル（N x D）
+        min_samples: コアポイントとみなすための近傍サンプル数
+        block_size: 一度に計算する距離の要素数の上限
+
+    Returns:
+        コア距離（len(rows)個、float64）
+    """
+    k = min(min_samples + 1, len(reference))
+    _, squared = nearest_neighbors(reference[rows], reference, k, block_size)
+    return np.sqrt(squared[:, -1].astype(np.float64))
+
+
+def approximate_predict(
+    reference: np.ndarray,
+    reference_labels: np.ndarray,
+    queries: np.ndarray,
+    min_samples: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """新しい点を相互到達距離で最も近い学習点のクラスタに割り当てる
+
+    hdbscanのapproximate_predictと同じく、新しい点のコア距離を学習点に対して求め、
+    近傍の学習点との相互到達距離 max(コア距離(新), コア距離(学習点), 距離) が最小の点を選ぶ。
+    選んだ点のラベルを全レベルでそのまま使うため、予測したラベルもレベル間で入れ子になる
+
+    Args:
+        reference: 学習に使ったベクトル（N x D）
+        reference_labels: 学習点のレベルごとのラベル（L x N、ノイズなし）
+        queries: 割り当てるベクトル（M x D）
+        min_samples: コアポイントとみなすための近傍サンプル数
+        block_size: 一度に計算する距離の要素数の上限
+
+    Returns:
+        (レベルごとのラベル（L x M）, 割り当て先までの相互到達距離（M個）)
+    """
+    num_candidates = min(2 * min_samples, len(reference))
+    neighbors, squared = nearest_neighbors(queries, reference, num_candidates, block_size)
+    distances = np.sqrt(squared.astype(np.float64))
+    query_core = distances[:, min(min_samples, num_candidates) - 1]
+
+    # 候補になった学習点だけコア距離を求める
+    candidates, inverse = np.unique(neighbors, return_inverse=True)
+    candidate_core = _reference_core_distances(candidates, reference, min_samples, block_size)[
+        inverse.reshape(neighbors.shape)
+    ]
+
+    reachability = np.maximum(np.maximum(distances, candidate_core), query_core[:, np.newaxis])
+    best = reachability.argmin(axis=1)
+    rows = np.arange(len(queries))
+    nearest = neighbors[rows, best]
+    return reference_labels[:, nearest], reachability[rows, best]
+
+
+def mean_core_distance(
+    reference: np.ndarray,
+    min_samples: int,
+    random_state: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> float:
+    """学習に使った点のコア距離の平均（ドリフトの判定の基準）
+
+    予測した点の相互到達距離はコア距離以上になるため、同じ分布の点であれば
+    割り当て距離の平均はおおむねこの値に近くなる
+
+    Args:
+        reference: 学習に使ったベクトル（N x D）
+        min_samples: コアポイントとみなすための近傍サンプル数
+        random_state: 標本を選ぶ乱数シード
+        block_size: 一度に計算する距離の要素数の上限
+
+    Returns:
+        コア距離の平均（最大REFERENCE_SAMPLE_SIZE点の標本から求める）
+    """
+    if len(reference) < 2:
+        return 0.0
+    rng = np.random.default_rng(random_state)
+    size = min(REFERENCE_SAMPLE_SIZE, len(reference))
+    sample = rng.choice(len(reference), size=size, replace=False)
+    core = _reference_core_distances(sample, reference, min_samples, block_size)
+    return float(core.mean())
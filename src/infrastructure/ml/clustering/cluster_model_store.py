@@ -0,0 +1,81 @@
+"""学習済みクラスタモデルの保存・読み込み"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.domain.models.cluster_model import ClusterModel
+
+# 予測用の配列の名前に付ける接頭辞（モデル本体の配列と名前が衝突しないようにする）
+ARRAY_PREFIX = "array_"
+
+
+def save_cluster_model(
+    path: Path, model: ClusterModel, settings: dict, arrays: Dict[str, np.ndarray]
+) -> None:
+    """クラスタモデルと予測用の配列をnpz形式で保存
+
+    書き込み途中のファイルが残らないよう、一時ファイルに書き出してから置き換える
+
+    Args:
+        path: 保存先のファイルパス
+        model: 学習に使った画像とラベル
+        settings: クラスタリングの設定（読み込み時に一致を確認する）
+        arrays: 予測に使う配列（クラスタ中心・学習に使ったベクトルなど）
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    # np.savezの型定義はキーワード引数にallow_pickle（bool）を含むため、配列はAnyの辞書で渡す
+    payload: Dict[str, Any] = {
+        "image_ids": np.array(model.image_ids, dtype=str),
+        "labels": np.array(model.labels, dtype=np.int64).reshape(len(model.labels), model.size),
+        "fingerprints": model.fingerprints,
+        "reference_distance": np.array(model.reference_distance, dtype=np.float64),
+        "settings": np.array(json.dumps(settings, sort_keys=True)),
+    }
+    payload.update({f"{ARRAY_PREFIX}{name}": array for name, array in arrays.items()})
+    try:
+        with open(temp_path, "wb") as f:
+            np.savez(f, **payload)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def load_cluster_model(
+    path: Path, settings: dict
+) -> Optional[Tuple[ClusterModel, Dict[str, np.ndarray]]]:
+    """保存されたクラスタモデルと予測用の配列を読み込み
+
+    Args:
+        path: 保存されたファイルパス
+        settings: 現在のクラスタリングの設定
+
+    Returns:
+        (学習に使った画像とラベル, 予測に使う配列)
+        （ファイルがない、読み込めない、または設定が異なる場合はNone）
+    """
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if json.loads(str(data["settings"])) != json.loads(json.dumps(settings)):
+                return None
+            model = ClusterModel(
+                image_ids=data["image_ids"].tolist(),
+                labels=list(data["labels"]),
+                fingerprints=data["fingerprints"],
+                reference_distance=float(data["reference_distance"]),
+            )
+            arrays = {
+                name[len(ARRAY_PREFIX) :]: data[name]
+                for name in data.files
+                if name.startswith(ARRAY_PREFIX)
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+    return model, arrays
@@ -0,0 +1,85 @@
+"""hdbscanの非公開APIへのアダプタ
+
+単連結木からのクラスタ選択と、最小全域木から単連結木への変換は公開APIにないため、
+hdbscanの内部モジュール（_hdbscan_tree / _hdbscan_linkage）を使う。
+内部モジュールはリリース間で移動・変更され得るため、利用箇所をこのモジュールに集め、
+読み込めない場合は対応バージョンを示すImportErrorにする
+（バージョンはpyproject.tomlでSUPPORTED_VERSIONSに固定している）
+"""
+
+import importlib
+from typing import Any, Tuple
+
+import numpy as np
+
+# 内部APIの互換性を確認したhdbscanのバージョン（pyproject.tomlの指定と同じ）
+SUPPORTED_VERSIONS = ">=0.8.33,<=0.8.44"
+
+
+def _import_internals(module_name: str, *names: str) -> Tuple[Any, ...]:
+    """hdbscanの内部モジュールから関数を読み込む
+
+    Args:
+        module_name: hdbscanパッケージ内のモジュール名
+        names: 読み込む関数名
+
+    Returns:
+        namesと同じ順序の関数
+
+    Raises:
+        ImportError: hdbscanがない、または内部モジュール・関数が見つからない場合
+    """
+    qualified_name = f"hdbscan.{module_name}"
+    try:
+        module = importlib.import_module(qualified_name)
+        return tuple(getattr(module, name) for name in names)
+    except (ImportError, AttributeError) as e:
+        raise ImportError(
+            f"{qualified_name} ({', '.join(names)}) is not available in the installed "
+            f"hdbscan; install hdbscan{SUPPORTED_VERSIONS}"
+        ) from e
+
+
+def select_clusters(
+    single_linkage_tree: np.ndarray,
+    min_cluster_size: int,
+    cluster_selection_epsilon: float = 0.0,
+) -> np.ndarray:
+    """単連結木を圧縮し、安定度の高いクラスタを選択
+
+    Args:
+        single_linkage_tree: 単連結木（scipyのlinkage形式）
+        min_cluster_size: クラスタとみなす最小サンプル数
+        cluster_selection_epsilon: この距離より近いクラスタを分割しない閾値
+
+    Returns:
+        クラスタラベル（ノイズは-1）
+
+    Raises:
+        ImportError: hdbscanの内部APIが見つからない場合
+    """
+    condense_tree, compute_stability, get_clusters = _import_internals(
+        "_hdbscan_tree", "condense_tree", "compute_stability", "get_clusters"
+    )
+    condensed_tree = condense_tree(single_linkage_tree, min_cluster_size)
+    stability = compute_stability(condensed_tree)
+    labels, _, _ = get_clusters(
+        condensed_tree, stability, cluster_selection_epsilon=cluster_selection_epsilon
+    )
+    return np.asarray(labels)
+
+
+def single_linkage_from_spanning_tree(minimum_spanning_tree: np.ndarray) -> np.ndarray:
+    """重みの昇順に並べた最小全域木から単連結木を作成
+
+    Args:
+        minimum_spanning_tree: 最小全域木（始点, 終点, 重み の (N-1) x 3 配列、重みの昇順）
+
+    Returns:
+        単連結木（scipyのlinkage形式）
+
+    Raises:
+        ImportError: hdbscanの内部APIが見つからない場合
+    """
+    (label,) = _import_internals("_hdbscan_linkage", "label")
+    return np.asarray(label(minimum_spanning_tree))
@@ -1,13 +1,28 @@
 """MiniBatchKMeansクラスタラー"""
 
+from pathlib import Path
+from typing import List, Optional, Tuple
+
 import numpy as np
-from sklearn.cluster import MiniBatchKMeans
 
+from src.domain.models.cluster_model import ClusterModel
+from src.domain.models.fingerprint import fingerprint_vectors
 from src.domain.services.clustering_service import ClusteringService
+from src.infrastructure.ml.clustering.cluster_model_store import (
+    load_cluster_model,
+    save_cluster_model,
+)
+from src.infrastructure.ml.neighbors.blocked_search import nearest_neighbors
 
 
 class KMeansClusterer(ClusteringService):
-    """MiniBatchKMeansを使用したクラスタリングサービス"""
+    """MiniBatchKMeansを使用したクラスタリングサービス
+
+    学習後はクラスタ中心を保持し、新しいベクトルを最も近いクラスタ中心に割り当てる
+    """
+
+    # 保存するモデルの形式のバージョン（形式を変えた場合は古いモデルを読み込まない）
+    FORMAT_VERSION = 1
 
     def __init__(
         self,
@@ -23,12 +38,12 @@ class KMeansClusterer(ClusteringService):
             random_state: 乱数シード
         """
         self._n_clusters = n_clusters
-        self._model = MiniBatchKMeans(
-            n_clusters=n_clusters,
-            batch_size=batch_size,
-            random_state=random_state,
-            n_init=10,
-        )
+        self._batch_size = batch_size
+        self._random_state = random_state
+        self._centers: Optional[np.ndarray] = None  # fit後に設定される
+        self._labels: Optional[np.ndarray] = None
+        self._fingerprints: Optional[np.ndarray] = None
+        self._reference_distance = 0.0
 
     def fit_predict(self, vectors: np.ndarray) -> np.ndarray:
         """クラスタリングを実行してラベルを予測
@@ -45,9 +60,87 @@ class KMeansClusterer(ClusteringService):
         if vectors.ndim != 2:
             raise ValueError(f"Vectors must be 2-dimensional, got {vectors.ndim}")
 
-        labels = self._model.fit_predict(vectors)
+        # scikit-learnの読み込みは重いため、クラスタリングを実行する時点で読み込む
+        from sklearn.cluster import MiniBatchKMeans
+
+        model = MiniBatchKMeans(
+            n_clusters=self._n_clusters,
+            batch_size=self._batch_size,
+            random_state=self._random_state,
+            n_init=10,
+        )
+        labels = model.fit_predict(vectors)
+
+        self._centers = model.cluster_centers_.astype(np.float32)
+        self._labels = labels
+        self._fingerprints = fingerprint_vectors(vectors)
+        _, distances = self.predict(vectors)
+        self._reference_distance = float(distances.mean())
         return labels
 
+    def predict(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """新しいベクトルを最も近いクラスタ中心に割り当て
+
+        Args:
+            vectors: 特徴ベクトル（M x D の2次元配列）
+
+        Returns:
+            (クラスタラベル（M個）, クラスタ中心までの距離（M個）)
+
+        Raises:
+            RuntimeError: モデルが学習・読み込みされていない場合
+        """
+        if self._centers is None:
+            raise RuntimeError("KMeans model has not been fitted or loaded")
+
+        queries = np.asarray(vectors, dtype=np.float32)
+        nearest, squared = nearest_neighbors(queries, self._centers, 1)
+        return nearest[:, 0], np.sqrt(squared[:, 0].astype(np.float64))
+
+    def _settings(self) -> dict:
+        """モデルの設定（保存したモデルを再利用できるかの判定に使う）"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "algorithm": "kmeans",
+            "n_clusters": self._n_clusters,
+            "random_state": self._random_state,
+        }
+
+    def save_model(self, path: Path, image_ids: List[str]) -> None:
+        """直前のfit_predictで学習したクラスタ中心を保存
+
+        Args:
+            path: 保存先のファイルパス
+            image_ids: 学習に使った各ベクトルの画像ID
+
+        Raises:
+            RuntimeError: モデルが学習されていない場合
+        """
+        if self._centers is None or self._labels is None or self._fingerprints is None:
+            raise RuntimeError("KMeans model has not been fitted")
+
+        model = ClusterModel(
+            image_ids, [self._labels], self._fingerprints, self._reference_distance
+        )
+        save_cluster_model(path, model, self._settings(), {"centers": self._centers})
+
+    def load_model(self, path: Path) -> Optional[ClusterModel]:
+        """保存されたクラスタ中心を読み込み
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            学習に使った画像とラベル（ファイルがない、または設定が異なる場合はNone）
+        """
+        loaded = load_cluster_model(path, self._settings())
+        if loaded is None or "centers" not in loaded[1]:
+            return None
+
+        model, arrays = loaded
+        self._centers = arrays["centers"].astype(np.float32)
+        return model
+
     def get_n_clusters(self) -> int:
         """クラスタ数を取得
 
@@ -0,0 +1,377 @@
+"""共通のHDBSCAN階層から複数の詳細度を抽出するクラスタラー"""
+
+import warnings
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.domain.models.cluster_model import ClusterModel
+from src.domain.models.fingerprint import fingerprint_vectors
+from src.domain.models.neighbor_graph import NeighborGraph
+from src.domain.services.hierarchical_clustering_service import HierarchicalClusteringService
+from src.infrastructure.cache.hierarchy_cache import HierarchyCache
+from src.infrastructure.ml.clustering.approximate_predict import (
+    approximate_predict,
+    mean_core_distance,
+)
+from src.infrastructure.ml.clustering.cluster_model_store import (
+    load_cluster_model,
+    save_cluster_model,
+)
+from src.infrastructure.ml.clustering.hdbscan_internals import select_clusters
+from src.infrastructure.ml.clustering.noise_reassignment import (
+    REASSIGNMENT_METHODS,
+    reassign_noise,
+)
+from src.infrastructure.ml.neighbors.sparse_graph import mutual_reachability_trees
+
+# hdbscanライブラリ内部のsklearn非推奨警告を抑制
+warnings.filterwarnings("ignore", category=FutureWarning, module="sklearn.utils.deprecation")
+
+
+def nest_labels(finer: np.ndarray, coarser: np.ndarray) -> np.ndarray:
+    """粗いレベルのラベルを細かいレベルのクラスタ単位にそろえる
+
+    細かいクラスタごとに、メンバーが最も多く属する粗いクラスタへまとめて割り当てるため、
+    細かいクラスタが粗いクラスタをまたぐことはない
+
+    Args:
+        finer: 細かいレベルのクラスタラベル（ノイズなし）
+        coarser: 粗いレベルのクラスタラベル（ノイズなし）
+
+    Returns:
+        入れ子になった粗いレベルのラベル（0からの連番）
+    """
+    finer_ids, finer_index = np.unique(finer, return_inverse=True)
+    coarser_ids, coarser_index = np.unique(coarser, return_inverse=True)
+
+    counts = np.zeros((len(finer_ids), len(coarser_ids)), dtype=np.int64)
+    np.add.at(counts, (finer_index, coarser_index), 1)
+    parents = counts.argmax(axis=1)
+
+    # 割り当てのなくなった粗いクラスタを詰めて連番にする
+    _, dense_parents = np.unique(parents, return_inverse=True)
+    return dense_parents[finer_index]
+
+
+class MultiLevelHDBSCANClusterer(HierarchicalClusteringService):
+    """1回のHDBSCANで構築した階層から複数の詳細度のラベルを抽出するクラスタリングサービス
+
+    相互到達距離と最小全域木（単連結木）の計算はmin_cluster_sizeに依存しないため、
+    単連結木を一度だけ構築し、レベルごとのmin_cluster_sizeで凝縮木を作り直して
+    クラスタを選択する。粗いレベルは細かいレベルのクラスタをまとめたものになる。
+    階層キャッシュを指定した場合は木を保存し、同じベクトルとmin_samplesであれば
+    次回以降は木の構築を省略する。
+    k近傍グラフを渡した場合は、全ての組の距離の代わりにグラフの辺だけで
+    相互到達距離の最小全域木を構築し、ノイズポイントの再割り当てにもグラフの近傍を使う。
+    学習後は学習に使ったベクトルとラベルを保持し、新しいベクトルを相互到達距離で
+    最も近い学習点のクラスタに割り当てる（approximate_predict）
+    """
+
+    # 保存するモデルの形式のバージョン（形式を変えた場合は古いモデルを読み込まない）
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        min_cluster_sizes: Sequence[int] = (5, 10),
+        min_samples: int = 3,
+        cluster_selection_epsilon: float = 0.0,
+        metric: str = "euclidean",
+        hierarchy_cache: Optional[HierarchyCache] = None,
+        noise_assignment: str = "centroid",
+        noise_neighbors: int = 5,
+    ) -> None:
+        """階層クラスタラーを初期化
+
+        Args:
+            min_cluster_sizes: レベルごとのクラスタとみなす最小サンプル数（細かい順）
+            min_samples: コアポイントとみなすための近傍サンプル数
+            cluster_selection_epsilon: クラスタ選択の閾値（0.0で自動）
+            metric: 距離メトリック
+            hierarchy_cache: 単連結木・最小全域木のキャッシュ（Noneの場合は毎回構築する）
+            noise_assignment: ノイズポイントの再割り当て方法（centroid / core / knn）
+            noise_neighbors: knnで投票する近傍点の数
+
+        Raises:
+            ValueError: min_cluster_sizesが空、2未満の値を含む、昇順でない場合、
+                または未知の再割り当て方法の場合
+        """
+        sizes = list(min_cluster_sizes)
+        if not sizes:
+            raise ValueError("min_cluster_sizes must not be empty")
+        if min(sizes) < 2:
+            raise ValueError(f"min_cluster_sizes must be at least 2, got {sizes}")
+        if sizes != sorted(sizes):
+            raise ValueError(f"min_cluster_sizes must be in ascending order, got {sizes}")
+        if noise_assignment not in REASSIGNMENT_METHODS:
+            raise ValueError(
+                f"Unknown noise assignment: {noise_assignment}. Available: {REASSIGNMENT_METHODS}"
+            )
+
+        self._min_cluster_sizes = sizes
+        self._min_samples = min_samples
+        self._cluster_selection_epsilon = cluster_selection_epsilon
+        self._metric = metric
+        self._hierarchy_cache = hierarchy_cache
+        self._noise_assignment = noise_assignment
+        self._noise_neighbors = noise_neighbors
+        self._n_clusters: List[int] = [0] * len(sizes)  # fit後に設定される
+        self._reference: Optional[np.ndarray] = None
+        self._levels: Optional[List[np.ndarray]] = None
+        self._fingerprints: Optional[np.ndarray] = None
+
+    @staticmethod
+    def doubling_sizes(min_cluster_size: int, num_levels: int) -> List[int]:
+        """レベルごとに2倍にした最小クラスタサイズを作成
+
+        Args:
+            min_cluster_size: 最も細かいレベルの最小クラスタサイズ
+            num_levels: レベル数
+
+        Returns:
+            最小クラスタサイズのリスト（例: 5, 2 -> [5, 10]）
+        """
+        return [min_cluster_size * 2**level for level in range(num_levels)]
+
+    def fit_predict_levels(
+        self, vectors: np.ndarray, neighbor_graph: Optional[NeighborGraph] = None
+    ) -> List[np.ndarray]:
+        """階層を一度だけ構築し、全レベルのラベルを予測
+
+        各レベルのノイズポイントは指定した方法（既定は最も近いクラスタ中心）で割り当てる
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列、N:サンプル数、D:次元数）
+            neighbor_graph: vectorsと同じ行順のk近傍グラフ（Noneの場合は全ての組の距離を使う）
+
+        Returns:
+            レベルごとのクラスタラベル（細かい順、各要素はN個の整数配列）
+
+        Raises:
+            ValueError: 入力が2次元配列でない場合、またはグラフのノード数がvectorsと異なる、
+                近傍数がmin_samples未満、距離メトリックがeuclideanでない場合
+        """
+        if vectors.ndim != 2:
+            raise ValueError(f"Vectors must be 2-dimensional, got {vectors.ndim}")
+        if neighbor_graph is not None:
+            self._validate_graph(vectors, neighbor_graph)
+
+        single_linkage_tree = self._single_linkage_tree(vectors, neighbor_graph)
+        neighbor_indices = neighbor_graph.indices if neighbor_graph is not None else None
+
+        levels: List[np.ndarray] = []
+        for min_cluster_size in self._min_cluster_sizes:
+            labels = self._extract_labels(single_linkage_tree, min_cluster_size)
+            if -1 in labels:
+                labels = reassign_noise(
+                    vectors,
+                    labels,
+                    self._noise_assignment,
+                    self._noise_neighbors,
+                    neighbor_indices=neighbor_indices,
+                )
+            if levels:
+                labels = nest_labels(levels[-1], labels)
+            levels.append(labels)
+
+        self._n_clusters = [len(np.unique(labels)) for labels in levels]
+        self._reference = np.asarray(vectors, dtype=np.float32)
+        self._levels = levels
+        self._fingerprints = fingerprint_vectors(vectors)
+        return levels
+
+    def predict_levels(self, vectors: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+        """新しいベクトルを相互到達距離で最も近い学習点のクラスタに割り当て
+
+        学習時にノイズは全て再割り当てしているため、予測でもノイズ（-1）は返さない
+
+        Args:
+            vectors: 特徴ベクトル（M x D の2次元配列）
+
+        Returns:
+            (レベルごとのクラスタラベル（細かい順）, 割り当て先までの相互到達距離（M個）)
+
+        Raises:
+            RuntimeError: モデルが学習・読み込みされていない場合
+            ValueError: 距離メトリックがeuclideanでない場合
+        """
+        if self._reference is None or self._levels is None:
+            raise RuntimeError("HDBSCAN model has not been fitted or loaded")
+        if self._metric != "euclidean":
+            raise ValueError(f"Prediction requires the euclidean metric, got {self._metric}")
+
+        labels, distances = approximate_predict(
+            self._reference,
+            np.array(self._levels),
+            np.asarray(vectors, dtype=np.float32),
+            self._min_samples,
+        )
+        return list(labels), distances
+
+    def _settings(self) -> dict:
+        """モデルの設定（保存したモデルを再利用できるかの判定に使う）"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "algorithm": "hdbscan",
+            "min_cluster_sizes": self._min_cluster_sizes,
+            "min_samples": self._min_samples,
+            "cluster_selection_epsilon": self._cluster_selection_epsilon,
+            "metric": self._metric,
+            "noise_assignment": self._noise_assignment,
+            "noise_neighbors": self._noise_neighbors,
+        }
+
+    def save_model(self, path: Path, image_ids: List[str]) -> None:
+        """直前のfit_predict_levelsで学習したベクトルとラベルを保存
+
+        Args:
+            path: 保存先のファイルパス
+            image_ids: 学習に使った各ベクトルの画像ID
+
+        Raises:
+            RuntimeError: モデルが学習されていない場合
+        """
+        if self._reference is None or self._levels is None or self._fingerprints is None:
+            raise RuntimeError("HDBSCAN model has not been fitted")
+
+        model = ClusterModel(
+            image_ids,
+            self._levels,
+            self._fingerprints,
+            mean_core_distance(self._reference, self._min_samples),
+        )
+        save_cluster_model(path, model, self._settings(), {"vectors": self._reference})
+
+    def load_model(self, path: Path) -> Optional[ClusterModel]:
+        """保存されたベクトルとラベルを読み込み
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            学習に使った画像とラベル（ファイルがない、または設定が異なる場合はNone）
+        """
+        loaded = load_cluster_model(path, self._settings())
+        if loaded is None or "vectors" not in loaded[1]:
+            return None
+
+        model, arrays = loaded
+        self._reference = arrays["vectors"].astype(np.float32)
+        self._levels = model.labels
+        self._n_clusters = [len(np.unique(labels)) for labels in model.labels]
+        return model
+
+    def _validate_graph(self, vectors: np.ndarray, neighbor_graph: NeighborGraph) -> None:
+        """k近傍グラフがクラスタリングに使えるか検証
+
+        Args:
+            vectors: 特徴ベクトル（N x D）
+            neighbor_graph: k近傍グラフ
+
+        Raises:
+            ValueError: ノード数がvectorsと異なる、近傍数がmin_samples未満、
+                または距離メトリックがeuclideanでない場合
+        """
+        if neighbor_graph.size != len(vectors):
+            raise ValueError(f"kNN graph has {neighbor_graph.size} nodes, expected {len(vectors)}")
+        if neighbor_graph.n_neighbors < self._min_samples:
+            raise ValueError(
+                f"kNN graph has {neighbor_graph.n_neighbors} neighbors per node, "
+                f"min_samples={self._min_samples} requires at least as many"
+            )
+        if self._metric != "euclidean":
+            raise ValueError(f"kNN graph requires the euclidean metric, got {self._metric}")
+
+    def _single_linkage_tree(
+        self, vectors: np.ndarray, neighbor_graph: Optional[NeighborGraph] = None
+    ) -> np.ndarray:
+        """単連結木を取得（キャッシュにあれば読み込み、なければ構築して保存）
+
+        Args:
+            vectors: 特徴ベクトル（N x D）
+            neighbor_graph: k近傍グラフ（Noneの場合は全ての組の距離を使う）
+
+        Returns:
+            単連結木（scipyのlinkage形式）
+        """
+        if self._hierarchy_cache is None:
+            single_linkage_tree, _ = self._build_trees(vectors, neighbor_graph)
+            return single_linkage_tree
+
+        params = {"min_samples": self._min_samples, "metric": self._metric}
+        if neighbor_graph is not None:
+            params["knn_graph"] = neighbor_graph.n_neighbors
+        key = HierarchyCache.key(vectors, params)
+        trees = self._hierarchy_cache.load(key)
+        if trees is not None:
+            print("Reused HDBSCAN hierarchy from cache")
+            return trees[0]
+
+        single_linkage_tree, minimum_spanning_tree = self._build_trees(vectors, neighbor_graph)
+        path = self._hierarchy_cache.save(key, single_linkage_tree, minimum_spanning_tree)
+        print(f"Saved HDBSCAN hierarchy to {path}")
+        return single_linkage_tree
+
+    def _build_trees(
+        self, vectors: np.ndarray, neighbor_graph: Optional[NeighborGraph] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """HDBSCANで相互到達距離の最小全域木と単連結木を構築
+
+        Args:
+            vectors: 特徴ベクトル（N x D）
+            neighbor_graph: k近傍グラフ（指定した場合はグラフの辺だけで構築する）
+
+        Returns:
+            (単連結木, 最小全域木)
+        """
+        if neighbor_graph is not None:
+            return mutual_reachability_trees(neighbor_graph, vectors, self._min_samples)
+
+        # hdbscanの読み込みは重いため、クラスタリングを実行する時点で読み込む
+        from hdbscan import HDBSCAN
+
+        model = HDBSCAN(
+            min_cluster_size=self._min_cluster_sizes[0],
+            min_samples=self._min_samples,
+            cluster_selection_epsilon=self._cluster_selection_epsilon,
+            metric=self._metric,
+            gen_min_span_tree=True,
+        )
+        model.fit(vectors)
+        return (
+            model.single_linkage_tree_.to_numpy(),
+            model.minimum_spanning_tree_.to_numpy(),
+        )
+
+    def _extract_labels(self, single_linkage_tree: np.ndarray, min_cluster_size: int) -> np.ndarray:
+        """単連結木から1レベル分のクラスタを選択
+
+        Args:
+            single_linkage_tree: 単連結木（scipyのlinkage形式）
+            min_cluster_size: クラスタとみなす最小サンプル数
+
+        Returns:
+            クラスタラベル（ノイズは-1）
+        """
+        return select_clusters(
+            single_linkage_tree,
+            min_cluster_size,
+            cluster_selection_epsilon=self._cluster_selection_epsilon,
+        )
+
+    def get_n_levels(self) -> int:
+        """レベル数を取得
+
+        Returns:
+            レベル数
+        """
+        return len(self._min_cluster_sizes)
+
+    def get_n_clusters(self) -> List[int]:
+        """レベルごとのクラスタ数を取得
+
+        Returns:
+            クラスタ数のリスト（細かい順、fit_predict_levels実行後の値）
+        """
+        return list(self._n_clusters)
@@ -0,0 +1,152 @@
+"""HDBSCANのノイズポイントの再割り当て
+
+距離はノイズ点をブロックに分けて行列積で計算するため（blocked_search）、
+ノイズ数 x クラスタ数 x 次元数 の配列は作らない
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.infrastructure.ml.neighbors.blocked_search import DEFAULT_BLOCK_SIZE, nearest_neighbors
+
+# 再割り当ての方法
+#   centroid: 最も近いクラスタ中心
+#   core: クラスタに属する点のうち最も近い点のクラスタ
+#   knn: クラスタに属する点のうち近いk点の多数決（同数の場合は最も近い点のクラスタ）
+REASSIGNMENT_METHODS = ("centroid", "core", "knn")
+
+
+def reassign_noise(
+    vectors: np.ndarray,
+    labels: np.ndarray,
+    method: str = "centroid",
+    n_neighbors: int = 5,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    neighbor_indices: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """ノイズポイントをクラスタに再割り当て
+
+    k近傍グラフの近傍（neighbor_indices）を指定した場合、core / knnでは各ノイズ点の
+    近傍のうちクラスタに属する点を近い順に使い、そのような近傍がない点だけを
+    総当たりで探索する
+
+    Args:
+        vectors: 特徴ベクトル（N x D）
+        labels: クラスタラベル（ノイズは-1）
+        method: 再割り当ての方法（centroid / core / knn）
+        n_neighbors: knnで投票する近傍点の数
+        block_size: 一度に計算する距離の要素数の上限
+        neighbor_indices: k近傍グラフの近傍の行番号（N x k、近い順、空きは-1）
+
+    Returns:
+        再割り当て後のラベル（入力のラベルは変更しない）
+
+    Raises:
+        ValueError: 未知の方法、またはn_neighbors・block_sizeが1未満の場合
+    """
+    if method not in REASSIGNMENT_METHODS:
+        raise ValueError(
+            f"Unknown noise reassignment method: {method}. Available: {REASSIGNMENT_METHODS}"
+        )
+    if n_neighbors < 1:
+        raise ValueError(f"n_neighbors must be at least 1, got {n_neighbors}")
+    if block_size < 1:
+        raise ValueError(f"block_size must be at least 1, got {block_size}")
+
+    noise_mask = labels == -1
+    if not noise_mask.any():
+        return labels
+
+    clustered_mask = ~noise_mask
+    if not clustered_mask.any():
+        # 全てノイズの場合は全て0に割り当て
+        return np.zeros_like(labels)
+
+    labels = labels.copy()
+    noise_vectors = vectors[noise_mask]
+    if method == "centroid":
+        unique_labels, centroids = cluster_centroids(vectors, labels)
+        nearest, _ = nearest_neighbors(noise_vectors, centroids, 1, block_size)
+        labels[noise_mask] = unique_labels[nearest[:, 0]]
+    else:
+        noise_rows = np.flatnonzero(noise_mask)
+        k = 1 if method == "core" else n_neighbors
+        unresolved = np.ones(len(noise_rows), dtype=bool)
+        if neighbor_indices is not None:
+            graph_labels = _graph_neighbor_labels(labels, neighbor_indices[noise_rows], k)
+            unresolved = graph_labels[:, 0] < 0
+            resolved = ~unresolved
+            labels[noise_rows[resolved]] = _vote(graph_labels[resolved])
+
+        if unresolved.any():
+            member_labels = labels[clustered_mask]
+            nearest, _ = nearest_neighbors(
+                vectors[noise_rows[unresolved]],
+                vectors[clustered_mask],
+                min(k, len(member_labels)),
+                block_size,
+            )
+            labels[noise_rows[unresolved]] = _vote(member_labels[nearest])
+    return labels
+
+
+def cluster_centroids(vectors: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """クラスタ中心を1回の集約で計算（ノイズは除く）
+
+    ラベル順に並べ替えた行をクラスタごとの区間として足し合わせるため、
+    クラスタ数に比例してデータを走査し直すことはない
+
+    Args:
+        vectors: 特徴ベクトル（N x D）
+        labels: クラスタラベル（ノイズは-1）
+
+    Returns:
+        (クラスタラベル（昇順）, クラスタ中心（K x D、vectorsと同じ型）)
+    """
+    member_indices = np.flatnonzero(labels >= 0)
+    order = member_indices[np.argsort(labels[member_indices], kind="stable")]
+    sorted_labels = labels[order]
+
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_labels)])
+    sums = np.add.reduceat(vectors[order], starts, axis=0, dtype=np.float64)
+    centroids = (sums / counts[:, np.newaxis]).astype(vectors.dtype, copy=False)
+    return sorted_labels[starts], centroids
+
+
+def _graph_neighbor_labels(labels: np.ndarray, neighbors: np.ndarray, k: int) -> np.ndarray:
+    """k近傍グラフの近傍のうちクラスタに属する点のラベルを近い順にk個まで取り出す
+
+    Args:
+        labels: クラスタラベル（ノイズは-1）
+        neighbors: ノイズ点の近傍の行番号（Q x グラフの近傍数、近い順、空きは-1）
+        k: 取り出す数
+
+    Returns:
+        近傍点のラベル（Q x min(k, グラフの近傍数)、足りない分は-1）
+    """
+    neighbor_labels = np.where(neighbors >= 0, labels[neighbors], -1)
+    # クラスタに属する近傍を前に詰める（安定ソートのため近い順は保たれる）
+    order = np.argsort(neighbor_labels < 0, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(neighbor_labels, order, axis=1)
+
+
+def _vote(neighbor_labels: np.ndarray) -> np.ndarray:
+    """近傍点のラベルの多数決（同数の場合は最も近い点のラベル）
+
+    Args:
+        neighbor_labels: 近傍点のラベル（Q x k、近い順、-1は投票しない）
+
+    Returns:
+        各クエリのラベル（Q個）
+    """
+    if neighbor_labels.shape[1] == 1:
+        return neighbor_labels[:, 0]
+
+    # 各近傍点のラベルが近傍内に何回現れるか（k x k の比較、kは小さい）
+    votes = (neighbor_labels[:, :, np.newaxis] == neighbor_labels[:, np.newaxis, :]).sum(axis=2)
+    votes[neighbor_labels < 0] = 0
+    # argmaxは最初の最大値を返すため、同数の場合は近い点が優先される
+    winners = votes.argmax(axis=1)
+    return neighbor_labels[np.arange(len(neighbor_labels)), winners]
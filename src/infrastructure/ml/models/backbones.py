@@ -0,0 +1,312 @@
+"""特徴抽出に使うバックボーンのレジストリ
+
+torch / torchvisionはモデルを構築する時点で読み込むため、
+このモジュールの読み込み自体は軽量（CLIの選択肢の列挙などに使える）
+
+学習済み重みは、torchvisionの重み（初回はダウンロード）から読み込むか、
+ローカルの重みディレクトリに保存した分類層なしのチェックポイント
+（<weights_dir>/<モデル名>.pt）から読み込む。チェックポイントはメモリマップで読み込み、
+モジュールは重みの初期化を行わないmetaデバイス上で構築するため、ネットワーク不要で高速
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import torch
+
+# ImageNetの平均・標準偏差（正規化用）
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class BackboneSpec:
+    """バックボーンの定義（出力次元・前処理・構築方法）
+
+    Attributes:
+        name: モデル名（--modelで指定する名前）
+        dimension: 特徴ベクトルの次元数
+        gflops: 224x224入力1枚あたりの概算演算量（GFLOPs、選択の目安）
+        resize_size: 前処理で短辺を合わせるサイズ
+        crop_size: 前処理で中央から切り出すサイズ
+        interpolation: リサイズの補間方法（"bilinear" / "bicubic"）
+        mean: 正規化の平均
+        std: 正規化の標準偏差
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dimension: int,
+        gflops: float,
+        build: Callable[[bool], "torch.nn.Module"],
+        resize_size: int = 256,
+        crop_size: int = 224,
+        interpolation: str = "bilinear",
+        mean: Tuple[float, float, float] = IMAGENET_MEAN,
+        std: Tuple[float, float, float] = IMAGENET_STD,
+    ) -> None:
+        """バックボーンの定義を初期化
+
+        Args:
+            name: モデル名
+            dimension: 特徴ベクトルの次元数
+            gflops: 1枚あたりの概算演算量（GFLOPs）
+            build: 特徴抽出モジュールを返す関数（引数がTrueの場合はtorchvisionの
+                学習済み重みを読み込み、Falseの場合は重みなしで構築する。
+                出力は (N, dimension) または (N, dimension, 1, 1)）
+            resize_size: 前処理で短辺を合わせるサイズ
+            crop_size: 前処理で中央から切り出すサイズ
+            interpolation: リサイズの補間方法
+            mean: 正規化の平均
+            std: 正規化の標準偏差
+        """
+        self.name = name
+        self.dimension = dimension
+        self.gflops = gflops
+        self.resize_size = resize_size
+        self.crop_size = crop_size
+        self.interpolation = interpolation
+        self.mean = mean
+        self.std = std
+        self._build = build
+
+    def checkpoint_path(self, weights_dir: Path) -> Path:
+        """重みディレクトリ内のチェックポイントのパスを取得
+
+        Args:
+            weights_dir: 重みディレクトリ
+
+        Returns:
+            チェックポイントのパス
+        """
+        return weights_dir / f"{self.name}.pt"
+
+    def weights_identity(self, weights_dir: Optional[Path] = None) -> str:
+        """使用する重みの識別子を取得（エクスポートしたモデルや埋め込みベクトルのキャッシュのキー）
+
+        チェックポイントの内容は読まず、サイズと更新時刻から求める
+
+        Args:
+            weights_dir: 重みディレクトリ（未指定時はtorchvisionの重み）
+
+        Returns:
+            識別子（torchvisionの重みでは"torchvision"）
+
+        Raises:
+            FileNotFoundError: weights_dirにチェックポイントが存在しない場合
+        """
+        if weights_dir is None:
+            return "torchvision"
+        stat = self.checkpoint_path(weights_dir).stat()
+        key = f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+        return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+    def build(self, weights_dir: Optional[Path] = None) -> "torch.nn.Module":
+        """学習済み重みを読み込んだ特徴抽出モジュールを構築
+
+        Args:
+            weights_dir: 分類層なしのチェックポイントを保存した重みディレクトリ
+                （未指定時はtorchvisionの重みを使い、キャッシュがなければダウンロードする）
+
+        Returns:
+            推論モードのモジュール
+
+        Raises:
+            FileNotFoundError: weights_dirにチェックポイントが存在しない場合
+        """
+        if weights_dir is None:
+            module = self._build(True)
+        else:
+            module = self._load_checkpoint(self.checkpoint_path(weights_dir))
+        module.eval()
+        return module
+
+    def _load_checkpoint(self, path: Path) -> "torch.nn.Module":
+        """チェックポイントから特徴抽出モジュールを構築
+
+        Args:
+            path: チェックポイントのパス
+
+        Returns:
+            重みを読み込んだモジュール
+
+        Raises:
+            FileNotFoundError: チェックポイントが存在しない場合
+        """
+        # torchを読み込む前に確認し、重みがない場合は即座に失敗させる
+        if not path.is_file():
+            raise FileNotFoundError(
+                f"Weights for {self.name} not found: {path}. Create them on a machine with "
+                f"network access: python scripts/prepare_weights.py {path.parent} "
+                f"--model {self.name}"
+            )
+
+        import torch
+
+        # metaデバイス上で構築して重みの初期化を省き、読み込んだテンソルをそのまま割り当てる
+        with torch.device("meta"):
+            module = self._build(False)
+        state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        module.load_state_dict(state_dict, assign=True)
+        return module
+
+    def save_checkpoint(self, weights_dir: Path) -> Path:
+        """torchvisionの学習済み重みから分類層なしのチェックポイントを作成
+
+        Args:
+            weights_dir: チェックポイントを保存する重みディレクトリ
+
+        Returns:
+            保存したチェックポイントのパス
+        """
+        import torch
+
+        path = self.checkpoint_path(weights_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            torch.save(self._build(True).state_dict(), temp_path)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        return path
+
+
+def _without_classifier(model: "torch.nn.Module") -> "torch.nn.Module":
+    """最終層（分類層）を取り除いたモジュールを作成"""
+    import torch
+
+    return torch.nn.Sequential(*list(model.children())[:-1])
+
+
+def _build_resnet(name: str, weights_name: str, pretrained: bool) -> "torch.nn.Module":
+    """ResNetの分類層を除いたモジュールを構築"""
+    import torchvision.models as models
+
+    weights = models.get_weight(weights_name) if pretrained else None
+    return _without_classifier(getattr(models, name)(weights=weights))
+
+
+def _build_resnet50_layer3(pretrained: bool) -> "torch.nn.Module":
+    """ResNet50をlayer3で打ち切り、平均プーリングしたモジュールを構築
+
+    layer4を省くため演算量が減り、画像の大域的な意味よりも構図や質感に近い
+    中間特徴が得られる（連写・ほぼ同じ構図のショットのグループ化に向く）
+    """
+    import torch
+    import torchvision.models as models
+
+    weights = models.ResNet50_Weights.IMAGENET1K_V2 if pretrained else None
+    model = models.resnet50(weights=weights)
+    return torch.nn.Sequential(
+        model.conv1,
+        model.bn1,
+        model.relu,
+        model.maxpool,
+        model.layer1,
+        model.layer2,
+        model.layer3,
+        torch.nn.AdaptiveAvgPool2d(1),
+    )
+
+
+def _build_features_with_pool(name: str, weights_name: str, pretrained: bool) -> "torch.nn.Module":
+    """features + avgpool 構成のモデル（MobileNetV3 / EfficientNet）から分類器を除いて構築"""
+    import torch
+    import torchvision.models as models
+
+    weights = models.get_weight(weights_name) if pretrained else None
+    model = getattr(models, name)(weights=weights)
+    return torch.nn.Sequential(model.features, model.avgpool)
+
+
+BACKBONES: Dict[str, BackboneSpec] = {
+    spec.name: spec
+    for spec in [
+        BackboneSpec(
+            name="resnet50",
+            dimension=2048,
+            gflops=4.1,
+            build=lambda pretrained: _build_resnet(
+                "resnet50", "ResNet50_Weights.IMAGENET1K_V2", pretrained
+            ),
+        ),
+        BackboneSpec(
+            name="resnet50_layer3",
+            dimension=1024,
+            gflops=3.3,
+            build=_build_resnet50_layer3,
+        ),
+        BackboneSpec(
+            name="resnet34",
+            dimension=512,
+            gflops=3.7,
+            build=lambda pretrained: _build_resnet(
+                "resnet34", "ResNet34_Weights.IMAGENET1K_V1", pretrained
+            ),
+        ),
+        BackboneSpec(
+            name="resnet18",
+            dimension=512,
+            gflops=1.8,
+            build=lambda pretrained: _build_resnet(
+                "resnet18", "ResNet18_Weights.IMAGENET1K_V1", pretrained
+            ),
+        ),
+        BackboneSpec(
+            name="efficientnet_b0",
+            dimension=1280,
+            gflops=0.39,
+            interpolation="bicubic",
+            build=lambda pretrained: _build_features_with_pool(
+                "efficientnet_b0", "EfficientNet_B0_Weights.IMAGENET1K_V1", pretrained
+            ),
+        ),
+        BackboneSpec(
+            name="mobilenet_v3_large",
+            dimension=960,
+            gflops=0.22,
+            build=lambda pretrained: _build_features_with_pool(
+                "mobilenet_v3_large", "MobileNet_V3_Large_Weights.IMAGENET1K_V1", pretrained
+            ),
+        ),
+        BackboneSpec(
+            name="mobilenet_v3_small",
+            dimension=576,
+            gflops=0.06,
+            build=lambda pretrained: _build_features_with_pool(
+                "mobilenet_v3_small", "MobileNet_V3_Small_Weights.IMAGENET1K_V1", pretrained
+            ),
+        ),
+    ]
+}
+DEFAULT_BACKBONE = "resnet50"
+
+
+def available_backbones() -> List[str]:
+    """登録されているバックボーン名の一覧を取得
+
+    Returns:
+        モデル名のリスト（登録順）
+    """
+    return list(BACKBONES)
+
+
+def get_backbone(name: str) -> BackboneSpec:
+    """バックボーンの定義を取得
+
+    Args:
+        name: モデル名
+
+    Returns:
+        バックボーンの定義
+
+    Raises:
+        ValueError: 未知のモデル名が指定された場合
+    """
+    if name not in BACKBONES:
+        raise ValueError(f"Unknown model: {name}. Available models: {available_backbones()}")
+    return BACKBONES[name]
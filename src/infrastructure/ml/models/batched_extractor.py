@@ -0,0 +1,277 @@
+"""バッチ推論を行う特徴抽出器の共通処理（前処理・バッチ分割・バッチサイズの自動決定）
+
+torchに依存しないため、推論バックエンドがtorch以外の場合
+（ONNX Runtimeなど）はtorch / torchvisionを読み込まずに済む
+"""
+
+import math
+import time
+from abc import abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from src.domain.services.feature_extraction_service import FeatureExtractionService
+from src.infrastructure.ml.models.backbones import BackboneSpec
+
+
+class BatchedFeatureExtractor(FeatureExtractionService):
+    """バックボーンの定義に従って前処理し、バッチ単位でモデルを実行する特徴抽出器の基底クラス
+
+    前処理（短辺のリサイズ → 中央クロップ）はtorchvisionの
+    Resize + CenterCropと同じ計算をPILで行う。
+    サブクラスは正規化済みのNCHW入力を受け取る_run_modelを実装する
+    """
+
+    # バッチサイズ自動決定時に計測する候補（小さい順）
+    AUTO_BATCH_SIZE_CANDIDATES = (1, 8, 16, 32, 64)
+    # 次の候補に進む条件（1枚あたりの処理時間がこの割合以上短縮された場合）
+    AUTO_BATCH_SIZE_MIN_GAIN = 0.1
+
+    INTERPOLATIONS = {
+        "bilinear": Image.Resampling.BILINEAR,
+        "bicubic": Image.Resampling.BICUBIC,
+    }
+
+    def __init__(self, spec: BackboneSpec, batch_size: Optional[int] = None) -> None:
+        """特徴抽出器を初期化
+
+        Args:
+            spec: バックボーンの定義
+            batch_size: 1回の推論でまとめて処理する画像数
+                （未指定時は初回の推論前に計測して自動決定）
+
+        Raises:
+            ValueError: batch_sizeが1未満の場合
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        self._spec = spec
+        self._batch_size = batch_size
+        self._mean = np.array(spec.mean, dtype=np.float32)
+        self._std = np.array(spec.std, dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        """特徴ベクトルの次元数"""
+        return self._spec.dimension
+
+    @property
+    def engine_settings(self) -> Dict[str, Any]:
+        """推論の設定（最適化しない場合はfp32のみ）"""
+        return {"precision": "fp32"}
+
+    def extract(self, image_path: Path) -> np.ndarray:
+        """画像から特徴ベクトルを抽出
+
+        Args:
+            image_path: 画像ファイルのパス
+
+        Returns:
+            特徴ベクトル（1次元numpy配列）
+
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        return self.extract_inputs(self.load_input(image_path)[np.newaxis])[0]
+
+    def extract_batch(self, image_paths: List[Path]) -> np.ndarray:
+        """複数の画像からまとめて特徴ベクトルを抽出
+
+        Args:
+            image_paths: 画像ファイルのパスのリスト
+
+        Returns:
+            特徴ベクトル（画像数 x 次元数 のnumpy配列）
+
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        if not image_paths:
+            return np.empty((0, self._spec.dimension), dtype=np.float32)
+        return self.extract_inputs(np.stack([self.load_input(path) for path in image_paths]))
+
+    def extract_array(self, image: np.ndarray) -> np.ndarray:
+        """メモリ上のRGB画像から特徴ベクトルを抽出
+
+        Args:
+            image: RGB画素（H x W x 3 のuint8配列）
+
+        Returns:
+            特徴ベクトル（1次元numpy配列）
+        """
+        return self.extract_inputs(self.prepare_input(image)[np.newaxis])[0]
+
+    def load_input(self, image_path: Path) -> np.ndarray:
+        """画像ファイルを読み込み、crop_size x crop_sizeのクロップを作成
+
+        スレッドセーフであり、複数のスレッドから並行して呼び出せる
+
+        Args:
+            image_path: 画像ファイルのパス
+
+        Returns:
+            クロップ（crop_size x crop_size x 3 のuint8配列）
+
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        if not image_path.exists():
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+
+        with Image.open(image_path) as image:
+            if image.format == "JPEG":
+                # 短辺がresize_sizeを下回らない範囲で縮小率を上げ、DCT段階で縮小してデコード
+                # （短辺がresize_sizeの2倍以上ある画像で効果がある）
+                width, height = image.size
+                scale = self._spec.resize_size / min(width, height)
+                image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+            return self._transform(image.convert("RGB"))
+
+    def prepare_input(self, image: np.ndarray) -> np.ndarray:
+        """メモリ上のRGB画像からcrop_size x crop_sizeのクロップを作成
+
+        Args:
+            image: RGB画素（H x W x 3 のuint8配列）
+
+        Returns:
+            クロップ（crop_size x crop_size x 3 のuint8配列）
+        """
+        return self._transform(Image.fromarray(image))
+
+    def _transform(self, image: Image.Image) -> np.ndarray:
+        """短辺をresize_sizeに合わせて縮小し、中央をcrop_sizeで切り出す
+
+        torchvisionのResize(resize_size) + CenterCrop(crop_size)と同じ結果になる
+
+        Args:
+            image: RGB画像
+
+        Returns:
+            クロップ（crop_size x crop_size x 3 のuint8配列）
+        """
+        width, height = image.size
+        short, long = (width, height) if width <= height else (height, width)
+        new_short, new_long = self._spec.resize_size, int(self._spec.resize_size * long / short)
+        size = (new_short, new_long) if width <= height else (new_long, new_short)
+        if size != image.size:
+            image = image.resize(size, self.INTERPOLATIONS[self._spec.interpolation])
+
+        crop = self._spec.crop_size
+        left = int(round((size[0] - crop) / 2.0))
+        top = int(round((size[1] - crop) / 2.0))
+        return np.asarray(image.crop((left, top, left + crop, top + crop)))
+
+    def extract_inputs(self, inputs: np.ndarray) -> np.ndarray:
+        """クロップを正規化して特徴ベクトルを抽出（get_batch_size枚ずつ推論）
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+
+        Returns:
+            特徴ベクトル（N x 次元数 のnumpy配列）
+        """
+        batch_size = self.get_batch_size()
+        features = [
+            self._run_model(inputs[start : start + batch_size])
+            for start in range(0, len(inputs), batch_size)
+        ]
+        if not features:
+            return np.empty((0, self._spec.dimension), dtype=np.float32)
+        return np.concatenate(features)
+
+    def _normalize(self, inputs: np.ndarray) -> np.ndarray:
+        """クロップを正規化してNCHWに並べ替える（ToTensor + Normalize と同じ変換）
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+
+        Returns:
+            正規化した入力（N x 3 x crop_size x crop_size のfloat32配列）
+        """
+        batch = (np.asarray(inputs, dtype=np.float32) / 255.0 - self._mean) / self._std
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32)
+
+    @abstractmethod
+    def _run_model(self, inputs: np.ndarray, build_engine: bool = True) -> np.ndarray:
+        """1バッチ分のクロップを正規化してモデルを実行
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+            build_engine: 推論の最適化を適用してよいか
+                （バッチサイズの計測時にキャリブレーションが必要な場合はFalse）
+
+        Returns:
+            特徴ベクトル（N x 次元数 のnumpy配列）
+        """
+        pass
+
+    def _needs_calibration(self) -> bool:
+        """推論の最適化に実データが必要か（必要な場合、計測はダミー入力で最適化せずに行う）"""
+        return False
+
+    def get_batch_size(self) -> int:
+        """1回の推論でまとめて処理する画像数を取得
+
+        未指定の場合は初回呼び出し時に計測して決定する
+
+        Returns:
+            バッチサイズ
+        """
+        if self._batch_size is None:
+            self._batch_size = self._auto_batch_size()
+            print(f"Feature extraction batch size: {self._batch_size}")
+        return self._batch_size
+
+    def _auto_batch_size(self) -> int:
+        """ダミー入力で候補ごとの1枚あたりの処理時間を計測してバッチサイズを決定
+
+        候補を小さい順に試し、処理時間の短縮がAUTO_BATCH_SIZE_MIN_GAIN未満になった
+        時点で直前の候補を採用する
+
+        Returns:
+            バッチサイズ
+        """
+        best_size = self.AUTO_BATCH_SIZE_CANDIDATES[0]
+        best_time = None
+        build_engine = not self._needs_calibration()
+        crop_size = self._spec.crop_size
+
+        for size in self.AUTO_BATCH_SIZE_CANDIDATES:
+            inputs = np.zeros((size, crop_size, crop_size, 3), dtype=np.uint8)
+            # 1回目はメモリ確保やカーネル選択を含むため計測しない
+            self._run_model(inputs, build_engine)
+            start = time.perf_counter()
+            self._run_model(inputs, build_engine)
+            per_image = (time.perf_counter() - start) / size
+
+            min_gain = self.AUTO_BATCH_SIZE_MIN_GAIN
+            if best_time is not None and per_image > best_time * (1 - min_gain):
+                break
+            best_size, best_time = size, per_image
+
+        return best_size
+
+    def get_preprocessing_signature(self) -> Dict[str, Any]:
+        """前処理のシグネチャを取得
+
+        Returns:
+            前処理のパラメータ
+        """
+        return {
+            "resize": self._spec.resize_size,
+            "crop_size": self._spec.crop_size,
+            "interpolation": self._spec.interpolation,
+            "jpeg_draft": True,
+        }
+
+    def get_model_name(self) -> str:
+        """使用しているモデル名を取得
+
+        Returns:
+            モデル名
+        """
+        return self._spec.name
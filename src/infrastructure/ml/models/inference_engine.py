@@ -0,0 +1,269 @@
+"""CPU向けの推論最適化（量子化・メモリレイアウト・グラフ最適化）"""
+
+import copy
+import hashlib
+import os
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import torch
+
+
+class InferenceEngine:
+    """学習済みモジュールにCPU向けの最適化を適用して推論するクラス
+
+    - precision: "fp32"（そのまま）/ "bf16"（重みと入力をbfloat16に変換、
+      CPUがAVX512-BF16またはAMXに対応する場合のみ）/ "int8"（FXグラフモードの静的量子化、
+      最初の推論に渡された入力でキャリブレーションする。calibration_pathを指定した場合は
+      観測した活性化の範囲を保存し、次回以降は同じ範囲で量子化する）
+    - channels_last: 入力と重みをNHWCレイアウトにする（oneDNNの畳み込みが高速になる）
+    - compile_mode: "none" / "torchscript"（トレースしてfreeze、演算子を融合）/
+      "compile"（torch.compile）
+
+    最適化は最初の推論時に入力の形状を使って適用する
+    """
+
+    PRECISIONS = ("fp32", "bf16", "int8")
+    COMPILE_MODES = ("none", "torchscript", "compile")
+    CPUINFO_PATH = Path("/proc/cpuinfo")
+    # 量子化バックエンドの優先順（x86はPyTorch 2.0以降、qnnpackはARM向け）
+    QUANTIZATION_BACKENDS = ("x86", "qnnpack", "fbgemm")
+    # 保存するキャリブレーション状態（活性化のオブザーバー）のキーに含まれる名前
+    OBSERVER_KEY = "activation_post_process"
+
+    def __init__(
+        self,
+        precision: str = "fp32",
+        channels_last: bool = False,
+        compile_mode: str = "none",
+        calibration_path: Optional[Path] = None,
+    ) -> None:
+        """推論エンジンを初期化
+
+        Args:
+            precision: 推論精度（fp32 / bf16 / int8）
+            channels_last: channels_lastメモリレイアウトを使うか
+            compile_mode: グラフ最適化の方法（none / torchscript / compile）
+            calibration_path: int8のキャリブレーション状態の保存先
+                （未指定時は保存せず、実行ごとに最初の入力でキャリブレーションする）
+
+        Raises:
+            ValueError: 未知の精度・最適化方法が指定された場合、
+                またはtorch.compileが使えないPyTorchでcompileを指定した場合
+        """
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}. Available: {self.PRECISIONS}")
+        if compile_mode not in self.COMPILE_MODES:
+            raise ValueError(
+                f"Unknown compile mode: {compile_mode}. Available: {self.COMPILE_MODES}"
+            )
+        if compile_mode == "compile" and not hasattr(torch, "compile"):
+            raise ValueError("torch.compile requires PyTorch 2.0 or later")
+
+        if precision == "bf16" and not self.cpu_supports_bf16():
+            # ネイティブ命令のないCPUではbf16がエミュレーションになり逆に遅くなる
+            warnings.warn("This CPU has no native bf16 support, falling back to fp32")
+            precision = "fp32"
+
+        self._precision = precision
+        self._channels_last = channels_last
+        self._compile_mode = compile_mode
+        self._calibration_path = calibration_path
+
+    @property
+    def precision(self) -> str:
+        """実際に使う推論精度（bf16非対応のCPUではfp32）"""
+        return self._precision
+
+    @property
+    def needs_calibration(self) -> bool:
+        """最適化の適用に実データが必要か（int8のキャリブレーション）"""
+        return self._precision == "int8"
+
+    @property
+    def calibration_fingerprint(self) -> Optional[str]:
+        """保存したint8のキャリブレーション状態のハッシュ
+
+        int8以外、保存先が未指定、またはまだキャリブレーションしていない場合はNone
+        """
+        if self._precision != "int8" or self._calibration_path is None:
+            return None
+        try:
+            return hashlib.blake2b(self._calibration_path.read_bytes(), digest_size=8).hexdigest()
+        except OSError:
+            return None
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """最適化の設定（int8ではキャリブレーション状態のハッシュを含む）"""
+        settings: Dict[str, Any] = {
+            "precision": self._precision,
+            "channels_last": self._channels_last,
+            "compile_mode": self._compile_mode,
+        }
+        if self._precision == "int8":
+            settings["calibration"] = self.calibration_fingerprint
+        return settings
+
+    @classmethod
+    def quantization_backend(cls) -> str:
+        """このPyTorchで使える量子化バックエンド
+
+        Returns:
+            QUANTIZATION_BACKENDSのうち最初に対応しているもの
+            （どれにも対応していない場合はfbgemm）
+        """
+        engines = torch.backends.quantized.supported_engines
+        return next((name for name in cls.QUANTIZATION_BACKENDS if name in engines), "fbgemm")
+
+    @classmethod
+    def cpu_supports_bf16(cls) -> bool:
+        """CPUがbf16演算命令（AVX512-BF16 / AMX-BF16）に対応しているか
+
+        Returns:
+            対応している場合True（判定できない環境ではFalse）
+        """
+        try:
+            with open(cls.CPUINFO_PATH, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("flags"):
+                        flags = line.split()
+                        return "avx512_bf16" in flags or "amx_bf16" in flags
+        except OSError:
+            pass
+        return False
+
+    def build(self, model: torch.nn.Module, sample: torch.Tensor) -> Callable:
+        """モジュールに最適化を適用
+
+        Args:
+            model: 推論モードのfp32モジュール（変更されない）
+            sample: 入力の例（int8ではキャリブレーションデータとして使う）
+
+        Returns:
+            最適化したモジュール
+        """
+        if self._precision == "int8":
+            model = self._quantize(model, sample)
+        elif self._precision == "bf16":
+            model = copy.deepcopy(model).to(torch.bfloat16)
+
+        if self._channels_last:
+            model = model.to(memory_format=torch.channels_last)
+
+        if self._compile_mode == "torchscript":
+            with torch.no_grad():
+                traced = torch.jit.trace(model, self.prepare_input(sample))
+                model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+        elif self._compile_mode == "compile":
+            return torch.compile(model, dynamic=True)
+
+        return model
+
+    def prepare_input(self, tensor: torch.Tensor) -> torch.Tensor:
+        """入力テンソルを最適化後のモジュールに合わせて変換
+
+        Args:
+            tensor: 正規化済みのfp32入力（NCHW）
+
+        Returns:
+            変換した入力
+        """
+        if self._precision == "bf16":
+            tensor = tensor.to(torch.bfloat16)
+        if self._channels_last:
+            tensor = tensor.contiguous(memory_format=torch.channels_last)
+        return tensor
+
+    def run(self, model: Callable, tensor: torch.Tensor) -> torch.Tensor:
+        """最適化したモジュールで推論
+
+        Args:
+            model: buildで作成したモジュール
+            tensor: 正規化済みのfp32入力（NCHW）
+
+        Returns:
+            fp32の出力
+        """
+        with torch.no_grad():
+            output: torch.Tensor = model(self.prepare_input(tensor))
+        return output.float()
+
+    def _quantize(self, model: torch.nn.Module, sample: torch.Tensor) -> torch.nn.Module:
+        """FXグラフモードで静的int8量子化
+
+        畳み込み主体のバックボーンでは動的量子化（Linear層のみ対象）は効果がないため、
+        活性化も量子化する静的量子化を使う。
+        保存したキャリブレーション状態がある場合はsampleで観測せずにそれを使うため、
+        どの画像が最初に推論されても同じ量子化になる
+
+        Args:
+            model: fp32モジュール
+            sample: キャリブレーションに使う入力
+
+        Returns:
+            量子化したモジュール
+        """
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        backend = self.quantization_backend()
+        torch.backends.quantized.engine = backend
+
+        prepared = prepare_fx(
+            copy.deepcopy(model), get_default_qconfig_mapping(backend), (sample[:1],)
+        )
+        observers = self._load_calibration(backend)
+        if observers is not None:
+            prepared.load_state_dict(observers, strict=False)
+        else:
+            with torch.no_grad():
+                prepared(sample)
+            self._save_calibration(backend, prepared)
+        return convert_fx(prepared)
+
+    def _load_calibration(self, backend: str) -> Optional[Dict[str, torch.Tensor]]:
+        """保存したキャリブレーション状態を読み込み
+
+        Args:
+            backend: 現在の量子化バックエンド
+
+        Returns:
+            オブザーバーの状態（保存先が未指定、ファイルがない、読み込めない、
+            またはバックエンドが異なる場合はNone）
+        """
+        if self._calibration_path is None or not self._calibration_path.exists():
+            return None
+        try:
+            state = torch.load(self._calibration_path, map_location="cpu", weights_only=True)
+        except (OSError, RuntimeError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("backend") != backend:
+            return None
+        observers: Dict[str, torch.Tensor] = state["observers"]
+        return observers
+
+    def _save_calibration(self, backend: str, prepared: torch.nn.Module) -> None:
+        """キャリブレーションしたオブザーバーの状態を保存（重みは含めない）
+
+        書き込み途中のファイルが残らないよう、一時ファイルに書き出してから置き換える
+
+        Args:
+            backend: 量子化バックエンド
+            prepared: キャリブレーション済みのモジュール
+        """
+        if self._calibration_path is None:
+            return
+        observers = {
+            key: value for key, value in prepared.state_dict().items() if self.OBSERVER_KEY in key
+        }
+        self._calibration_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._calibration_path.with_name(
+            f"{self._calibration_path.name}.{os.getpid()}.tmp"
+        )
+        try:
+            torch.save({"backend": backend, "observers": observers}, temp_path)
+            os.replace(temp_path, self._calibration_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
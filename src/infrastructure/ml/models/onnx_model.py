@@ -0,0 +1,205 @@
+"""ONNX Runtimeによる特徴抽出
+
+推論にtorch / torchvisionを使わないため、プロセスの起動時間とメモリ使用量が小さい。
+ONNXモデルはバックボーンごとに一度だけtorchからエクスポートしてキャッシュする
+（エクスポート時のみtorchを読み込む）
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.infrastructure.ml.models.backbones import DEFAULT_BACKBONE, get_backbone
+from src.infrastructure.ml.models.batched_extractor import BatchedFeatureExtractor
+from src.infrastructure.system.resources import SystemResources
+
+
+class OnnxFeatureExtractor(BatchedFeatureExtractor):
+    """エクスポート済みのONNXモデルをONNX RuntimeのCPU実行プロバイダで実行する特徴抽出サービス
+
+    前処理と出力次元はTorchvisionFeatureExtractorと同じ（同じバックボーン定義を使う）
+    """
+
+    OPSET_VERSION = 17
+    INPUT_NAME = "input"
+    OUTPUT_NAME = "features"
+
+    def __init__(
+        self,
+        model_path: Path,
+        model_name: str = DEFAULT_BACKBONE,
+        batch_size: Optional[int] = None,
+        intra_op_threads: Optional[int] = None,
+    ) -> None:
+        """特徴抽出器を初期化
+
+        Args:
+            model_path: エクスポート済みのONNXモデルのパス
+            model_name: バックボーン名（前処理と出力次元の決定に使う）
+            batch_size: 1回の推論でまとめて処理する画像数
+                （未指定時は初回の推論前に計測して自動決定）
+            intra_op_threads: 演算内の並列スレッド数（未指定時は使用できるCPUコア数）
+
+        Raises:
+            ValueError: 未知のモデル名、batch_sizeまたはintra_op_threadsが1未満の場合
+            ImportError: onnxruntimeがインストールされていない場合
+            FileNotFoundError: ONNXモデルが存在しない場合
+        """
+        super().__init__(get_backbone(model_name), batch_size)
+        if intra_op_threads is not None and intra_op_threads < 1:
+            raise ValueError(f"intra_op_threads must be at least 1, got {intra_op_threads}")
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX model not found: {model_path}")
+
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "onnxruntime is required for the ONNX backend: pip install onnxruntime"
+            ) from e
+
+        self._intra_op_threads = intra_op_threads or SystemResources.cpu_count()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 1つのグラフを逐次実行し、各演算をintra_op_threadsで並列化する
+        # （CNNは演算間の並列性が小さいため、inter-opスレッドはオーバーサブスクリプションの原因になる）
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = self._intra_op_threads
+        options.inter_op_num_threads = 1
+
+        self._session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    @property
+    def engine_settings(self) -> Dict[str, Any]:
+        """推論の設定（埋め込みベクトルの数値に影響する）"""
+        return {"precision": "fp32", "intra_op_threads": self._intra_op_threads}
+
+    def _run_model(self, inputs: np.ndarray, build_engine: bool = True) -> np.ndarray:
+        """1バッチ分のクロップを正規化してONNXモデルを実行
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+            build_engine: 使用しない（ONNXモデルはエクスポート時に最適化済み）
+
+        Returns:
+            特徴ベクトル（N x 次元数 のnumpy配列）
+        """
+        (features,) = self._session.run(
+            [self.OUTPUT_NAME], {self.INPUT_NAME: self._normalize(inputs)}
+        )
+        # (N, 次元数, 1, 1) -> (N, 次元数) に変換
+        return features.reshape(len(inputs), -1)
+
+    @classmethod
+    def model_path(
+        cls, models_dir: Path, model_name: str, weights_dir: Optional[Path] = None
+    ) -> Path:
+        """バックボーンのONNXモデルのキャッシュパスを取得
+
+        重みが変わった場合に古いエクスポートを使わないよう、ファイル名に重みの識別子を含める
+
+        Args:
+            models_dir: ONNXモデルを保存するディレクトリ
+            model_name: バックボーン名
+            weights_dir: エクスポートに使う重みディレクトリ（未指定時はtorchvisionの重み）
+
+        Returns:
+            ONNXモデルのパス
+        """
+        weights = get_backbone(model_name).weights_identity(weights_dir)
+        return models_dir / f"{model_name}-{weights}-opset{cls.OPSET_VERSION}.onnx"
+
+    @classmethod
+    def export(cls, model_name: str, output_path: Path, weights_dir: Optional[Path] = None) -> None:
+        """バックボーン（分類層を除いたモジュール）をONNX形式でエクスポート
+
+        バッチ次元は可変とする。書き込み途中のファイルが残らないよう、
+        一時ファイルに書き出してから置き換える
+
+        Args:
+            model_name: バックボーン名
+            output_path: 出力するONNXファイルのパス
+            weights_dir: 分類層なしのチェックポイントを保存した重みディレクトリ
+                （未指定時はtorchvisionの重みを使う）
+
+        Raises:
+            ValueError: 未知のモデル名が指定された場合
+            FileNotFoundError: weights_dirにチェックポイントが存在しない場合
+        """
+        spec = get_backbone(model_name)
+        model = spec.build(weights_dir)
+
+        import torch
+
+        sample = torch.zeros(1, 3, spec.crop_size, spec.crop_size)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        try:
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    sample,
+                    str(temp_path),
+                    input_names=[cls.INPUT_NAME],
+                    output_names=[cls.OUTPUT_NAME],
+                    dynamic_axes={cls.INPUT_NAME: {0: "batch"}, cls.OUTPUT_NAME: {0: "batch"}},
+                    opset_version=cls.OPSET_VERSION,
+                    do_constant_folding=True,
+                )
+            os.replace(temp_path, output_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    @classmethod
+    def ensure_exported(
+        cls, models_dir: Path, model_name: str, weights_dir: Optional[Path] = None
+    ) -> Path:
+        """バックボーンのONNXモデルがキャッシュになければエクスポート
+
+        Args:
+            models_dir: ONNXモデルを保存するディレクトリ
+            model_name: バックボーン名
+            weights_dir: エクスポートに使う重みディレクトリ（未指定時はtorchvisionの重み）
+
+        Returns:
+            ONNXモデルのパス
+        """
+        model_path = cls.model_path(models_dir, model_name, weights_dir)
+        if not model_path.exists():
+            print(f"Exporting {model_name} to ONNX: {model_path}")
+            cls.export(model_name, model_path, weights_dir)
+        return model_path
+
+    @classmethod
+    def from_cache(
+        cls,
+        models_dir: Path,
+        model_name: str = DEFAULT_BACKBONE,
+        batch_size: Optional[int] = None,
+        intra_op_threads: Optional[int] = None,
+        weights_dir: Optional[Path] = None,
+    ) -> "OnnxFeatureExtractor":
+        """キャッシュ済みのONNXモデルで特徴抽出器を作成（なければエクスポートする）
+
+        Args:
+            models_dir: ONNXモデルを保存するディレクトリ
+            model_name: バックボーン名
+            batch_size: 1回の推論でまとめて処理する画像数
+            intra_op_threads: 演算内の並列スレッド数
+            weights_dir: エクスポートに使う重みディレクトリ（未指定時はtorchvisionの重み）
+
+        Returns:
+            特徴抽出器
+        """
+        return cls(
+            cls.ensure_exported(models_dir, model_name, weights_dir),
+            model_name=model_name,
+            batch_size=batch_size,
+            intra_op_threads=intra_op_threads,
+        )
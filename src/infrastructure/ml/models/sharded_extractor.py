@@ -0,0 +1,296 @@
+"""複数プロセスに分散した特徴抽出
+
+1プロセスのintra-opスレッドは8〜16スレッド程度で頭打ちになるため、
+スレッド数を固定したワーカープロセスを複数起動し、バッチを分割して並行に推論する
+"""
+
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.domain.services.feature_extraction_service import FeatureExtractionService
+from src.infrastructure.ml.models.backbones import get_backbone
+from src.infrastructure.ml.models.batched_extractor import BatchedFeatureExtractor
+from src.infrastructure.system.resources import SystemResources
+
+# ワーカーへのコマンド
+_COMMAND_RUN = "run"
+_COMMAND_BATCH_SIZE = "batch_size"
+
+
+def _create_extractor(
+    backend: str, extractor_kwargs: Dict[str, Any], num_threads: int
+) -> FeatureExtractionService:
+    """ワーカープロセス内で特徴抽出器を作成
+
+    Args:
+        backend: 推論バックエンド（"torch" / "onnx"）
+        extractor_kwargs: 特徴抽出器のコンストラクタ引数
+            （torchの"engine"はInferenceEngineのコンストラクタ引数の辞書で指定する）
+        num_threads: 推論に使うスレッド数
+
+    Returns:
+        特徴抽出器
+    """
+    if backend == "onnx":
+        from src.infrastructure.ml.models.onnx_model import OnnxFeatureExtractor
+
+        return OnnxFeatureExtractor(intra_op_threads=num_threads, **extractor_kwargs)
+
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from src.infrastructure.ml.models.inference_engine import InferenceEngine
+    from src.infrastructure.ml.models.torchvision_model import TorchvisionFeatureExtractor
+
+    kwargs = dict(extractor_kwargs)
+    engine_options = kwargs.pop("engine", None)
+    if engine_options:
+        kwargs["engine"] = InferenceEngine(**engine_options)
+    return TorchvisionFeatureExtractor(**kwargs)
+
+
+def _shard_worker(
+    connection: Connection,
+    backend: str,
+    extractor_kwargs: Dict[str, Any],
+    cpus: Optional[List[int]],
+    num_threads: int,
+) -> None:
+    """ワーカープロセスの本体（モデルを一度だけ読み込み、送られたバッチを推論する）
+
+    Args:
+        connection: 親プロセスとの通信路
+        backend: 推論バックエンド
+        extractor_kwargs: 特徴抽出器のコンストラクタ引数
+        cpus: 固定するCPU番号（Noneの場合は固定しない）
+        num_threads: 推論に使うスレッド数
+    """
+    # モデルを読み込む前にCPUを固定する（Linuxのファーストタッチにより、
+    # 重みと作業領域は固定したCPUのNUMAノードのメモリに確保される）
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    # OpenMP / MKLのスレッド数はライブラリの読み込み前に設定する必要がある
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = str(num_threads)
+
+    try:
+        extractor = _create_extractor(backend, extractor_kwargs, num_threads)
+        connection.send(("ready", extractor.engine_settings))
+    except Exception as e:
+        connection.send(("error", e))
+        return
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        command, payload = message
+        try:
+            if command == _COMMAND_RUN:
+                connection.send(("ok", extractor.extract_inputs(payload)))
+            elif command == _COMMAND_BATCH_SIZE:
+                connection.send(("ok", extractor.get_batch_size()))
+            else:
+                raise ValueError(f"Unknown command: {command}")
+        except Exception as e:
+            connection.send(("error", e))
+
+
+class ShardedFeatureExtractor(BatchedFeatureExtractor):
+    """ワーカープロセスに分散して推論する特徴抽出サービス
+
+    前処理（クロップの作成）は呼び出し元のプロセスで行い、
+    1バッチ（シャード数 x シャードあたりのバッチサイズ）を連続した区間に分割して
+    各ワーカーへ送り、結果を元の順序で連結する。
+    ワーカーはspawnで起動し、スレッド数を固定してモデルを一度だけ読み込む
+    （呼び出し元のプロセスはtorchを読み込まない）
+    """
+
+    PINNING_MODES = ("none", "cpu", "numa")
+
+    def __init__(
+        self,
+        model_name: str,
+        num_shards: int,
+        backend: str = "torch",
+        batch_size: Optional[int] = None,
+        weights_dir: Optional[Path] = None,
+        model_path: Optional[Path] = None,
+        precision: str = "fp32",
+        channels_last: bool = False,
+        compile_mode: str = "none",
+        threads_per_shard: Optional[int] = None,
+        pinning: str = "none",
+    ) -> None:
+        """ワーカープロセスを起動し、全てのワーカーがモデルを読み込むまで待つ
+
+        Args:
+            model_name: バックボーン名（前処理と出力次元の決定に使う）
+            num_shards: ワーカープロセス数
+            backend: 推論バックエンド（"torch" / "onnx"）
+            batch_size: シャードあたりのバッチサイズ（未指定時は最初のワーカーで計測）
+            weights_dir: torchの重みディレクトリ（未指定時はtorchvisionの重み）
+            model_path: エクスポート済みのONNXモデルのパス（onnxでは必須）
+            precision: torchの推論精度（fp32 / bf16。int8はワーカーごとに
+                キャリブレーションが異なってしまうため指定できない）
+            channels_last: torchでchannels_lastメモリレイアウトを使うか
+            compile_mode: torchのグラフ最適化の方法（none / torchscript / compile）
+            threads_per_shard: ワーカーあたりの推論スレッド数
+                （未指定時は固定したCPU数、固定しない場合は使用できるCPUコア数 / シャード数）
+            pinning: ワーカーのCPU固定（none / cpu: CPUを連続したグループに分割 /
+                numa: NUMAノードの境界で分割）
+
+        Raises:
+            ValueError: シャード数・スレッド数が1未満、未知の固定方法、int8が指定された場合、
+                またはonnxでmodel_pathが未指定の場合
+            Exception: ワーカーでの特徴抽出器の作成に失敗した場合（ワーカーの例外）
+        """
+        if num_shards < 1:
+            raise ValueError(f"num_shards must be at least 1, got {num_shards}")
+        if threads_per_shard is not None and threads_per_shard < 1:
+            raise ValueError(f"threads_per_shard must be at least 1, got {threads_per_shard}")
+        if pinning not in self.PINNING_MODES:
+            raise ValueError(f"Unknown pinning: {pinning}. Available: {self.PINNING_MODES}")
+        if precision == "int8":
+            raise ValueError("int8 precision is not supported with multiple shards")
+
+        extractor_kwargs: Dict[str, Any] = {"model_name": model_name, "batch_size": batch_size}
+        if backend == "onnx":
+            if model_path is None:
+                raise ValueError("model_path is required with the onnx backend")
+            extractor_kwargs["model_path"] = model_path
+        else:
+            extractor_kwargs["weights_dir"] = weights_dir
+            extractor_kwargs["engine"] = {
+                "precision": precision,
+                "channels_last": channels_last,
+                "compile_mode": compile_mode,
+            }
+        super().__init__(get_backbone(model_name), batch_size * num_shards if batch_size else None)
+
+        if pinning == "none":
+            cpu_groups: List[Optional[List[int]]] = [None] * num_shards
+        else:
+            by_numa = pinning == "numa"
+            cpu_groups = list(SystemResources.partition_cpus(num_shards, by_numa=by_numa))
+
+        default_threads = max(1, SystemResources.cpu_count() // num_shards)
+        context = multiprocessing.get_context("spawn")
+        self._workers: List[Tuple[Any, Connection]] = []
+        try:
+            for cpus in cpu_groups:
+                num_threads = threads_per_shard or (len(cpus) if cpus else default_threads)
+                parent_connection, child_connection = context.Pipe()
+                process = context.Process(
+                    target=_shard_worker,
+                    args=(child_connection, backend, extractor_kwargs, cpus, num_threads),
+                    daemon=True,
+                )
+                process.start()
+                child_connection.close()
+                self._workers.append((process, parent_connection))
+
+            # モデルの読み込みは各ワーカーで並行に行われる
+            settings = [self._receive(connection) for _, connection in self._workers]
+        except BaseException:
+            self.close()
+            raise
+
+        self._engine_settings = dict(settings[0], shards=num_shards)
+        print(f"Started {num_shards} feature extraction workers")
+
+    @property
+    def engine_settings(self) -> Dict[str, Any]:
+        """推論の設定（ワーカーの設定にシャード数を加えたもの）"""
+        return self._engine_settings
+
+    @property
+    def num_shards(self) -> int:
+        """ワーカープロセス数"""
+        return len(self._workers)
+
+    def get_batch_size(self) -> int:
+        """1回の推論でまとめて処理する画像数（全ワーカーの合計）を取得
+
+        シャードあたりのバッチサイズが未指定の場合は、最初のワーカーで計測して決定する
+
+        Returns:
+            バッチサイズ
+        """
+        if self._batch_size is None:
+            _, connection = self._workers[0]
+            connection.send((_COMMAND_BATCH_SIZE, None))
+            self._batch_size = self._receive(connection) * self.num_shards
+            print(f"Feature extraction batch size: {self._batch_size}")
+        return self._batch_size
+
+    def _run_model(self, inputs: np.ndarray, build_engine: bool = True) -> np.ndarray:
+        """1バッチ分のクロップを連続した区間に分割し、各ワーカーで並行に推論
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+            build_engine: 使用しない（最適化は各ワーカーで行う）
+
+        Returns:
+            特徴ベクトル（N x 次元数 のnumpy配列、inputsと同じ順序）
+        """
+        shards = [
+            (connection, shard)
+            for (_, connection), shard in zip(
+                self._workers, np.array_split(inputs, self.num_shards)
+            )
+            if len(shard) > 0
+        ]
+        for connection, shard in shards:
+            connection.send((_COMMAND_RUN, shard))
+        results = [self._receive(connection) for connection, _ in shards]
+        if not results:
+            return np.empty((0, self._spec.dimension), dtype=np.float32)
+        return np.concatenate(results)
+
+    def _receive(self, connection: Connection) -> Any:
+        """ワーカーからの応答を受け取る
+
+        Args:
+            connection: ワーカーとの通信路
+
+        Returns:
+            応答の内容
+
+        Raises:
+            RuntimeError: ワーカーが応答せずに終了した場合
+            Exception: ワーカーで発生した例外
+        """
+        try:
+            status, payload = connection.recv()
+        except EOFError:
+            raise RuntimeError("Feature extraction worker exited unexpectedly") from None
+        if status == "error":
+            raise payload
+        return payload
+
+    def close(self) -> None:
+        """ワーカープロセスを終了"""
+        for process, connection in self._workers:
+            try:
+                connection.send(None)
+            except (OSError, ValueError):
+                pass
+        for process, connection in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            connection.close()
+        self._workers = []
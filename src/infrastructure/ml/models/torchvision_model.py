@@ -0,0 +1,87 @@
+"""torchvisionの学習済みモデルによる特徴抽出"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import torch
+
+from src.infrastructure.ml.models.backbones import DEFAULT_BACKBONE, get_backbone
+from src.infrastructure.ml.models.batched_extractor import BatchedFeatureExtractor
+from src.infrastructure.ml.models.inference_engine import InferenceEngine
+
+
+class TorchvisionFeatureExtractor(BatchedFeatureExtractor):
+    """バックボーンレジストリに登録されたtorchvisionモデルで特徴抽出を行うサービス
+
+    前処理（リサイズ・クロップ）と出力次元はバックボーンの定義に従う
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_BACKBONE,
+        device: str = "cpu",
+        batch_size: Optional[int] = None,
+        engine: Optional[InferenceEngine] = None,
+        weights_dir: Optional[Path] = None,
+    ) -> None:
+        """特徴抽出器を初期化
+
+        Args:
+            model_name: バックボーン名（backbones.BACKBONESのキー）
+            device: 使用するデバイス（"cpu" or "cuda"）
+            batch_size: 1回の推論でまとめて処理する画像数
+                （未指定時は初回の推論前に計測して自動決定）
+            engine: 推論の最適化設定（未指定時はfp32のまま推論）
+            weights_dir: 分類層なしのチェックポイントを保存した重みディレクトリ
+                （未指定時はtorchvisionの重みを使う）
+
+        Raises:
+            ValueError: 未知のモデル名、またはbatch_sizeが1未満の場合
+            FileNotFoundError: weights_dirにチェックポイントが存在しない場合
+        """
+        super().__init__(get_backbone(model_name), batch_size)
+        self.device = torch.device(device)
+        self._engine = engine or InferenceEngine()
+        self._engine_model: Optional[Callable] = None
+
+        # 学習済みモデルをロード（分類層は除かれている）
+        self.model = self._spec.build(weights_dir)
+        self.model.to(self.device)
+
+    @property
+    def engine_settings(self) -> Dict[str, Any]:
+        """推論の最適化設定（埋め込みベクトルの数値に影響する）"""
+        return self._engine.settings
+
+    def _needs_calibration(self) -> bool:
+        """int8はキャリブレーションに実データが必要なため、計測は量子化前のモジュールで行う"""
+        return self._engine.needs_calibration
+
+    def _run_model(self, inputs: np.ndarray, build_engine: bool = True) -> np.ndarray:
+        """1バッチ分のクロップを正規化してモデルを実行
+
+        最適化済みのモジュールがなければ、このバッチを使って構築する
+
+        Args:
+            inputs: クロップ（N x crop_size x crop_size x 3 のuint8配列）
+            build_engine: 最適化済みのモジュールを構築してよいか
+                （Falseで未構築の場合は最適化前のモジュールで推論）
+
+        Returns:
+            特徴ベクトル（N x 次元数 のnumpy配列）
+        """
+        image_tensor = torch.from_numpy(self._normalize(inputs)).to(self.device)
+
+        # 特徴抽出
+        if self._engine_model is None and build_engine:
+            self._engine_model = self._engine.build(self.model, image_tensor)
+
+        if self._engine_model is None:
+            with torch.no_grad():
+                features = self.model(image_tensor)
+        else:
+            features = self._engine.run(self._engine_model, image_tensor)
+
+        # (N, 次元数, 1, 1) -> (N, 次元数) に変換
+        return features.flatten(1).cpu().numpy()
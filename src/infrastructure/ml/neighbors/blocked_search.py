@@ -0,0 +1,53 @@
+"""ブロック単位の総当たり近傍探索
+
+距離は ‖a‖² + ‖b‖² − 2a·b で行列積として計算し、クエリをブロックに分けて処理するため、
+作業領域はブロックサイズ（要素数）で上限が決まる
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# 距離ブロックの要素数の上限（float32で64MB）
+DEFAULT_BLOCK_SIZE = 2**24
+
+
+def nearest_neighbors(
+    queries: np.ndarray, references: np.ndarray, k: int, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """各クエリに近い参照点をk個求める（ブロックごとに距離を計算）
+
+    Args:
+        queries: クエリ（Q x D）
+        references: 参照点（M x D）
+        k: 求める近傍点の数（M以下）
+        block_size: 一度に計算する距離の要素数の上限（1ブロックは少なくとも1クエリ）
+
+    Returns:
+        (近傍点のインデックス（Q x k、近い順）, 二乗距離（Q x k、近い順）)
+    """
+    reference_norms = np.einsum("ij,ij->i", references, references)
+    rows_per_block = max(1, block_size // max(1, len(references)))
+
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    distances = np.empty((len(queries), k), dtype=np.float64)
+    for start in range(0, len(queries), rows_per_block):
+        block = queries[start : start + rows_per_block]
+        # ‖q‖² + ‖r‖² − 2q·r（行列積で計算し、丸め誤差による負の値は0にする）
+        block_distances = block @ references.T
+        block_distances *= -2
+        block_distances += reference_norms[np.newaxis, :]
+        block_distances += np.einsum("ij,ij->i", block, block)[:, np.newaxis]
+        np.maximum(block_distances, 0, out=block_distances)
+
+        if k < block_distances.shape[1]:
+            candidates = np.argpartition(block_distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(block_distances.shape[1]), block_distances.shape)
+        candidate_distances = np.take_along_axis(block_distances, candidates, axis=1)
+        ranking = np.argsort(candidate_distances, axis=1, kind="stable")
+
+        end = start + len(block)
+        indices[start:end] = np.take_along_axis(candidates, ranking, axis=1)
+        distances[start:end] = np.take_along_axis(candidate_distances, ranking, axis=1)
+    return indices, distances
@@ -0,0 +1,601 @@
+"""NN-descentによる近似k近傍グラフの構築"""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.domain.models.fingerprint import fingerprint_vectors, matching_fingerprints
+from src.domain.models.neighbor_graph import NeighborGraph
+from src.domain.services.neighbor_graph_service import NeighborGraphService
+from src.infrastructure.ml.neighbors.blocked_search import DEFAULT_BLOCK_SIZE, nearest_neighbors
+
+
+class NNDescentGraphBuilder(NeighborGraphService):
+    """NN-descentで近似k近傍グラフを構築するサービス
+
+    「近傍の近傍は近傍である可能性が高い」ことを利用し、各ノードの近傍リストに含まれる
+    ノード同士の距離だけを計算してリストを改善していく（local join）。
+    1回の反復の計算量はノード数に比例するため、総当たりのようにN²にはならない。
+    候補の生成・距離の計算・リストの更新はノードをまとめて配列演算で行う。
+
+    前回のグラフを渡した場合は、画像IDと指紋が一致するノードの近傍リストを引き継ぎ、
+    追加・変更されたノードを新しいノードとして組み込む（差分更新）。
+    ノード数がbrute_force_threshold以下の場合は総当たりで正確なグラフを作る
+    """
+
+    FORMAT_VERSION = 1
+    # 溜まった近傍候補が近傍リストの要素数のこの倍数を超えたら反映する
+    MERGE_FACTOR = 4
+
+    def __init__(
+        self,
+        n_neighbors: int = 15,
+        max_iterations: int = 10,
+        sample_rate: float = 0.5,
+        delta: float = 0.001,
+        brute_force_threshold: int = 4096,
+        random_state: int = 42,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        """k近傍グラフ構築サービスを初期化
+
+        Args:
+            n_neighbors: ノードあたりの近傍数
+            max_iterations: NN-descentの最大反復回数
+            sample_rate: 1回の反復でlocal joinに使う近傍の割合（近傍数に対する比）
+            delta: 更新された近傍の割合がこれ以下になったら反復を終了する
+            brute_force_threshold: このノード数以下では総当たりで正確なグラフを作る
+            random_state: 乱数シード
+            block_size: 一度に計算する距離の要素数の上限
+
+        Raises:
+            ValueError: n_neighbors・max_iterations・block_sizeが1未満、
+                またはsample_rateが0より大きく1以下でない場合
+        """
+        if n_neighbors < 1:
+            raise ValueError(f"n_neighbors must be at least 1, got {n_neighbors}")
+        if max_iterations < 1:
+            raise ValueError(f"max_iterations must be at least 1, got {max_iterations}")
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        if block_size < 1:
+            raise ValueError(f"block_size must be at least 1, got {block_size}")
+
+        self._n_neighbors = n_neighbors
+        self._max_iterations = max_iterations
+        self._sample_size = max(1, int(round(sample_rate * n_neighbors)))
+        self._delta = delta
+        self._brute_force_threshold = brute_force_threshold
+        self._random_state = random_state
+        self._block_size = block_size
+
+    def update(
+        self,
+        vectors: np.ndarray,
+        image_ids: List[str],
+        previous: Optional[NeighborGraph] = None,
+    ) -> NeighborGraph:
+        """k近傍グラフを構築（前回のグラフがあれば差分更新）
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+            image_ids: 各ベクトルの画像ID（N個）
+            previous: 前回のグラフ（Noneの場合は最初から構築）
+
+        Returns:
+            vectorsと同じ行順のk近傍グラフ（ベクトルが変わっていない場合はprevious）
+
+        Raises:
+            ValueError: 入力が2次元配列でない、または画像IDの数が合わない場合
+        """
+        if vectors.ndim != 2:
+            raise ValueError(f"Vectors must be 2-dimensional, got {vectors.ndim}")
+        if len(image_ids) != len(vectors):
+            raise ValueError(f"Expected {len(vectors)} image IDs, got {len(image_ids)}")
+
+        data = np.asarray(vectors, dtype=np.float32)
+        fingerprints = fingerprint_vectors(data)
+        if previous is not None and previous.n_neighbors != self._n_neighbors:
+            previous = None
+
+        if (
+            previous is not None
+            and previous.image_ids == list(image_ids)
+            and matching_fingerprints(previous.fingerprints, fingerprints).all()
+        ):
+            print(f"Reused kNN graph ({previous.size} nodes)")
+            return previous
+
+        if len(data) <= self._brute_force_threshold:
+            indices, distances = self._search_exact(data, np.arange(len(data)))
+            print(f"Built exact kNN graph ({len(data)} nodes, k={self._n_neighbors})")
+        else:
+            indices, distances = self._descent(data, image_ids, fingerprints, previous)
+
+        return NeighborGraph(
+            image_ids=image_ids,
+            indices=indices,
+            distances=np.sqrt(distances).astype(np.float32),
+            fingerprints=fingerprints,
+        )
+
+    def _search_exact(self, data: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指定した行の正確な近傍を総当たりで求める
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            rows: 近傍を求める行番号
+
+        Returns:
+            (近傍の行番号（len(rows) x k）, 二乗距離（len(rows) x k）)。
+            ノード数が足りない場合の空きは-1/inf
+        """
+        k = min(self._n_neighbors + 1, len(data))
+        indices, distances = nearest_neighbors(data[rows], data, k, self._block_size)
+
+        # 自分自身を除く（重複ベクトルで自分が先頭にない場合もあるため位置で判定）
+        is_self = indices == rows[:, np.newaxis]
+        is_self[~is_self.any(axis=1), -1] = True
+        indices = indices[~is_self].reshape(len(rows), k - 1)
+        distances = distances[~is_self].reshape(len(rows), k - 1)
+
+        padding = self._n_neighbors - (k - 1)
+        if padding > 0:
+            indices = np.pad(indices, ((0, 0), (0, padding)), constant_values=-1)
+            distances = np.pad(distances, ((0, 0), (0, padding)), constant_values=np.inf)
+        return indices, distances
+
+    def _descent(
+        self,
+        data: np.ndarray,
+        image_ids: List[str],
+        fingerprints: np.ndarray,
+        previous: Optional[NeighborGraph],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """NN-descentで近似k近傍グラフを作成
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            image_ids: 各ベクトルの画像ID
+            fingerprints: 各ベクトルの指紋
+            previous: 前回のグラフ（Noneの場合は全ノードを新しいノードとして扱う）
+
+        Returns:
+            (近傍の行番号（N x k、近い順）, 二乗距離（N x k、近い順）)
+        """
+        num_nodes, k = len(data), self._n_neighbors
+        rng = np.random.default_rng(self._random_state)
+
+        indices = np.full((num_nodes, k), -1, dtype=np.int64)
+        distances = np.full((num_nodes, k), np.inf)
+        reused_rows = np.empty(0, dtype=np.int64)
+        if previous is not None:
+            reused_rows = self._reuse_previous(
+                previous, image_ids, fingerprints, indices, distances
+            )
+        added_rows = np.setdiff1d(np.arange(num_nodes), reused_rows)
+        # 引き継いだ近傍は探索済み（old）、空いた枠のランダムな候補は未探索（new）
+        is_new = np.zeros((num_nodes, k), dtype=bool)
+
+        # 空いた枠をランダムなノードで埋める
+        missing_rows, _ = np.nonzero(indices < 0)
+        random_nodes = rng.integers(0, num_nodes, size=len(missing_rows))
+        indices, distances, is_new, _ = self._merge(
+            indices,
+            distances,
+            is_new,
+            missing_rows,
+            random_nodes,
+            self._pair_distances(data, missing_rows, random_nodes),
+        )
+        # 追加されたノードが少なければ総当たりで組み込み、多ければNN-descentに任せる
+        if len(reused_rows) > 0 and len(added_rows) <= self._brute_force_threshold:
+            indices, distances, is_new = self._insert(data, added_rows, indices, distances, is_new)
+
+        threshold = self._delta * num_nodes * k
+        for iteration in range(1, self._max_iterations + 1):
+            new_candidates, old_candidates = self._sample_candidates(indices, is_new, rng)
+            indices, distances, is_new, num_updates = self._join(
+                data, indices, distances, is_new, new_candidates, old_candidates
+            )
+            if num_updates <= threshold:
+                break
+
+        print(
+            f"Built approximate kNN graph ({num_nodes} nodes, k={k}, {len(reused_rows)} reused, "
+            f"{iteration} iterations)"
+        )
+        return indices, distances
+
+    def _reuse_previous(
+        self,
+        previous: NeighborGraph,
+        image_ids: List[str],
+        fingerprints: np.ndarray,
+        indices: np.ndarray,
+        distances: np.ndarray,
+    ) -> np.ndarray:
+        """前回のグラフから変わっていないノードの近傍リストを引き継ぐ
+
+        削除・変更されたノードへの辺は取り除く（-1/inf）
+
+        Args:
+            previous: 前回のグラフ
+            image_ids: 今回の画像ID
+            fingerprints: 今回の指紋
+            indices: 近傍の行番号（N x k、引き継いだ値を書き込む）
+            distances: 二乗距離（N x k、引き継いだ値を書き込む）
+
+        Returns:
+            引き継いだノードの行番号
+        """
+        previous_rows = {image_id: row for row, image_id in enumerate(previous.image_ids)}
+        old_rows = np.array([previous_rows.get(image_id, -1) for image_id in image_ids])
+        matched = np.flatnonzero(old_rows >= 0)
+        kept = matched[
+            matching_fingerprints(previous.fingerprints[old_rows[matched]], fingerprints[matched])
+        ]
+        if len(kept) == 0:
+            return kept
+
+        # 前回の行番号 -> 今回の行番号（引き継がないノードは-1）
+        mapping = np.full(previous.size, -1, dtype=np.int64)
+        mapping[old_rows[kept]] = kept
+
+        previous_indices = previous.indices[old_rows[kept]]
+        remapped = np.where(previous_indices >= 0, mapping[previous_indices], -1)
+        indices[kept] = remapped
+        distances[kept] = np.where(
+            remapped >= 0, previous.distances[old_rows[kept]].astype(np.float64) ** 2, np.inf
+        )
+        return kept
+
+    def _insert(
+        self,
+        data: np.ndarray,
+        rows: np.ndarray,
+        indices: np.ndarray,
+        distances: np.ndarray,
+        is_new: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """追加されたノードの近傍を総当たりで求めてグラフに組み込む
+
+        追加されたノードの近傍リストを正確な近傍にし、逆向きの辺（既存のノードから
+        追加されたノードへの辺）を近傍候補として既存のノードに渡す。
+        追加数がbrute_force_threshold以下であれば、計算量（追加数 x N）は
+        全体を構築し直すより小さい
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            rows: 追加されたノードの行番号
+            indices: 近傍の行番号（N x k）
+            distances: 二乗距離（N x k）
+            is_new: 未探索の近傍か（N x k）
+
+        Returns:
+            (近傍の行番号, 二乗距離, 未探索の近傍か)
+        """
+        exact_indices, exact_distances = self._search_exact(data, rows)
+        k = exact_indices.shape[1]
+        sources = np.repeat(rows, k)
+        targets = exact_indices.ravel()
+        found = exact_distances.ravel()
+        valid = targets >= 0
+        sources, targets, found = sources[valid], targets[valid], found[valid]
+        indices, distances, is_new, _ = self._merge(
+            indices,
+            distances,
+            is_new,
+            np.concatenate([sources, targets]),
+            np.concatenate([targets, sources]),
+            np.concatenate([found, found]),
+        )
+        return indices, distances, is_new
+
+    def _sample_candidates(
+        self, indices: np.ndarray, is_new: np.ndarray, rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """local joinの候補（近傍と逆近傍）を作成
+
+        未探索の近傍はsample_sizeまでを選んで探索済みにする
+
+        Args:
+            indices: 近傍の行番号（N x k）
+            is_new: 未探索の近傍か（N x k、選んだ近傍はFalseに更新する）
+            rng: 乱数生成器
+
+        Returns:
+            (未探索の候補（N x 2s）, 探索済みの候補（N x (k + s)）)。空きは-1
+        """
+        valid = indices >= 0
+        old_forward = np.where(valid & ~is_new, indices, -1)
+
+        keys = rng.random(indices.shape)
+        keys[~(valid & is_new)] = np.inf
+        order = np.argsort(keys, axis=1)[:, : self._sample_size]
+        sampled = np.isfinite(np.take_along_axis(keys, order, axis=1))
+        new_forward = np.where(sampled, np.take_along_axis(indices, order, axis=1), -1)
+
+        rows = np.broadcast_to(np.arange(len(indices))[:, np.newaxis], order.shape)
+        is_new[rows[sampled], order[sampled]] = False
+
+        new_candidates = np.hstack([new_forward, self._reverse(new_forward, rng)])
+        old_candidates = np.hstack([old_forward, self._reverse(old_forward, rng)])
+        return new_candidates, old_candidates
+
+    def _reverse(self, forward: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """逆近傍（自分を近傍に持つノード）をノードごとにsample_sizeまで選ぶ
+
+        Args:
+            forward: 近傍の行番号（N x w、空きは-1）
+            rng: 乱数生成器
+
+        Returns:
+            逆近傍の行番号（N x s、空きは-1）
+        """
+        num_nodes = len(forward)
+        sources = np.repeat(np.arange(num_nodes), forward.shape[1])
+        targets = forward.ravel()
+        valid = targets >= 0
+        sources, targets = sources[valid], targets[valid]
+
+        order = np.lexsort((rng.random(len(targets)), targets))
+        sources, targets = sources[order], targets[order]
+        ranks = np.arange(len(targets)) - np.searchsorted(targets, targets, side="left")
+        keep = ranks < self._sample_size
+
+        reverse = np.full((num_nodes, self._sample_size), -1, dtype=np.int64)
+        reverse[targets[keep], ranks[keep]] = sources[keep]
+        return reverse
+
+    def _join(
+        self,
+        data: np.ndarray,
+        indices: np.ndarray,
+        distances: np.ndarray,
+        is_new: np.ndarray,
+        new_candidates: np.ndarray,
+        old_candidates: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """1回の反復分のlocal joinを行い、見つかった近傍候補を近傍リストに反映
+
+        ノードをブロックに分けて処理し、溜まった候補が近傍リストの数倍を超えたら
+        その時点で反映する（候補の保持に使うメモリを抑え、以降のブロックでは
+        更新された最も遠い近傍との比較で候補を絞り込める）
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            indices: 近傍の行番号（N x k）
+            distances: 二乗距離（N x k）
+            is_new: 未探索の近傍か（N x k）
+            new_candidates: 未探索の候補（N x w1）
+            old_candidates: 探索済みの候補（N x w2）
+
+        Returns:
+            (近傍の行番号, 二乗距離, 未探索の近傍か, 新しく近傍になった候補の数)
+        """
+        num_new, num_old = new_candidates.shape[1], old_candidates.shape[1]
+        pairs_per_node = num_new * (num_new - 1) // 2 + num_new * num_old
+        nodes_per_block = max(1, self._block_size // (pairs_per_node * data.shape[1]))
+        max_pending = self.MERGE_FACTOR * indices.size
+
+        active = np.flatnonzero((new_candidates >= 0).any(axis=1))
+        pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        num_pending = 0
+        num_updates = 0
+        for start in range(0, len(active), nodes_per_block):
+            rows = active[start : start + nodes_per_block]
+            candidates = self._local_join(
+                data, new_candidates[rows], old_candidates[rows], distances[:, -1]
+            )
+            pending.append(candidates)
+            num_pending += len(candidates[0])
+            if num_pending > max_pending or start + nodes_per_block >= len(active):
+                sources, targets, found = (np.concatenate(column) for column in zip(*pending))
+                indices, distances, is_new, merged = self._merge(
+                    indices, distances, is_new, sources, targets, found
+                )
+                num_updates += merged
+                pending, num_pending = [], 0
+        return indices, distances, is_new, num_updates
+
+    def _local_join(
+        self,
+        data: np.ndarray,
+        new_candidates: np.ndarray,
+        old_candidates: np.ndarray,
+        worst_distances: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """候補同士（未探索同士、未探索と探索済み）の距離を計算
+
+        各端点の現在の最も遠い近傍より近い組だけを近傍候補として残す
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            new_candidates: ブロック内のノードの未探索の候補（B x w1）
+            old_candidates: ブロック内のノードの探索済みの候補（B x w2）
+            worst_distances: 各ノードの最も遠い近傍までの二乗距離（N個）
+
+        Returns:
+            (近傍候補を追加するノード, 追加する近傍候補, 二乗距離)
+        """
+        num_new, num_old = new_candidates.shape[1], old_candidates.shape[1]
+        new_first, new_second = np.triu_indices(num_new, 1)
+        old_first, old_second = np.meshgrid(np.arange(num_new), np.arange(num_old))
+        first = np.hstack(
+            [new_candidates[:, new_first], new_candidates[:, old_first.ravel()]]
+        ).ravel()
+        second = np.hstack(
+            [new_candidates[:, new_second], old_candidates[:, old_second.ravel()]]
+        ).ravel()
+
+        valid = (first >= 0) & (second >= 0) & (first != second)
+        # 同じ組は一度だけ計算する
+        num_nodes = len(data)
+        pair_keys = np.sort(
+            np.minimum(first[valid], second[valid]) * num_nodes
+            + np.maximum(first[valid], second[valid])
+        )
+        pair_keys = pair_keys[np.diff(pair_keys, prepend=-1) != 0]
+        first, second = pair_keys // num_nodes, pair_keys % num_nodes
+        pair_distances = self._pair_distances(data, first, second)
+
+        improves_first = pair_distances < worst_distances[first]
+        improves_second = pair_distances < worst_distances[second]
+        return (
+            np.concatenate([first[improves_first], second[improves_second]]),
+            np.concatenate([second[improves_first], first[improves_second]]),
+            np.concatenate([pair_distances[improves_first], pair_distances[improves_second]]),
+        )
+
+    def _pair_distances(
+        self, data: np.ndarray, first: np.ndarray, second: np.ndarray
+    ) -> np.ndarray:
+        """行の組ごとの二乗ユークリッド距離（組をブロックに分けて計算）
+
+        Args:
+            data: 特徴ベクトル（N x D）
+            first: 一方の行番号
+            second: もう一方の行番号
+
+        Returns:
+            二乗距離（float64）
+        """
+        pairs_per_block = max(1, self._block_size // data.shape[1])
+        result = np.empty(len(first))
+        for start in range(0, len(first), pairs_per_block):
+            end = start + pairs_per_block
+            differences = data[first[start:end]] - data[second[start:end]]
+            result[start:end] = np.einsum("ij,ij->i", differences, differences)
+        return result
+
+    def _merge(
+        self,
+        indices: np.ndarray,
+        distances: np.ndarray,
+        is_new: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        candidate_distances: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """近傍候補を近傍リストにまとめて反映
+
+        既存の近傍と重複する候補・候補同士の重複を除き、既存の近傍と合わせて
+        ノードごとに近い順にk個を残す。並べ替えは (ノード, 距離) を1つの整数にまとめた
+        キーで1回だけ行う
+
+        Args:
+            indices: 近傍の行番号（N x k）
+            distances: 二乗距離（N x k）
+            is_new: 未探索の近傍か（N x k）
+            sources: 近傍候補を追加するノード
+            targets: 追加する近傍候補
+            candidate_distances: 候補までの二乗距離
+
+        Returns:
+            (近傍の行番号, 二乗距離, 未探索の近傍か, 新しく近傍になった候補の数)
+        """
+        num_nodes, k = indices.shape
+
+        # 自分自身・既に近傍にある候補を除く
+        valid = (sources != targets) & ~(indices[sources] == targets[:, np.newaxis]).any(axis=1)
+        sources, targets = sources[valid], targets[valid]
+        candidate_distances = candidate_distances[valid]
+
+        # 候補同士の重複を除く（同じ組の距離は同じ値のため、どれを残してもよい）
+        pair_keys = sources * num_nodes + targets
+        order = np.argsort(pair_keys)
+        first = order[np.diff(pair_keys[order], prepend=-1) != 0]
+        sources, targets = sources[first], targets[first]
+        candidate_distances = candidate_distances[first]
+
+        existing_rows, existing_columns = np.nonzero(indices >= 0)
+        all_sources = np.concatenate([existing_rows, sources])
+        all_targets = np.concatenate([indices[existing_rows, existing_columns], targets])
+        all_distances = np.concatenate(
+            [distances[existing_rows, existing_columns], candidate_distances]
+        ).astype(np.float32)
+        all_new = np.concatenate(
+            [is_new[existing_rows, existing_columns], np.ones(len(sources), dtype=bool)]
+        )
+        num_existing = len(existing_rows)
+
+        # 非負のfloat32はビット列を整数とみなしても大小関係が変わらないため、
+        # 上位32ビットをノード、下位32ビットを距離にしたキーで並べ替える
+        sort_keys = (all_sources.astype(np.int64) << 32) | all_distances.view(np.uint32)
+        order = np.argsort(sort_keys)
+        sorted_sources = all_sources[order]
+        ranks = np.arange(len(order)) - np.searchsorted(sorted_sources, sorted_sources, side="left")
+        selected = ranks < k
+        keep = order[selected]
+
+        merged_indices = np.full((num_nodes, k), -1, dtype=np.int64)
+        merged_distances = np.full((num_nodes, k), np.inf)
+        merged_new = np.zeros((num_nodes, k), dtype=bool)
+        rows, columns = sorted_sources[selected], ranks[selected]
+        merged_indices[rows, columns] = all_targets[keep]
+        merged_distances[rows, columns] = all_distances[keep]
+        merged_new[rows, columns] = all_new[keep]
+        return merged_indices, merged_distances, merged_new, int((keep >= num_existing).sum())
+
+    def _settings(self) -> dict:
+        """グラフの設定（保存したグラフを再利用できるかの判定に使う）"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "n_neighbors": self._n_neighbors,
+            "metric": "euclidean",
+        }
+
+    def save(self, graph: NeighborGraph, path: Path) -> None:
+        """グラフをnpz形式で保存
+
+        書き込み途中のファイルが残らないよう、一時ファイルに書き出してから置き換える
+
+        Args:
+            graph: k近傍グラフ
+            path: 保存先のファイルパス
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(
+                    f,
+                    image_ids=np.array(graph.image_ids, dtype=str),
+                    indices=graph.indices.astype(np.int32),
+                    distances=graph.distances.astype(np.float32),
+                    fingerprints=graph.fingerprints,
+                    settings=np.array(json.dumps(self._settings(), sort_keys=True)),
+                )
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def load(self, path: Path) -> Optional[NeighborGraph]:
+        """保存されたグラフを読み込み
+
+        Args:
+            path: 保存されたファイルパス
+
+        Returns:
+            k近傍グラフ（ファイルがない、読み込めない、または設定が異なる場合はNone）
+        """
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                settings = json.loads(str(data["settings"]))
+                if settings != self._settings():
+                    return None
+                return NeighborGraph(
+                    image_ids=data["image_ids"].tolist(),
+                    indices=data["indices"].astype(np.int64),
+                    distances=data["distances"],
+                    fingerprints=data["fingerprints"],
+                )
+        except (OSError, ValueError, KeyError):
+            return None
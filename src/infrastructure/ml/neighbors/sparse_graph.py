@@ -0,0 +1,104 @@
+"""k近傍グラフからHDBSCANの階層（相互到達距離の最小全域木）を構築"""
+
+from typing import Tuple
+
+import numpy as np
+
+from src.domain.models.neighbor_graph import NeighborGraph
+from src.infrastructure.ml.clustering.hdbscan_internals import single_linkage_from_spanning_tree
+from src.infrastructure.ml.neighbors.blocked_search import DEFAULT_BLOCK_SIZE, nearest_neighbors
+
+# 距離0の辺は疎行列では辺なしとみなされるため、この値に切り上げる
+MIN_EDGE_WEIGHT = 1e-10
+
+
+def core_distances(graph: NeighborGraph, min_samples: int) -> np.ndarray:
+    """k近傍グラフからコア距離を求める
+
+    hdbscanと同じく、自分を除いてmin_samples番目に近い点までの距離とする
+    （近傍が足りないノードは最も遠い近傍までの距離）
+
+    Args:
+        graph: k近傍グラフ（近傍数がmin_samples以上）
+        min_samples: コアポイントとみなすための近傍サンプル数
+
+    Returns:
+        コア距離（N個、float64）
+    """
+    distances = graph.distances.astype(np.float64)
+    column = min(min_samples, graph.size - 1, graph.n_neighbors) - 1
+    core = distances[:, max(column, 0)].copy()
+
+    missing = ~np.isfinite(core)
+    if missing.any():
+        finite = np.where(np.isfinite(distances[missing]), distances[missing], -np.inf)
+        core[missing] = np.maximum(finite.max(axis=1), 0.0)
+    return core
+
+
+def mutual_reachability_trees(
+    graph: NeighborGraph,
+    vectors: np.ndarray,
+    min_samples: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """k近傍グラフの辺だけで相互到達距離の最小全域木と単連結木を構築
+
+    辺の重みは max(コア距離(a), コア距離(b), 距離(a, b)) とする。
+    k近傍グラフが連結でない場合は、連結成分ごとに外側の最も近い点との辺を
+    総当たりで求めて追加する（成分が1つになるまで繰り返す）。
+    辺の数はN x kのため、全ての組を扱うHDBSCANと異なり計算量はほぼNに比例する
+
+    Args:
+        graph: k近傍グラフ
+        vectors: グラフを構築した特徴ベクトル（N x D、連結成分をつなぐ辺の計算に使う）
+        min_samples: コアポイントとみなすための近傍サンプル数
+        block_size: 一度に計算する距離の要素数の上限
+
+    Returns:
+        (単連結木（scipyのlinkage形式）, 最小全域木（始点, 終点, 重み の (N-1) x 3 配列）)
+    """
+    from scipy.sparse import coo_matrix, csgraph
+
+    num_nodes = graph.size
+    core = core_distances(graph, min_samples)
+
+    sources = np.repeat(np.arange(num_nodes), graph.n_neighbors)
+    targets = graph.indices.ravel()
+    valid = targets >= 0
+    sources, targets = sources[valid], targets[valid]
+    weights = np.maximum.reduce(
+        [core[sources], core[targets], graph.distances.ravel()[valid].astype(np.float64)]
+    )
+
+    # 向きのある辺を無向にする（重複した辺は重みの大きい方、相互到達距離では同じ値）
+    matrix = coo_matrix(
+        (np.maximum(weights, MIN_EDGE_WEIGHT), (sources, targets)),
+        shape=(num_nodes, num_nodes),
+    ).tocsr()
+    matrix = matrix.maximum(matrix.T).tolil()
+
+    num_components, components = csgraph.connected_components(matrix, directed=False)
+    while num_components > 1:
+        data = np.asarray(vectors)
+        largest = np.bincount(components).argmax()
+        for component in range(num_components):
+            if component == largest:
+                continue
+            inside = np.flatnonzero(components == component)
+            outside = np.flatnonzero(components != component)
+            nearest, squared = nearest_neighbors(data[inside], data[outside], 1, block_size)
+            closest = squared[:, 0].argmin()
+            a, b = inside[closest], outside[nearest[closest, 0]]
+            weight = max(core[a], core[b], float(np.sqrt(squared[closest, 0])), MIN_EDGE_WEIGHT)
+            matrix[a, b] = weight
+            matrix[b, a] = weight
+        num_components, components = csgraph.connected_components(matrix, directed=False)
+
+    tree = csgraph.minimum_spanning_tree(matrix.tocsr()).tocoo()
+    order = np.argsort(tree.data, kind="stable")
+    minimum_spanning_tree = np.column_stack(
+        [tree.row[order], tree.col[order], tree.data[order]]
+    ).astype(np.float64)
+    single_linkage_tree = single_linkage_from_spanning_tree(minimum_spanning_tree)
+    return single_linkage_tree, minimum_spanning_tree
@@ -0,0 +1,272 @@
+"""線形射影による次元削減（PCA / ランダム射影）"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.domain.services.dimensionality_reduction_service import DimensionalityReductionService
+
+
+class ProjectionReducer(DimensionalityReductionService):
+    """L2正規化したベクトルを線形射影で低次元に変換する次元削減サービス
+
+    - "pca": 主成分分析（平均を引いて上位の主成分へ射影）
+    - "random": ガウス乱数行列によるランダム射影（学習不要で高速、距離を近似的に保つ）
+
+    高次元のままではHDBSCANの近傍探索が総当たりになり、距離の差も小さくなるため、
+    クラスタリングの前に64〜256次元程度へ削減する。
+    射影はnpz形式（平均・射影行列・学習した成分数・設定）で保存する
+    """
+
+    METHODS = ("pca", "random")
+    FORMAT_VERSION = 2
+
+    def __init__(
+        self,
+        method: str = "pca",
+        n_components: int = 128,
+        normalize: bool = True,
+        random_state: int = 42,
+    ) -> None:
+        """次元削減サービスを初期化
+
+        Args:
+            method: 射影の方法（pca / random）
+            n_components: 射影後の次元数（入力の次元数・サンプル数を上限とする）
+            normalize: 射影前にベクトルをL2正規化するか
+            random_state: ランダム射影の乱数シード
+
+        Raises:
+            ValueError: 未知の方法、またはn_componentsが1未満の場合
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown reduction method: {method}. Available: {self.METHODS}")
+        if n_components < 1:
+            raise ValueError(f"n_components must be at least 1, got {n_components}")
+
+        self._method = method
+        self._n_components = n_components
+        self._normalize = normalize
+        self._random_state = random_state
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+
+    def fit_transform(self, vectors: np.ndarray) -> np.ndarray:
+        """射影を学習してベクトルを変換
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+
+        Returns:
+            射影したベクトル（N x 出力次元数 の2次元配列）
+
+        Raises:
+            ValueError: 入力が2次元配列でない場合
+        """
+        if vectors.ndim != 2:
+            raise ValueError(f"Vectors must be 2-dimensional, got {vectors.ndim}")
+
+        data = self._prepare(vectors)
+        if self._method == "pca":
+            self._fit_pca(data)
+        else:
+            self._fit_random(data.shape[1])
+        return self.transform(vectors)
+
+    def _fit_pca(self, data: np.ndarray) -> None:
+        """主成分を求める
+
+        サンプル数が次元数より多い場合は共分散行列の固有値分解、
+        少ない場合は中心化したデータの特異値分解で求める
+
+        Args:
+            data: 正規化済みのベクトル（N x D、float64）
+        """
+        num_samples, dimension = data.shape
+        n_components = self._capped_components(dimension, num_samples)
+
+        mean = data.mean(axis=0)
+        centered = data - mean
+        if num_samples > dimension:
+            _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+            # 固有値の大きい順に並べる
+            components = eigenvectors[:, ::-1][:, :n_components]
+        else:
+            _, _, vt = np.linalg.svd(centered, full_matrices=False)
+            components = vt[:n_components].T
+
+        # 実行ごとに符号が反転しないよう、絶対値が最大の要素を正にそろえる
+        signs = np.sign(components[np.abs(components).argmax(axis=0), range(n_components)])
+        signs[signs == 0] = 1
+        self._mean = mean.astype(np.float32)
+        self._components = (components * signs).astype(np.float32)
+
+    def _capped_components(self, dimension: int, num_samples: int) -> int:
+        """学習できる成分数（PCAではサンプル数も上限になる）
+
+        Args:
+            dimension: 入力の次元数
+            num_samples: 学習に使うサンプル数
+
+        Returns:
+            成分数
+        """
+        if self._method == "pca":
+            return min(self._n_components, dimension, num_samples)
+        return min(self._n_components, dimension)
+
+    def _fit_random(self, dimension: int) -> None:
+        """ランダム射影行列を作成
+
+        Args:
+            dimension: 入力の次元数
+        """
+        n_components = min(self._n_components, dimension)
+        rng = np.random.default_rng(self._random_state)
+        self._mean = np.zeros(dimension, dtype=np.float32)
+        self._components = (
+            rng.standard_normal((dimension, n_components)) / np.sqrt(n_components)
+        ).astype(np.float32)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """学習済みの射影でベクトルを変換
+
+        Args:
+            vectors: 特徴ベクトル（N x D の2次元配列）
+
+        Returns:
+            射影したベクトル（N x 出力次元数 のfloat32配列）
+
+        Raises:
+            RuntimeError: 射影が学習・読み込みされていない場合
+            ValueError: 入力の次元数が学習時と異なる場合
+        """
+        if self._components is None or self._mean is None:
+            raise RuntimeError("Projection has not been fitted or loaded")
+        if vectors.ndim != 2 or vectors.shape[1] != self._components.shape[0]:
+            raise ValueError(
+                f"Expected vectors of dimension {self._components.shape[0]}, got {vectors.shape}"
+            )
+
+        data = self._prepare(vectors)
+        projected: np.ndarray = ((data - self._mean) @ self._components).astype(np.float32)
+        return projected
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """射影前の前処理（float64への変換とL2正規化）
+
+        Args:
+            vectors: 特徴ベクトル（N x D）
+
+        Returns:
+            前処理したベクトル（N x D、float64）
+        """
+        data = np.asarray(vectors, dtype=np.float64)
+        if self._normalize:
+            norms = np.linalg.norm(data, axis=1, keepdims=True)
+            data = data / np.maximum(norms, 1e-12)
+        return data
+
+    def get_output_dimension(self) -> int:
+        """射影後の次元数を取得
+
+        Returns:
+            次元数（学習前は指定された次元数）
+        """
+        if self._components is not None:
+            return int(self._components.shape[1])
+        return self._n_components
+
+    def _settings(self) -> dict:
+        """射影の設定（保存した射影を再利用できるかの判定に使う）"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "method": self._method,
+            "n_components": self._n_components,
+            "normalize": self._normalize,
+            "random_state": self._random_state,
+        }
+
+    def save(self, path: Path, model_name: Optional[str] = None) -> None:
+        """学習済みの射影をnpz形式で保存
+
+        書き込み途中のファイルが残らないよう、一時ファイルに書き出してから置き換える
+
+        Args:
+            path: 保存先のファイルパス
+            model_name: 射影を学習したベクトルのモデル名
+
+        Raises:
+            RuntimeError: 射影が学習されていない場合
+        """
+        if self._components is None or self._mean is None:
+            raise RuntimeError("Projection has not been fitted")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        settings = dict(self._settings(), model_name=model_name)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(
+                    f,
+                    mean=self._mean,
+                    components=self._components,
+                    fitted_components=np.array(self._components.shape[1]),
+                    settings=np.array(json.dumps(settings, sort_keys=True)),
+                )
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def load(
+        self,
+        path: Path,
+        input_dimension: int,
+        model_name: Optional[str] = None,
+        num_samples: Optional[int] = None,
+    ) -> bool:
+        """保存された射影を読み込み
+
+        学習時にサンプル数で成分数が制限されていて、現在のサンプル数ならより多くの
+        成分を学習できる場合は、学習し直すためにFalseを返す
+
+        Args:
+            path: 保存されたファイルパス
+            input_dimension: 変換するベクトルの次元数
+            model_name: 変換するベクトルのモデル名
+            num_samples: 変換するベクトルの数（未指定時は成分数を確認しない）
+
+        Returns:
+            読み込めた場合True（ファイルがない、設定・次元数・モデル名が異なる場合、
+            または現在のサンプル数で成分数を増やせる場合はFalse）
+        """
+        if not path.exists():
+            return False
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                settings = json.loads(str(data["settings"]))
+                mean = data["mean"]
+                components = data["components"]
+                fitted_components = int(data["fitted_components"])
+        except (OSError, ValueError, KeyError):
+            return False
+
+        expected = dict(self._settings(), model_name=model_name)
+        if settings != expected or components.shape != (input_dimension, fitted_components):
+            return False
+        # 画像が増えて学習時より多くの成分を学習できる場合は学習し直す
+        limit = (
+            self._capped_components(input_dimension, num_samples)
+            if num_samples is not None
+            else fitted_components
+        )
+        if fitted_components < limit:
+            return False
+
+        self._mean = mean
+        self._components = components
+        return True
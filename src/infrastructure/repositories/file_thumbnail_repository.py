@@ -16,11 +16,12 @@ class FileThumbnailRepository(ThumbnailRepository):
         Note:
             実際の保存処理はRawToJpegConverterで行われるため、
             このメソッドは存在確認のみ実施
+            （画素をメモリ上に保持しているサムネイルはファイルがなくてもよい）
 
         Args:
             thumbnail: 保存するサムネイル
         """
-        if not thumbnail.exists:
+        if thumbnail.image is None and not thumbnail.exists:
             raise ValueError(f"Thumbnail file does not exist: {thumbnail.path}")
 
     def find_all(self, directory: Path) -> List[Thumbnail]:
@@ -0,0 +1,161 @@
+"""実行環境のCPU・メモリ資源の取得"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+
+class SystemResources:
+    """利用可能なCPUコア数とメモリ量を取得するクラス"""
+
+    MEMINFO_PATH = Path("/proc/meminfo")
+    NUMA_NODE_DIR = Path("/sys/devices/system/node")
+
+    @staticmethod
+    def cpu_count() -> int:
+        """このプロセスが使用できるCPUコア数を取得
+
+        Returns:
+            CPUコア数（取得できない場合は1）
+        """
+        if hasattr(os, "sched_getaffinity"):
+            try:
+                return max(1, len(os.sched_getaffinity(0)))
+            except OSError:
+                pass
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def allowed_cpus() -> List[int]:
+        """このプロセスが使用できるCPU番号の一覧を取得
+
+        Returns:
+            CPU番号のリスト（昇順）
+        """
+        if hasattr(os, "sched_getaffinity"):
+            try:
+                return sorted(os.sched_getaffinity(0))
+            except OSError:
+                pass
+        return list(range(os.cpu_count() or 1))
+
+    @classmethod
+    def numa_nodes(cls) -> List[List[int]]:
+        """NUMAノードごとの使用できるCPU番号を取得
+
+        Returns:
+            ノードごとのCPU番号のリスト（使用できるCPUがないノードは除く）、
+            NUMA情報が取得できない環境では空のリスト
+        """
+        allowed = set(cls.allowed_cpus())
+        nodes = []
+        try:
+            node_dirs = sorted(
+                (path for path in cls.NUMA_NODE_DIR.glob("node*") if path.name[4:].isdigit()),
+                key=lambda path: int(path.name[4:]),
+            )
+            for node_dir in node_dirs:
+                cpus = cls._parse_cpu_list((node_dir / "cpulist").read_text())
+                cpus = [cpu for cpu in cpus if cpu in allowed]
+                if cpus:
+                    nodes.append(cpus)
+        except (OSError, ValueError):
+            return []
+        return nodes
+
+    @classmethod
+    def partition_cpus(cls, num_parts: int, by_numa: bool = False) -> List[List[int]]:
+        """使用できるCPUを重ならない連続したグループに分割
+
+        Args:
+            num_parts: グループ数
+            by_numa: NUMAノードの境界で分割するか（グループをノードに順に割り当て、
+                同じノードのグループでノードのCPUを分け合う。NUMA情報が取得できない
+                場合は通常の分割）
+
+        Returns:
+            グループごとのCPU番号のリスト（CPU数よりグループ数が多い場合はCPUを共有する）
+        """
+        nodes = cls.numa_nodes() if by_numa else []
+        if len(nodes) <= 1:
+            return cls._split(cls.allowed_cpus(), num_parts)
+
+        # グループiをノード i * ノード数 // グループ数 に割り当てる
+        assigned: List[List[int]] = [[] for _ in nodes]
+        for part in range(num_parts):
+            assigned[part * len(nodes) // num_parts].append(part)
+
+        groups: List[List[int]] = [[] for _ in range(num_parts)]
+        for node_cpus, parts in zip(nodes, assigned):
+            for part, cpus in zip(parts, cls._split(node_cpus, len(parts))):
+                groups[part] = cpus
+        return groups
+
+    @staticmethod
+    def _split(cpus: List[int], num_parts: int) -> List[List[int]]:
+        """CPU番号のリストをできるだけ均等な連続したグループに分割
+
+        Args:
+            cpus: CPU番号のリスト
+            num_parts: グループ数
+
+        Returns:
+            グループごとのCPU番号のリスト
+        """
+        if num_parts <= 0:
+            return []
+        if len(cpus) < num_parts:
+            return [[cpus[part % len(cpus)]] for part in range(num_parts)]
+        size, remainder = divmod(len(cpus), num_parts)
+        groups = []
+        start = 0
+        for part in range(num_parts):
+            end = start + size + (1 if part < remainder else 0)
+            groups.append(cpus[start:end])
+            start = end
+        return groups
+
+    @staticmethod
+    def _parse_cpu_list(text: str) -> List[int]:
+        """sysfsのCPUリスト（"0-3,8-11" 形式）を解釈
+
+        Args:
+            text: sysfsのcpulistの内容
+
+        Returns:
+            CPU番号のリスト
+        """
+        cpus: List[int] = []
+        for part in text.strip().split(","):
+            if not part:
+                continue
+            if "-" in part:
+                first, last = part.split("-")
+                cpus.extend(range(int(first), int(last) + 1))
+            else:
+                cpus.append(int(part))
+        return cpus
+
+    @classmethod
+    def available_memory(cls) -> Optional[int]:
+        """新たに確保できるメモリ量を取得
+
+        LinuxではMemAvailable（ページキャッシュなど解放可能な領域を含む）を使い、
+        取得できない環境では物理メモリの総量で代用する
+
+        Returns:
+            バイト数、取得できない場合はNone
+        """
+        try:
+            with open(cls.MEMINFO_PATH, "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        # 単位はkB
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+
+        try:
+            return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (AttributeError, ValueError, OSError):
+            return None
@@ -3,16 +3,29 @@
 import argparse
 from pathlib import Path
 
+from src.application.use_cases.build_neighbor_graph import BuildNeighborGraph
 from src.application.use_cases.cluster_images import ClusterImages
+from src.application.use_cases.cluster_images_multi_level import ClusterImagesMultiLevel
 from src.application.use_cases.extract_features import ExtractFeatures
 from src.application.use_cases.generate_thumbnails import GenerateThumbnails
 from src.application.use_cases.organize_raw_images import OrganizeRawImages
+from src.application.use_cases.reduce_dimensions import ReduceDimensions
 from src.application.use_cases.update_xmp_metadata import UpdateXmpMetadata
+from src.domain.services.feature_extraction_service import FeatureExtractionService
 from src.infrastructure.cache.cache_manager import CacheManager
+from src.infrastructure.cache.crop_cache import CropCache
+from src.infrastructure.cache.embedding_cache import EmbeddingCache
+from src.infrastructure.cache.hierarchy_cache import HierarchyCache
 from src.infrastructure.converters.raw_to_jpeg_converter import RawToJpegConverter
 from src.infrastructure.ml.clustering.kmeans_clusterer import KMeansClusterer
-from src.infrastructure.ml.clustering.hdbscan_clusterer import HDBSCANClusterer
-from src.infrastructure.ml.models.resnet_model import ResNet50FeatureExtractor
+from src.infrastructure.ml.clustering.multi_level_hdbscan_clusterer import (
+    MultiLevelHDBSCANClusterer,
+)
+from src.infrastructure.ml.models.backbones import get_backbone
+from src.infrastructure.ml.models.onnx_model import OnnxFeatureExtractor
+from src.infrastructure.ml.models.sharded_extractor import ShardedFeatureExtractor
+from src.infrastructure.ml.neighbors.nn_descent import NNDescentGraphBuilder
+from src.infrastructure.ml.reduction.projection_reducer import ProjectionReducer
 from src.infrastructure.repositories.file_raw_image_repository import (
     FileRawImageRepository,
 )
@@ -78,11 +91,48 @@ class OrganizeCommand:
         converter = RawToJpegConverter(
             size=config.thumbnail_size,
             cache_manager=cache_manager,
+            use_embedded_preview=config.use_embedded_preview,
+            decode_profile=config.decode_profile,
+        )
+        feature_extractor = self._create_feature_extractor(config, cache_manager)
+        crop_cache = (
+            CropCache(cache_manager.crops_dir, feature_extractor.get_preprocessing_signature())
+            if config.use_crop_cache
+            else None
+        )
+        # 埋め込みベクトルはモデルと重み・推論バックエンドと精度・前処理・サムネイル設定が
+        # 同じ場合のみ再利用する（int8ではキャリブレーション状態も同じ場合のみ）
+        engine_settings = feature_extractor.engine_settings
+        embedding_signature = {
+            "model": feature_extractor.get_model_name(),
+            "weights": get_backbone(config.model_name).weights_identity(config.weights_dir),
+            "backend": config.backend,
+            "precision": engine_settings["precision"],
+            "preprocessing": feature_extractor.get_preprocessing_signature(),
+            "thumbnail": converter.settings,
+        }
+        use_embedding_cache = config.use_embedding_cache
+        if engine_settings["precision"] == "int8":
+            embedding_signature["calibration"] = engine_settings["calibration"]
+            if use_embedding_cache and engine_settings["calibration"] is None:
+                # キャリブレーション状態はこの実行で作るため、どのキャッシュとも一致しない
+                print("int8 calibration is created in this run; embedding cache is skipped")
+                use_embedding_cache = False
+        embedding_cache = (
+            EmbeddingCache(cache_manager.embedding_cache_dir, embedding_signature)
+            if use_embedding_cache
+            else None
         )
-        feature_extractor = ResNet50FeatureExtractor(device="cpu")
 
         # クラスタリングアルゴリズムの選択
         algorithm = getattr(args, "algorithm", "hdbscan")
+        cluster_images_fine = None
+        cluster_images_coarse = None
+        cluster_images_multi_level = None
+        # 差分割り当て: 保存したモデルに新しい画像だけを割り当てる
+        incremental = getattr(args, "incremental", False)
+        refit_fraction = getattr(args, "refit_fraction", 0.1)
+        drift_threshold = getattr(args, "drift_threshold", 1.5)
 
         if algorithm == "kmeans":
             # KMeans: クラスタ数を指定
@@ -90,29 +140,81 @@ class OrganizeCommand:
             n_clusters_coarse = getattr(args, "clusters_coarse", config.num_clusters // 2)
             clusterer_fine = KMeansClusterer(n_clusters=n_clusters_fine, random_state=42)
             clusterer_coarse = KMeansClusterer(n_clusters=n_clusters_coarse, random_state=42)
+            cluster_images_fine = ClusterImages(
+                clusterer_fine,
+                cluster_repository,
+                incremental=incremental,
+                refit_fraction=refit_fraction,
+                drift_threshold=drift_threshold,
+            )
+            cluster_images_coarse = ClusterImages(
+                clusterer_coarse,
+                cluster_repository,
+                incremental=incremental,
+                refit_fraction=refit_fraction,
+                drift_threshold=drift_threshold,
+            )
         else:
             # HDBSCAN: 自動的にクラスタ数を決定
             min_cluster_size = getattr(args, "min_cluster_size", 5)
             min_samples = getattr(args, "min_samples", 3)
-            # Fine: より小さいクラスタサイズで詳細に分割
-            clusterer_fine = HDBSCANClusterer(
-                min_cluster_size=min_cluster_size,
+            cluster_levels = getattr(args, "cluster_levels", 2)
+            # 階層を一度だけ構築し、レベルごとに最小クラスタサイズを2倍にして粗く分割
+            # （階層はキャッシュに保存し、retuneコマンドで再利用する）
+            clusterer = MultiLevelHDBSCANClusterer(
+                min_cluster_sizes=MultiLevelHDBSCANClusterer.doubling_sizes(
+                    min_cluster_size, cluster_levels
+                ),
                 min_samples=min_samples,
+                cluster_selection_epsilon=getattr(args, "cluster_selection_epsilon", 0.0),
+                hierarchy_cache=HierarchyCache(cache_manager.hdbscan_trees_dir),
+                noise_assignment=getattr(args, "noise_assignment", "centroid"),
+                noise_neighbors=getattr(args, "noise_neighbors", 5),
             )
-            # Coarse: より大きいクラスタサイズで粗く分割
-            clusterer_coarse = HDBSCANClusterer(
-                min_cluster_size=min_cluster_size * 2,
-                min_samples=min_samples,
+            # k近傍グラフは埋め込みベクトルの隣に保存し、次回は差分だけ更新する
+            # （差分割り当てで済む場合は構築しない）
+            build_neighbor_graph = (
+                BuildNeighborGraph(
+                    NNDescentGraphBuilder(n_neighbors=getattr(args, "knn_neighbors", 15))
+                )
+                if getattr(args, "knn_graph", False)
+                else None
+            )
+            cluster_images_multi_level = ClusterImagesMultiLevel(
+                clusterer,
+                cluster_repository,
+                incremental=incremental,
+                refit_fraction=refit_fraction,
+                drift_threshold=drift_threshold,
+                build_neighbor_graph=build_neighbor_graph,
             )
 
         # Use Cases
         generate_thumbnails = GenerateThumbnails(
-            raw_repository, thumbnail_repository, converter
+            raw_repository,
+            thumbnail_repository,
+            converter,
+            max_workers=config.max_workers,
+            memory_budget=config.memory_budget,
+            in_memory_handoff=config.in_memory_handoff,
+            write_thumbnails=config.write_thumbnails,
+        )
+        extract_features = ExtractFeatures(
+            feature_extractor,
+            embedding_repository,
+            crop_cache=crop_cache,
+            embedding_cache=embedding_cache,
+            loader_workers=config.loader_workers,
         )
-        extract_features = ExtractFeatures(feature_extractor, embedding_repository)
-        cluster_images_fine = ClusterImages(clusterer_fine, cluster_repository)
-        cluster_images_coarse = ClusterImages(clusterer_coarse, cluster_repository)
         update_xmp = UpdateXmpMetadata(raw_repository, xmp_repository)
+        reduce_dimensions = (
+            ReduceDimensions(
+                ProjectionReducer(method=config.reduction, n_components=config.reduction_dim),
+                refit=config.refit_projection,
+            )
+            if config.reduction != "none"
+            else None
+        )
 
         # 全体ユースケース
         organize = OrganizeRawImages(
@@ -122,6 +224,9 @@ class OrganizeCommand:
             cluster_images_coarse,
             update_xmp,
             cache_manager=cache_manager,
+            streaming=config.streaming,
+            reduce_dimensions=reduce_dimensions,
+            cluster_images_multi_level=cluster_images_multi_level,
         )
 
         # 実行
@@ -136,3 +241,70 @@ class OrganizeCommand:
             ConsolePresenter.show_error(f"Failed to organize RAW images: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            if isinstance(feature_extractor, ShardedFeatureExtractor):
+                feature_extractor.close()
+
+    def _create_feature_extractor(
+        self, config: AppConfig, cache_manager: CacheManager
+    ) -> FeatureExtractionService:
+        """設定に従って特徴抽出器を作成
+
+        Args:
+            config: アプリケーション設定
+            cache_manager: キャッシュマネージャー（ONNXモデルの保存先）
+
+        Returns:
+            特徴抽出器
+        """
+        if config.extraction_shards > 1:
+            # ワーカープロセスで推論する（このプロセスではtorchを読み込まない）
+            model_path = (
+                OnnxFeatureExtractor.ensure_exported(
+                    cache_manager.onnx_models_dir, config.model_name, config.weights_dir
+                )
+                if config.backend == "onnx"
+                else None
+            )
+            return ShardedFeatureExtractor(
+                model_name=config.model_name,
+                num_shards=config.extraction_shards,
+                backend=config.backend,
+                batch_size=config.batch_size,
+                weights_dir=config.weights_dir,
+                model_path=model_path,
+                precision=config.precision,
+                channels_last=config.channels_last,
+                compile_mode=config.compile_mode,
+                threads_per_shard=config.inference_threads,
+                pinning=config.shard_pinning,
+            )
+
+        if config.backend == "onnx":
+            return OnnxFeatureExtractor.from_cache(
+                cache_manager.onnx_models_dir,
+                model_name=config.model_name,
+                batch_size=config.batch_size,
+                intra_op_threads=config.inference_threads,
+                weights_dir=config.weights_dir,
+            )
+
+        # torch / torchvisionはtorchバックエンドを使う場合のみ読み込む
+        from src.infrastructure.ml.models.inference_engine import InferenceEngine
+        from src.infrastructure.ml.models.torchvision_model import TorchvisionFeatureExtractor
+
+        # キャリブレーション状態は重みごとに保存する
+        weights = get_backbone(config.model_name).weights_identity(config.weights_dir)
+        calibration_path = cache_manager.calibration_dir / f"{config.model_name}-{weights}.pt"
+        return TorchvisionFeatureExtractor(
+            model_name=config.model_name,
+            device="cpu",
+            batch_size=config.batch_size,
+            engine=InferenceEngine(
+                precision=config.precision,
+                channels_last=config.channels_last,
+                compile_mode=config.compile_mode,
+                calibration_path=calibration_path,
+            ),
+            weights_dir=config.weights_dir,
+        )
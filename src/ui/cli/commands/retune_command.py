@@ -0,0 +1,101 @@
+"""retuneコマンド"""
+
+import argparse
+from pathlib import Path
+
+from src.application.use_cases.build_neighbor_graph import BuildNeighborGraph
+from src.application.use_cases.cluster_images_multi_level import ClusterImagesMultiLevel
+from src.application.use_cases.reduce_dimensions import ReduceDimensions
+from src.application.use_cases.update_xmp_metadata import UpdateXmpMetadata
+from src.infrastructure.cache.cache_manager import CacheManager
+from src.infrastructure.cache.hierarchy_cache import HierarchyCache
+from src.infrastructure.ml.clustering.multi_level_hdbscan_clusterer import (
+    MultiLevelHDBSCANClusterer,
+)
+from src.infrastructure.ml.neighbors.nn_descent import NNDescentGraphBuilder
+from src.infrastructure.ml.reduction.projection_reducer import ProjectionReducer
+from src.infrastructure.repositories.file_raw_image_repository import (
+    FileRawImageRepository,
+)
+from src.infrastructure.repositories.file_xmp_repository import FileXmpRepository
+from src.infrastructure.repositories.json_cluster_repository import (
+    JsonClusterRepository,
+)
+from src.infrastructure.repositories.numpy_embedding_repository import (
+    NumpyEmbeddingRepository,
+)
+from src.ui.cli.presenters.console_presenter import ConsolePresenter
+
+
+class RetuneCommand:
+    """保存済みの埋め込みベクトルとHDBSCANの階層からクラスタを選択し直すコマンド
+
+    サムネイル生成・特徴抽出は行わない。min_samplesと次元削減の設定が前回と同じであれば
+    保存した階層を読み込み、min_cluster_size・cluster_selection_epsilon・レベル数を
+    変えたクラスタの選択（とノイズポイントの再割り当て）だけを行う
+    """
+
+    def execute(self, args: argparse.Namespace) -> None:
+        """コマンドを実行
+
+        Args:
+            args: コマンドライン引数
+        """
+        target_directory = Path(args.directory).resolve()
+        if not target_directory.is_dir():
+            ConsolePresenter.show_error(f"Path is not a directory: {target_directory}")
+            return
+
+        # キャッシュディレクトリは整理コマンドと同じ
+        cache_dir = Path(args.output) if args.output else target_directory / ".cache"
+        cache_manager = CacheManager(base_dir=target_directory, cache_dir=cache_dir)
+
+        embedding_repository = NumpyEmbeddingRepository()
+        if not embedding_repository.exists(cache_dir):
+            ConsolePresenter.show_error(
+                f"No embeddings found in {cache_dir}; run raw-clusterer on the directory first"
+            )
+            return
+        embeddings = embedding_repository.load_all(cache_dir)
+        ConsolePresenter.show_info(
+            f"Loaded {len(embeddings)} feature vectors ({embeddings[0].dimension}D)"
+        )
+
+        # 階層のキーはクラスタリングしたベクトルから計算するため、前回と同じ射影を使う
+        cluster_inputs = embeddings
+        if args.reduce != "none":
+            reduce_dimensions = ReduceDimensions(
+                ProjectionReducer(method=args.reduce, n_components=args.reduce_dim)
+            )
+            cluster_inputs = reduce_dimensions.execute(embeddings, cache_dir)
+
+        clusterer = MultiLevelHDBSCANClusterer(
+            min_cluster_sizes=MultiLevelHDBSCANClusterer.doubling_sizes(
+                args.min_cluster_size, args.cluster_levels
+            ),
+            min_samples=args.min_samples,
+            cluster_selection_epsilon=args.cluster_selection_epsilon,
+            hierarchy_cache=HierarchyCache(cache_manager.hdbscan_trees_dir),
+            noise_assignment=args.noise_assignment,
+            noise_neighbors=args.noise_neighbors,
+        )
+        build_neighbor_graph = (
+            BuildNeighborGraph(NNDescentGraphBuilder(n_neighbors=args.knn_neighbors))
+            if args.knn_graph
+            else None
+        )
+        cluster_images = ClusterImagesMultiLevel(
+            clusterer, JsonClusterRepository(), build_neighbor_graph=build_neighbor_graph
+        )
+        cluster_results = cluster_images.execute(cluster_inputs, cache_dir)
+        for result in cluster_results:
+            ConsolePresenter.show_cluster_result(result)
+
+        update_xmp = UpdateXmpMetadata(FileRawImageRepository(), FileXmpRepository())
+        updated_count = update_xmp.execute(
+            target_directory, cluster_results=cluster_results, dry_run=args.dry_run
+        )
+        if args.dry_run:
+            ConsolePresenter.show_info(f"Would update {updated_count} XMP files (dry run mode)")
+        else:
+            ConsolePresenter.show_info(f"Updated {updated_count} XMP files")
@@ -2,13 +2,204 @@
 
 import argparse
 import sys
+from typing import Any, List
 
-from src.ui.cli.commands.organize_command import OrganizeCommand
+# torch・rawpy・scikit-learnなどを読み込むコマンドは引数の解析後に読み込む
+# （--helpや引数エラーを即座に返し、spawnされたワーカープロセスが
+# このモジュールを再読み込みする際にも重いライブラリを読み込まないため）
+from src.infrastructure.ml.models.backbones import BACKBONES
 from src.ui.config.app_config import AppConfig
 
 
+def _memory_size(value: str) -> int:
+    """--memory-budgetの値をバイト数に変換（argparseのtype用）"""
+    try:
+        return AppConfig.parse_memory_size(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid memory size: {value!r} (e.g. 8G, 512M)"
+        ) from None
+
+
+def _add_hdbscan_arguments(parser: argparse.ArgumentParser) -> None:
+    """HDBSCANのパラメータの引数を追加（整理コマンドとretuneで共通）"""
+    parser.add_argument(
+        "--min-cluster-size",
+        type=int,
+        default=5,
+        dest="min_cluster_size",
+        help="Minimum cluster size for HDBSCAN (default: 5, only used with hdbscan)",
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=3,
+        dest="min_samples",
+        help="Minimum samples for HDBSCAN (default: 3, only used with hdbscan)",
+    )
+    parser.add_argument(
+        "--cluster-selection-epsilon",
+        type=float,
+        default=0.0,
+        dest="cluster_selection_epsilon",
+        help="Distance below which HDBSCAN clusters are not split further (default: 0.0, "
+        "only used with hdbscan)",
+    )
+    parser.add_argument(
+        "--noise-assignment",
+        type=str,
+        default="centroid",
+        choices=AppConfig.NOISE_ASSIGNMENTS,
+        dest="noise_assignment",
+        help="How HDBSCAN noise points are assigned to clusters: centroid (nearest cluster "
+        "mean), core (cluster of the nearest clustered point) or knn (majority of the "
+        "--noise-neighbors nearest clustered points) (default: centroid)",
+    )
+    parser.add_argument(
+        "--noise-neighbors",
+        type=int,
+        default=5,
+        dest="noise_neighbors",
+        help="Neighbors voting with --noise-assignment knn (default: 5)",
+    )
+    parser.add_argument(
+        "--cluster-levels",
+        type=int,
+        default=2,
+        dest="cluster_levels",
+        help="Number of granularity levels extracted from one HDBSCAN hierarchy; level k "
+        "uses min cluster size x 2^(k-1) and nests the clusters of level k-1 "
+        "(default: 2 = fine and coarse, only used with hdbscan)",
+    )
+    parser.add_argument(
+        "--knn-graph",
+        action="store_true",
+        dest="knn_graph",
+        help="Build an approximate kNN graph (NN-descent) over the embeddings, save it as "
+        "knn_graph.npz next to them and update it incrementally on later runs; HDBSCAN "
+        "and noise reassignment then use only the graph edges, so clustering scales "
+        "near-linearly with the number of images (only used with hdbscan)",
+    )
+    parser.add_argument(
+        "--knn-neighbors",
+        type=int,
+        default=15,
+        dest="knn_neighbors",
+        help="Neighbors per image in the --knn-graph graph; must be at least --min-samples "
+        "(default: 15)",
+    )
+
+
+def _add_reduction_arguments(parser: argparse.ArgumentParser) -> None:
+    """クラスタリング前の次元削減の引数を追加（整理コマンドとretuneで共通）"""
+    parser.add_argument(
+        "--reduce",
+        type=str,
+        default="none",
+        choices=AppConfig.REDUCTION_METHODS,
+        help="Reduce embeddings before clustering: none, pca (L2 normalize + PCA) or random "
+        "(L2 normalize + Gaussian random projection); the fitted projection is saved as "
+        "projection.npz next to the embeddings and reused (default: none)",
+    )
+    parser.add_argument(
+        "--reduce-dim",
+        type=int,
+        default=AppConfig.DEFAULT_REDUCTION_DIM,
+        dest="reduce_dim",
+        help=f"Output dimension of --reduce (default: {AppConfig.DEFAULT_REDUCTION_DIM})",
+    )
+
+
+def _validate_clustering_arguments(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    """クラスタリングの引数を検証（不正な場合はparser.errorで終了）"""
+    if args.min_cluster_size < 2:
+        parser.error("--min-cluster-size must be at least 2")
+    if args.cluster_selection_epsilon < 0:
+        parser.error("--cluster-selection-epsilon must not be negative")
+    if args.noise_neighbors < 1:
+        parser.error("--noise-neighbors must be at least 1")
+    if args.cluster_levels < 1:
+        parser.error("--cluster-levels must be at least 1")
+    if args.reduce_dim < 1:
+        parser.error("--reduce-dim must be at least 1")
+    if args.knn_graph and args.knn_neighbors < max(1, args.min_samples):
+        parser.error("--knn-neighbors must be at least 1 and at least --min-samples")
+    if args.knn_graph and getattr(args, "algorithm", "hdbscan") != "hdbscan":
+        parser.error("--knn-graph is only used with --algorithm hdbscan")
+
+
+def _run_command(command: Any, args: argparse.Namespace) -> None:
+    """コマンドを実行し、中断・例外時は終了コード1で終了"""
+    try:
+        command.execute(args)
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def retune(argv: List[str]) -> None:
+    """retuneコマンド: 保存済みの埋め込みベクトルとHDBSCANの階層からクラスタを選択し直す
+
+    Args:
+        argv: retune以降のコマンドライン引数
+    """
+    parser = argparse.ArgumentParser(
+        prog="raw-clusterer retune",
+        description="Re-extract clusters with new HDBSCAN parameters from the embeddings "
+        "and the HDBSCAN hierarchy saved by a previous run (no thumbnails, no feature "
+        "extraction; the hierarchy is rebuilt only when --min-samples or --reduce changes)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # より大きなクラスタで選択し直す（XMPは書き込まずに確認）
+  %(prog)s /path/to/raw_images --min-cluster-size 10 --dry-run
+
+  # 近いクラスタをまとめて選択し直し、XMPを更新
+  %(prog)s /path/to/raw_images --cluster-selection-epsilon 0.5
+        """,
+    )
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="Directory containing RAW images"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Cache directory used by the previous run (optional, defaults to .cache in "
+        "the input directory)",
+    )
+    _add_hdbscan_arguments(parser)
+    _add_reduction_arguments(parser)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        help="Do not write XMP files, just show the new clusters",
+    )
+
+    args = parser.parse_args(argv)
+    _validate_clustering_arguments(parser, args)
+
+    from src.ui.cli.commands.retune_command import RetuneCommand
+
+    _run_command(RetuneCommand(), args)
+
+
 def main() -> None:
     """メイン関数"""
+    # サブコマンド（最初の引数がretuneの場合のみ、それ以外は従来どおり整理コマンド）
+    if len(sys.argv) > 1 and sys.argv[1] == "retune":
+        retune(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="RAW image organizer with automatic clustering",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -23,8 +214,44 @@ Examples:
   # HDBSCANのパラメータを調整
   %(prog)s /path/to/raw_images --algorithm hdbscan --min-cluster-size 10 --min-samples 5
 
+  # PCAで128次元に削減してからクラスタリング
+  %(prog)s /path/to/raw_images --reduce pca --reduce-dim 128
+
+  # 大量の画像をk近傍グラフでクラスタリング（グラフは保存して次回は差分更新）
+  %(prog)s /path/to/raw_images --reduce pca --knn-graph --knn-neighbors 15
+
+  # 前回の実行から追加された画像だけを既存のクラスタに割り当てる
+  %(prog)s /path/to/raw_images --incremental --refit-fraction 0.2
+
+  # 埋め込みプレビューから高速にサムネイルを生成
+  %(prog)s /path/to/raw_images --use-embedded-preview
+
+  # フルデコードを半分の解像度で高速に行う
+  %(prog)s /path/to/raw_images --decode-profile draft
+
+  # デコードした画素をメモリ上で特徴抽出へ渡し、サムネイルJPEGを書き出さない
+  %(prog)s /path/to/raw_images --in-memory-handoff --skip-thumbnail-files
+
+  # サムネイル生成のメモリ使用量を6GBまでに抑える
+  %(prog)s /path/to/raw_images --memory-budget 6G
+
+  # 軽量なバックボーンで高速に特徴抽出
+  %(prog)s /path/to/raw_images --model mobilenet_v3_large
+
+  # int8量子化とchannels_lastでCPU推論を高速化
+  %(prog)s /path/to/raw_images --precision int8 --channels-last --compile torchscript
+
+  # 2ソケットのマシンで特徴抽出をNUMAノードごとのワーカーに分散
+  %(prog)s /path/to/raw_images --extraction-shards 4 --pin-shards numa
+
+  # ONNX Runtimeで特徴抽出
+  %(prog)s /path/to/raw_images --backend onnx
+
   # Dry runモード（XMPを書き込まない）
   %(prog)s /path/to/raw_images --dry-run
+
+  # 保存したHDBSCANの階層からパラメータを変えてクラスタを選択し直す
+  %(prog)s retune /path/to/raw_images --min-cluster-size 10
         """,
     )
 
@@ -42,6 +269,40 @@ Examples:
         default=AppConfig.DEFAULT_THUMBNAIL_SIZE,
         help=f"Thumbnail size in pixels (default: {AppConfig.DEFAULT_THUMBNAIL_SIZE})",
     )
+    parser.add_argument(
+        "--use-embedded-preview",
+        action="store_true",
+        dest="use_embedded_preview",
+        help="Build thumbnails from the JPEG preview embedded in each RAW file "
+        "(falls back to full decoding when no large enough preview exists)",
+    )
+    parser.add_argument(
+        "--decode-profile",
+        type=str,
+        default=AppConfig.DEFAULT_DECODE_PROFILE,
+        choices=AppConfig.DECODE_PROFILES,
+        dest="decode_profile",
+        help="RAW decode profile used when a full decode is needed: draft (half-size, "
+        "linear demosaic, no auto-bright), balanced (half-size) or quality "
+        f"(full resolution) (default: {AppConfig.DEFAULT_DECODE_PROFILE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        dest="workers",
+        help="Number of thumbnail worker processes (default: derived from CPU cores "
+        "and the memory budget)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=_memory_size,
+        default=None,
+        dest="memory_budget",
+        help="RAM available to concurrent RAW decodes, e.g. 8G or 512M; decodes are "
+        "admitted by their size estimated from the RAW header "
+        "(default: 75%% of available memory)",
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -68,19 +329,90 @@ Examples:
         dest="clusters_coarse",
         help=f"Number of clusters for coarse granularity (default: {AppConfig.DEFAULT_NUM_CLUSTERS // 2}, only used with kmeans)",
     )
+    _add_hdbscan_arguments(parser)
     parser.add_argument(
-        "--min-cluster-size",
+        "--streaming",
+        action="store_true",
+        dest="streaming",
+        help="Overlap thumbnail generation and feature extraction: thumbnails are "
+        "embedded as soon as they are produced",
+    )
+    parser.add_argument(
+        "--in-memory-handoff",
+        action="store_true",
+        dest="in_memory_handoff",
+        help="Pass decoded thumbnails to the feature extractor through shared memory "
+        "instead of re-reading the JPEG files (implies --streaming)",
+    )
+    parser.add_argument(
+        "--skip-thumbnail-files",
+        action="store_true",
+        dest="skip_thumbnail_files",
+        help="Do not write thumbnail JPEG files (requires --in-memory-handoff; "
+        "thumbnails are not reused on the next run)",
+    )
+    parser.add_argument(
+        "--batch-size",
         type=int,
-        default=5,
-        dest="min_cluster_size",
-        help="Minimum cluster size for HDBSCAN (default: 5, only used with hdbscan)",
+        default=None,
+        dest="batch_size",
+        help="Number of images per feature extraction forward pass (default: "
+        "measured once at startup)",
     )
     parser.add_argument(
-        "--min-samples",
+        "--loader-workers",
         type=int,
-        default=3,
-        dest="min_samples",
-        help="Minimum samples for HDBSCAN (default: 3, only used with hdbscan)",
+        default=None,
+        dest="loader_workers",
+        help="Threads that decode and preprocess thumbnails ahead of feature "
+        "extraction (default: number of CPU cores, at most 8)",
+    )
+    parser.add_argument(
+        "--no-crop-cache",
+        action="store_true",
+        dest="no_crop_cache",
+        help="Do not cache the preprocessed model input crops (by default they are "
+        "stored in a memory-mapped file so re-extraction skips JPEG decoding)",
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        dest="no_embedding_cache",
+        help="Recompute every embedding (by default embeddings are reused for RAW "
+        "files whose content, model and preprocessing are unchanged, even if moved)",
+    )
+    _add_reduction_arguments(parser)
+    parser.add_argument(
+        "--refit-projection",
+        action="store_true",
+        dest="refit_projection",
+        help="Fit the --reduce projection again even if a saved one matches",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        dest="incremental",
+        help="Keep the cluster labels of images seen in the last fit and assign only new "
+        "images to the saved clusters (the model is saved as cluster_model.npz, or "
+        "clusters_<level>_model.npz with kmeans, on every full fit); a full fit runs "
+        "when there is no matching model or a --refit-fraction / --drift-threshold "
+        "limit is exceeded",
+    )
+    parser.add_argument(
+        "--refit-fraction",
+        type=float,
+        default=0.1,
+        dest="refit_fraction",
+        help="With --incremental, fit again when new images exceed this fraction of the "
+        "images in the saved model (default: 0.1)",
+    )
+    parser.add_argument(
+        "--drift-threshold",
+        type=float,
+        default=1.5,
+        dest="drift_threshold",
+        help="With --incremental, fit again when the mean assignment distance of the new "
+        "images exceeds this multiple of the distance seen at fit time (default: 1.5)",
     )
     parser.add_argument(
         "--dry-run",
@@ -91,25 +423,117 @@ Examples:
     parser.add_argument(
         "--model",
         type=str,
-        default="resnet50",
-        choices=["resnet50"],
-        help="Model to use for feature extraction (default: resnet50)",
+        default=AppConfig.DEFAULT_MODEL,
+        choices=list(BACKBONES),
+        help="Backbone used for feature extraction: "
+        + ", ".join(
+            f"{name} ({spec.dimension}D, ~{spec.gflops:g} GFLOPs)"
+            for name, spec in BACKBONES.items()
+        )
+        + f" (default: {AppConfig.DEFAULT_MODEL})",
+    )
+    parser.add_argument(
+        "--weights-dir",
+        type=str,
+        default=None,
+        dest="weights_dir",
+        help="Directory with stripped backbone checkpoints (<model>.pt) created by "
+        "scripts/prepare_weights.py; models are loaded offline and memory-mapped, and "
+        f"a missing checkpoint is an error (default: ${AppConfig.WEIGHTS_DIR_ENV}, "
+        "otherwise torchvision weights are downloaded if not cached)",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="torch",
+        choices=AppConfig.BACKENDS,
+        help="Inference backend for feature extraction: torch, or onnx (ONNX Runtime; "
+        "the backbone is exported once and cached, requires onnxruntime) (default: torch)",
+    )
+    parser.add_argument(
+        "--inference-threads",
+        type=int,
+        default=None,
+        dest="inference_threads",
+        help="Threads used inside each inference operator with --backend onnx, or "
+        "threads per worker with --extraction-shards (default: available CPU cores, "
+        "divided among the workers or set to the pinned CPUs)",
+    )
+    parser.add_argument(
+        "--extraction-shards",
+        type=int,
+        default=1,
+        dest="extraction_shards",
+        help="Run feature extraction in N worker processes, each loading the model once "
+        "and processing a slice of every batch (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--pin-shards",
+        type=str,
+        default="none",
+        choices=AppConfig.SHARD_PINNING_MODES,
+        dest="pin_shards",
+        help="Pin extraction workers to disjoint CPU sets: none, cpu (contiguous CPU "
+        "blocks) or numa (split along NUMA nodes) (default: none)",
+    )
+    parser.add_argument(
+        "--precision",
+        type=str,
+        default="fp32",
+        choices=AppConfig.PRECISIONS,
+        help="Inference precision for feature extraction: fp32, bf16 (CPUs with "
+        "AVX512-BF16/AMX only, otherwise falls back to fp32) or int8 (static "
+        "quantization calibrated on the first batch once and reused from the cache, "
+        "single extraction process only) (default: fp32)",
+    )
+    parser.add_argument(
+        "--channels-last",
+        action="store_true",
+        dest="channels_last",
+        help="Run feature extraction in channels_last (NHWC) memory format",
+    )
+    parser.add_argument(
+        "--compile",
+        type=str,
+        default="none",
+        choices=AppConfig.COMPILE_MODES,
+        help="Graph optimization for feature extraction: none, torchscript "
+        "(trace + freeze with operator fusion) or compile (torch.compile) (default: none)",
     )
 
     args = parser.parse_args()
 
+    if args.skip_thumbnail_files and not args.in_memory_handoff:
+        parser.error("--skip-thumbnail-files requires --in-memory-handoff")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.loader_workers is not None and args.loader_workers < 1:
+        parser.error("--loader-workers must be at least 1")
+    if args.inference_threads is not None and args.inference_threads < 1:
+        parser.error("--inference-threads must be at least 1")
+    _validate_clustering_arguments(parser, args)
+    if args.refit_fraction <= 0:
+        parser.error("--refit-fraction must be positive")
+    if args.drift_threshold <= 0:
+        parser.error("--drift-threshold must be positive")
+    if args.extraction_shards < 1:
+        parser.error("--extraction-shards must be at least 1")
+    if args.pin_shards != "none" and args.extraction_shards == 1:
+        parser.error("--pin-shards requires --extraction-shards 2 or more")
+    if args.precision == "int8" and args.extraction_shards > 1:
+        # ワーカーごとに別の画像でキャリブレーションされ、量子化が一致しなくなる
+        parser.error("--precision int8 requires --extraction-shards 1")
+    if args.backend == "onnx" and (
+        args.precision != "fp32" or args.channels_last or args.compile != "none"
+    ):
+        parser.error("--precision, --channels-last and --compile require --backend torch")
+
     # コマンドを実行
-    command = OrganizeCommand()
-    try:
-        command.execute(args)
-    except KeyboardInterrupt:
-        print("\n\nInterrupted by user")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n\n❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    from src.ui.cli.commands.organize_command import OrganizeCommand
+
+    _run_command(OrganizeCommand(), args)
 
 
 if __name__ == "__main__":
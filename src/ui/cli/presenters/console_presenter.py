@@ -51,7 +51,10 @@ class ConsolePresenter:
             result: クラスタリング結果
         """
         print("\n" + "=" * 60)
-        granularity_name = "Fine (ほぼ同じ被写体)" if result.granularity == 1 else "Coarse (同じ場所・似た被写体)"
+        granularity_names = {1: "Fine (ほぼ同じ被写体)", 2: "Coarse (同じ場所・似た被写体)"}
+        granularity_name = granularity_names.get(
+            result.granularity, f"Level {result.granularity} (より粗い階層)"
+        )
         print(f"Clustering Result - Granularity {result.granularity}: {granularity_name}")
         print("=" * 60)
         print(f"Total images: {result.total_images}")
@@ -1,6 +1,8 @@
 """アプリケーション設定"""
 
+import os
 from pathlib import Path
+from typing import Optional
 
 
 class AppConfig:
@@ -9,12 +11,47 @@ class AppConfig:
     DEFAULT_THUMBNAIL_SIZE = 512
     DEFAULT_OUTPUT_DIR = Path("outputs/thumbs")
     DEFAULT_NUM_CLUSTERS = 50
+    DEFAULT_DECODE_PROFILE = "quality"
+    DEFAULT_MODEL = "resnet50"
+    WEIGHTS_DIR_ENV = "RAW_CLUSTERER_WEIGHTS_DIR"
+    BACKENDS = ("torch", "onnx")
+    SHARD_PINNING_MODES = ("none", "cpu", "numa")
+    REDUCTION_METHODS = ("none", "pca", "random")
+    NOISE_ASSIGNMENTS = ("centroid", "core", "knn")
+    DEFAULT_REDUCTION_DIM = 128
+    PRECISIONS = ("fp32", "bf16", "int8")
+    COMPILE_MODES = ("none", "torchscript", "compile")
+    DECODE_PROFILES = ("draft", "balanced", "quality")
+    MEMORY_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
 
     def __init__(
         self,
         thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE,
         output_dir: Path = DEFAULT_OUTPUT_DIR,
         num_clusters: int = DEFAULT_NUM_CLUSTERS,
+        use_embedded_preview: bool = False,
+        decode_profile: str = DEFAULT_DECODE_PROFILE,
+        streaming: bool = False,
+        in_memory_handoff: bool = False,
+        write_thumbnails: bool = True,
+        max_workers: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        use_crop_cache: bool = True,
+        use_embedding_cache: bool = True,
+        batch_size: Optional[int] = None,
+        loader_workers: Optional[int] = None,
+        model_name: str = DEFAULT_MODEL,
+        precision: str = "fp32",
+        channels_last: bool = False,
+        compile_mode: str = "none",
+        backend: str = "torch",
+        inference_threads: Optional[int] = None,
+        weights_dir: Optional[Path] = None,
+        extraction_shards: int = 1,
+        shard_pinning: str = "none",
+        reduction: str = "none",
+        reduction_dim: int = DEFAULT_REDUCTION_DIM,
+        refit_projection: bool = False,
     ) -> None:
         """アプリケーション設定を初期化
 
@@ -22,10 +59,89 @@ class AppConfig:
             thumbnail_size: サムネイルの長辺サイズ
             output_dir: 出力先ディレクトリ
             num_clusters: クラスタ数
+            use_embedded_preview: RAW埋め込みプレビューからサムネイルを生成するか
+            decode_profile: RAWフルデコード時のプロファイル（draft / balanced / quality）
+            streaming: サムネイル生成と特徴抽出を並行して実行するか
+            in_memory_handoff: 生成した画素を共有メモリ経由で特徴抽出へ渡すか
+                （ストリーミングモードを伴う）
+            write_thumbnails: サムネイルJPEGをファイルに書き出すか
+            max_workers: サムネイル生成のワーカー数（Noneの場合は自動決定）
+            memory_budget: サムネイル生成のメモリ予算（バイト、Noneの場合は空きメモリから決定）
+            use_crop_cache: 特徴抽出の前処理済みクロップをキャッシュするか
+            use_embedding_cache: 埋め込みベクトルをRAWの内容ハッシュをキーにキャッシュするか
+            batch_size: 特徴抽出でまとめて推論する画像数（Noneの場合は計測して自動決定）
+            loader_workers: 特徴抽出の画像読み込みスレッド数（Noneの場合はCPUコア数から決定）
+            model_name: 特徴抽出に使うバックボーン名
+            precision: 特徴抽出の推論精度（fp32 / bf16 / int8）
+            channels_last: 特徴抽出でchannels_lastメモリレイアウトを使うか
+            compile_mode: 特徴抽出のグラフ最適化（none / torchscript / compile）
+            backend: 特徴抽出の推論バックエンド（torch / onnx）
+            inference_threads: ONNX Runtimeの演算内スレッド数、シャード実行時は
+                ワーカーあたりのスレッド数（Noneの場合はCPUコア数から決定）
+            weights_dir: 分類層なしのチェックポイントを保存した重みディレクトリ
+                （Noneの場合はtorchvisionの重みを使い、必要ならダウンロードする）
+            extraction_shards: 特徴抽出のワーカープロセス数（1の場合は同じプロセスで推論）
+            shard_pinning: ワーカープロセスのCPU固定（none / cpu / numa）
+            reduction: クラスタリング前の次元削減（none / pca / random）
+            reduction_dim: 次元削減後の次元数
+            refit_projection: 保存された射影があっても学習し直すか
         """
         self.thumbnail_size = thumbnail_size
         self.output_dir = output_dir
         self.num_clusters = num_clusters
+        self.use_embedded_preview = use_embedded_preview
+        self.decode_profile = decode_profile
+        # メモリ上の受け渡しは順次消費するストリーミングモードでのみ行う
+        self.streaming = streaming or in_memory_handoff
+        self.in_memory_handoff = in_memory_handoff
+        self.write_thumbnails = write_thumbnails
+        self.max_workers = max_workers
+        self.memory_budget = memory_budget
+        self.use_crop_cache = use_crop_cache
+        self.use_embedding_cache = use_embedding_cache
+        self.batch_size = batch_size
+        self.loader_workers = loader_workers
+        self.model_name = model_name
+        self.precision = precision
+        self.channels_last = channels_last
+        self.compile_mode = compile_mode
+        self.backend = backend
+        self.inference_threads = inference_threads
+        self.weights_dir = weights_dir
+        self.extraction_shards = extraction_shards
+        self.shard_pinning = shard_pinning
+        self.reduction = reduction
+        self.reduction_dim = reduction_dim
+        self.refit_projection = refit_projection
+
+    @classmethod
+    def parse_memory_size(cls, value: str) -> int:
+        """メモリ量の文字列をバイト数に変換
+
+        Args:
+            value: "8G"・"512M"・"1048576" のような文字列（単位は1024倍、末尾のB・iBは省略可）
+
+        Returns:
+            バイト数
+
+        Raises:
+            ValueError: 解釈できない、または0以下の場合
+        """
+        text = value.strip().upper()
+        for suffix in ("IB", "B"):
+            if text.endswith(suffix):
+                text = text[: -len(suffix)]
+                break
+
+        multiplier = 1
+        if text and text[-1] in cls.MEMORY_SIZE_UNITS:
+            multiplier = cls.MEMORY_SIZE_UNITS[text[-1]]
+            text = text[:-1]
+
+        size = int(float(text) * multiplier)
+        if size <= 0:
+            raise ValueError(f"Memory size must be positive: {value}")
+        return size
 
     @classmethod
     def from_args(cls, args) -> "AppConfig":
@@ -38,8 +154,32 @@ class AppConfig:
             アプリケーション設定
         """
         output = getattr(args, "output", None)
+        weights_dir = getattr(args, "weights_dir", None) or os.environ.get(cls.WEIGHTS_DIR_ENV)
         return cls(
             thumbnail_size=getattr(args, "size", cls.DEFAULT_THUMBNAIL_SIZE),
             output_dir=Path(output) if output else cls.DEFAULT_OUTPUT_DIR,
             num_clusters=getattr(args, "clusters", cls.DEFAULT_NUM_CLUSTERS),
+            use_embedded_preview=getattr(args, "use_embedded_preview", False),
+            decode_profile=getattr(args, "decode_profile", cls.DEFAULT_DECODE_PROFILE),
+            streaming=getattr(args, "streaming", False),
+            in_memory_handoff=getattr(args, "in_memory_handoff", False),
+            write_thumbnails=not getattr(args, "skip_thumbnail_files", False),
+            max_workers=getattr(args, "workers", None),
+            memory_budget=getattr(args, "memory_budget", None),
+            use_crop_cache=not getattr(args, "no_crop_cache", False),
+            use_embedding_cache=not getattr(args, "no_embedding_cache", False),
+            batch_size=getattr(args, "batch_size", None),
+            loader_workers=getattr(args, "loader_workers", None),
+            model_name=getattr(args, "model", cls.DEFAULT_MODEL),
+            precision=getattr(args, "precision", "fp32"),
+            channels_last=getattr(args, "channels_last", False),
+            compile_mode=getattr(args, "compile", "none"),
+            backend=getattr(args, "backend", "torch"),
+            inference_threads=getattr(args, "inference_threads", None),
+            weights_dir=Path(weights_dir) if weights_dir else None,
+            extraction_shards=getattr(args, "extraction_shards", 1),
+            shard_pinning=getattr(args, "pin_shards", "none"),
+            reduction=getattr(args, "reduce", "none"),
+            reduction_dim=getattr(args, "reduce_dim", cls.DEFAULT_REDUCTION_DIM),
+            refit_projection=getattr(args, "refit_projection", False),
         )
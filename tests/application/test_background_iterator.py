@@ -0,0 +1,43 @@
+"""BackgroundIteratorのテスト"""
+
+import pytest
+
+from src.application.pipeline.background_iterator import BackgroundIterator
+
+
+def test_yields_all_items_in_order():
+    """生成側の要素を順番通りに全て返す"""
+    assert list(BackgroundIterator(range(100), maxsize=4)) == list(range(100))
+
+
+def test_reraises_producer_error():
+    """生成側で発生した例外は消費側で再送出される"""
+
+    def produce():
+        yield 1
+        raise RuntimeError("decode failed")
+
+    iterator = iter(BackgroundIterator(produce()))
+    assert next(iterator) == 1
+    with pytest.raises(RuntimeError, match="decode failed"):
+        next(iterator)
+
+
+def test_stopping_early_closes_producer():
+    """消費側が途中で止めた場合も生成側の後片付けが実行される"""
+    closed = []
+
+    def produce():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.append(True)
+
+    background = BackgroundIterator(produce(), maxsize=2)
+    for item in background:
+        if item == 3:
+            break
+
+    background._thread.join(timeout=5)
+    assert closed == [True]
@@ -0,0 +1,81 @@
+"""ClusterImagesMultiLevelのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.application.use_cases.cluster_images_multi_level import (  # noqa: E402
+    ClusterImagesMultiLevel,
+)
+from src.domain.models.cluster_model import ClusterModel  # noqa: E402
+from src.domain.models.embedding import Embedding  # noqa: E402
+from src.domain.models.fingerprint import fingerprint_vectors  # noqa: E402
+
+
+class _ClusteringService:
+    """保存したモデルを返し、学習時に受け取ったグラフを記録するテスト用のサービス"""
+
+    def __init__(self, model):
+        self.model = model
+        self.fitted_graphs = []
+
+    def get_n_levels(self):
+        return 1
+
+    def fit_predict_levels(self, vectors, neighbor_graph=None):
+        self.fitted_graphs.append(neighbor_graph)
+        return [np.zeros(len(vectors), dtype=np.int64)]
+
+    def predict_levels(self, vectors):
+        return [np.zeros(len(vectors), dtype=np.int64)], np.ones(len(vectors))
+
+    def save_model(self, path, image_ids):
+        pass
+
+    def load_model(self, path):
+        return self.model
+
+
+class _Repository:
+    def save_all(self, clusters, output_path):
+        pass
+
+
+class _BuildNeighborGraph:
+    """構築した回数を記録するテスト用のk近傍グラフ構築"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, embeddings, output_dir):
+        self.calls += 1
+        return "graph"
+
+
+def _embeddings(num_images):
+    vectors = np.random.default_rng(0).standard_normal((num_images, 4)).astype(np.float32)
+    return [Embedding(f"img{i}", vector, "test") for i, vector in enumerate(vectors)]
+
+
+def test_neighbor_graph_is_built_only_when_refitting(tmp_path):
+    """差分割り当てで済む場合はk近傍グラフを構築せず、学習し直す場合だけ構築して使う"""
+    embeddings = _embeddings(10)
+    vectors = np.array([emb.vector for emb in embeddings])
+    model = ClusterModel(
+        [emb.image_id for emb in embeddings],
+        [np.zeros(10, dtype=np.int64)],
+        fingerprint_vectors(vectors),
+        1.0,
+    )
+    service = _ClusteringService(model)
+    graph_builder = _BuildNeighborGraph()
+    cluster_images = ClusterImagesMultiLevel(
+        service, _Repository(), incremental=True, build_neighbor_graph=graph_builder
+    )
+
+    cluster_images.execute(embeddings, tmp_path)
+    assert (graph_builder.calls, service.fitted_graphs) == (0, [])
+
+    service.model = None
+    cluster_images.execute(embeddings, tmp_path)
+    assert (graph_builder.calls, service.fitted_graphs) == (1, ["graph"])
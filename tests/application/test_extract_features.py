@@ -0,0 +1,97 @@
+"""ExtractFeaturesのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.application.use_cases.extract_features import ExtractFeatures  # noqa: E402
+from src.domain.models.raw_image import RawImage  # noqa: E402
+from src.domain.models.thumbnail import Thumbnail  # noqa: E402
+
+
+class _Extractor:
+    """推論した画像数とバッチサイズの取得を記録するテスト用の特徴抽出器"""
+
+    def __init__(self):
+        self.batch_size_requests = 0
+        self.extracted = 0
+
+    def get_model_name(self):
+        return "test"
+
+    def get_batch_size(self):
+        self.batch_size_requests += 1
+        return 2
+
+    def prepare_input(self, image):
+        return image
+
+    def extract_inputs(self, inputs):
+        self.extracted += len(inputs)
+        return inputs.reshape(len(inputs), -1)[:, :3].astype(np.float32)
+
+
+class _EmbeddingCache:
+    """cached_hashesの画像だけ特徴ベクトルを返すテスト用のキャッシュ"""
+
+    def __init__(self, cached_hashes):
+        self.cached_hashes = cached_hashes
+        self.closed = False
+
+    def get(self, content_hash):
+        return np.ones(3, dtype=np.float32) if content_hash in self.cached_hashes else None
+
+    def put(self, content_hash, vector):
+        self.cached_hashes.add(content_hash)
+
+    def close(self):
+        self.closed = True
+
+
+class _Repository:
+    def save_all(self, embeddings, output_path):
+        pass
+
+
+class _FailingRepository:
+    def save_all(self, embeddings, output_path):
+        raise OSError("disk full")
+
+
+def _thumbnails(tmp_path, num_images):
+    """RAWファイルと画素をメモリ上に持つサムネイル"""
+    thumbnails = []
+    for i in range(num_images):
+        raw_path = tmp_path / f"img{i}.ARW"
+        raw_path.write_bytes(bytes([i]) * 64)
+        image = np.full((4, 4, 3), i, dtype=np.uint8)
+        thumbnails.append(Thumbnail(tmp_path / f"img{i}.jpg", RawImage(raw_path), image=image))
+    return thumbnails
+
+
+def test_batch_size_is_resolved_only_when_an_image_needs_inference(tmp_path):
+    """全てキャッシュから読める場合はバッチサイズを取得（計測）しない"""
+    thumbnails = _thumbnails(tmp_path, 3)
+    extractor = _Extractor()
+    cache = _EmbeddingCache(set())
+    ExtractFeatures(extractor, _Repository(), embedding_cache=cache).execute(thumbnails, tmp_path)
+    assert (extractor.batch_size_requests, extractor.extracted) == (1, 3)
+
+    cached = _Extractor()
+    embeddings = ExtractFeatures(cached, _Repository(), embedding_cache=cache).execute(
+        _thumbnails(tmp_path, 3), tmp_path
+    )
+
+    assert len(embeddings) == 3
+    assert (cached.batch_size_requests, cached.extracted) == (0, 0)
+
+
+def test_caches_are_closed_when_extraction_fails(tmp_path):
+    """保存に失敗した場合もキャッシュを閉じる"""
+    cache = _EmbeddingCache(set())
+    use_case = ExtractFeatures(_Extractor(), _FailingRepository(), embedding_cache=cache)
+
+    with pytest.raises(OSError, match="disk full"):
+        use_case.execute(_thumbnails(tmp_path, 3), tmp_path)
+
+    assert cache.closed
@@ -0,0 +1,76 @@
+"""GenerateThumbnailsのテスト"""
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.application.use_cases import generate_thumbnails  # noqa: E402
+from src.application.use_cases.generate_thumbnails import GenerateThumbnails  # noqa: E402
+from src.infrastructure.converters.shared_image_buffer import SharedImageBuffer  # noqa: E402
+
+
+def _fake_convert_chunk(raw_image_paths):
+    """RAW画像ごとに小さな画素を共有メモリに置く変換"""
+    return [
+        (path, path.with_suffix(".jpg"), SharedImageBuffer.publish(np.zeros((2, 2, 3))))
+        for path in raw_image_paths
+    ]
+
+
+def _exists(image_ref):
+    try:
+        shared_memory.SharedMemory(name=image_ref[0]).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def test_closing_mid_chunk_releases_unyielded_images(monkeypatch):
+    """変換結果の途中で中断しても、返していない画素の共有メモリは解放される"""
+    published = []
+
+    def convert_chunk(raw_image_paths):
+        results = _fake_convert_chunk(raw_image_paths)
+        published.extend(image_ref for _, _, image_ref in results)
+        return results
+
+    monkeypatch.setattr(generate_thumbnails, "_convert_chunk", convert_chunk)
+    monkeypatch.setattr(
+        generate_thumbnails,
+        "ProcessPoolExecutor",
+        lambda max_workers, mp_context, initializer, initargs: ThreadPoolExecutor(max_workers),
+    )
+    converter = SimpleNamespace(estimate_decode_memory=lambda path: 1, settings={})
+    use_case = GenerateThumbnails(
+        raw_repository=None,
+        thumbnail_repository=None,
+        converter=converter,
+        max_workers=2,
+        chunk_size=2,
+        memory_budget=1 << 40,
+        in_memory_handoff=True,
+    )
+    cache_manager = SimpleNamespace(base_dir=Path("."), cache_dir=Path("."))
+    paths = [Path(f"IMG_{i}.ARW") for i in range(8)]
+
+    results = use_case._convert_in_pool(paths, cache_manager)
+    _, _, image_ref = next(results)
+    SharedImageBuffer.consume(image_ref)
+    results.close()
+
+    assert published
+    assert not any(_exists(ref) for ref in published)
+
+
+def test_discard_is_a_no_op_for_released_images():
+    """解放済みの参照をdiscardしても例外にならない"""
+    image_ref = SharedImageBuffer.publish(np.ones((3, 4, 3), dtype=np.uint8))
+
+    assert SharedImageBuffer.consume(image_ref).shape == (3, 4, 3)
+    SharedImageBuffer.discard(image_ref)
+    assert not _exists(image_ref)
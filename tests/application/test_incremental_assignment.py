@@ -0,0 +1,52 @@
+"""assign_incrementallyのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.application.use_cases.incremental_assignment import assign_incrementally  # noqa: E402
+from src.domain.models.cluster_model import ClusterModel  # noqa: E402
+from src.domain.models.fingerprint import fingerprint_vectors  # noqa: E402
+
+
+def _model(vectors):
+    """10枚の画像を2クラスタ x 2レベルで学習したモデル"""
+    labels = np.arange(10) % 2
+    return ClusterModel(
+        [f"img{i}" for i in range(10)], [labels, labels * 0], fingerprint_vectors(vectors), 1.0
+    )
+
+
+def _predict(distance):
+    """全ての点をクラスタ1に割り当て、距離は一定とする予測関数"""
+
+    def predict_levels(vectors):
+        ones = np.ones(len(vectors), dtype=np.int64)
+        return [ones, ones * 0], np.full(len(vectors), distance)
+
+    return predict_levels
+
+
+def test_known_images_keep_their_labels_and_new_images_are_predicted():
+    """学習済みの画像は前回のラベルのまま、新しい画像とベクトルが変わった画像だけを予測する"""
+    vectors = np.random.default_rng(0).standard_normal((11, 4))
+    model = _model(vectors[:10])
+    current = vectors[[3, 10, 0, 4]].copy()
+    current[3] += 1.0  # img4のベクトルが変わった
+    image_ids = ["img3", "img10", "img0", "img4"]
+
+    levels = assign_incrementally(model, current, image_ids, _predict(1.2), 0.5, 1.5)
+
+    assert levels[0].tolist() == [1, 1, 0, 1]
+    assert levels[1].tolist() == [0, 0, 0, 0]
+
+
+def test_refits_when_too_many_new_images_or_the_distribution_drifts():
+    """新しい画像の割合または割り当て距離の倍率が閾値を超えたらNoneを返す"""
+    vectors = np.random.default_rng(0).standard_normal((13, 4))
+    model = _model(vectors[:10])
+    image_ids = [f"img{i}" for i in range(13)]
+
+    assert assign_incrementally(model, vectors, image_ids, _predict(1.0), 0.2, 1.5) is None
+    assert assign_incrementally(model, vectors, image_ids, _predict(2.0), 0.5, 1.5) is None
+    assert assign_incrementally(model, vectors, image_ids, _predict(1.0), 0.5, 1.5) is not None
@@ -0,0 +1,40 @@
+"""PrefetchMapのテスト"""
+
+import pytest
+
+from src.application.pipeline.prefetch_map import PrefetchMap
+
+
+def test_results_keep_input_order():
+    """ワーカーの完了順に関わらず入力と同じ順序で返す"""
+    assert list(PrefetchMap(lambda x: x * 2, range(50), max_workers=4, readahead=8)) == [
+        x * 2 for x in range(50)
+    ]
+
+
+def test_readahead_is_bounded():
+    """消費側が止まっている間に投入される要素はreadahead件まで"""
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    iterator = iter(PrefetchMap(lambda x: x, source(), max_workers=2, readahead=5))
+    assert next(iterator) == 0
+    assert len(pulled) == 5
+
+
+def test_reraises_worker_error():
+    """ワーカーで発生した例外は該当する要素の順番で再送出される"""
+
+    def func(x):
+        if x == 3:
+            raise ValueError("broken image")
+        return x
+
+    iterator = iter(PrefetchMap(func, range(10), max_workers=2, readahead=4))
+    assert [next(iterator) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError, match="broken image"):
+        next(iterator)
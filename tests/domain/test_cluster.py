@@ -0,0 +1,33 @@
+"""クラスタエンティティのテスト"""
+
+import pytest
+
+from src.domain.models.cluster import Cluster
+from src.domain.models.raw_image import RawImage
+from src.domain.models.xmp_metadata import XmpMetadata
+
+
+def test_cluster_tags_for_each_granularity():
+    """詳細度1・2はfine/coarse、3以降はlevelNのタグになる"""
+    assert Cluster(3, ["a"], granularity=1).get_tag() == "fine_003"
+    assert Cluster(42, ["a"], granularity=2).get_hierarchical_tag() == "cluster/coarse/042"
+    assert Cluster(7, ["a"], granularity=3).get_tag() == "level3_007"
+    assert Cluster(7, ["a"], granularity=3).get_hierarchical_tag() == "cluster/level3/007"
+
+
+def test_cluster_rejects_invalid_granularity():
+    """詳細度が1未満の場合はValueErrorが発生"""
+    with pytest.raises(ValueError, match="granularity"):
+        Cluster(0, ["a"], granularity=0)
+
+
+def test_xmp_hierarchical_keyword_for_extra_levels(tmp_path):
+    """levelNのタグも階層キーワードに変換される"""
+    raw_path = tmp_path / "img.ARW"
+    raw_path.write_bytes(b"raw")
+    xmp = XmpMetadata(RawImage(raw_path))
+
+    xmp.add_keywords_from_tags(["level3_007", "coarse_001", "other_tag"])
+
+    assert xmp.keywords == {"level3_007", "coarse_001", "other_tag"}
+    assert xmp.hierarchical_keywords == {"cluster/level3/007", "cluster/coarse/001", "other_tag"}
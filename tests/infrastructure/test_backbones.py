@@ -0,0 +1,37 @@
+"""バックボーンレジストリのテスト"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.infrastructure.ml.models.backbones import get_backbone
+
+
+def test_missing_checkpoint_fails_fast_with_its_path():
+    """重みディレクトリにチェックポイントがなければ、torchを読み込む前に失敗する"""
+    spec = get_backbone("resnet18")
+    with tempfile.TemporaryDirectory() as tmp:
+        weights_dir = Path(tmp)
+        with pytest.raises(FileNotFoundError, match="resnet18.pt"):
+            spec.build(weights_dir)
+        assert spec.checkpoint_path(weights_dir) == weights_dir / "resnet18.pt"
+
+
+def test_unknown_backbone_is_rejected():
+    """未知のモデル名はValueError"""
+    with pytest.raises(ValueError, match="Unknown model"):
+        get_backbone("vgg16")
+
+
+def test_weights_identity_changes_with_the_checkpoint(tmp_path):
+    """重みの識別子はtorchvisionの重みとチェックポイントで異なり、チェックポイントの更新で変わる"""
+    spec = get_backbone("resnet18")
+    checkpoint = spec.checkpoint_path(tmp_path)
+    checkpoint.write_bytes(b"v1")
+    first = spec.weights_identity(tmp_path)
+
+    checkpoint.write_bytes(b"v2-longer")
+
+    assert spec.weights_identity() == "torchvision"
+    assert first not in ("torchvision", spec.weights_identity(tmp_path))
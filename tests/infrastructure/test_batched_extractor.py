@@ -0,0 +1,47 @@
+"""BatchedFeatureExtractorのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from src.infrastructure.ml.models.backbones import get_backbone  # noqa: E402
+from src.infrastructure.ml.models.batched_extractor import BatchedFeatureExtractor  # noqa: E402
+
+
+class _MeanExtractor(BatchedFeatureExtractor):
+    """チャンネルごとの平均を特徴ベクトルとして返すテスト用の特徴抽出器"""
+
+    def __init__(self, batch_size):
+        super().__init__(get_backbone("resnet18"), batch_size)
+        self.batch_sizes = []
+
+    def _run_model(self, inputs, build_engine=True):
+        self.batch_sizes.append(len(inputs))
+        return self._normalize(inputs).mean(axis=(2, 3))
+
+
+def test_inputs_are_split_into_batches_in_order():
+    """入力はbatch_size枚ずつ推論され、結果は入力と同じ順序で連結される"""
+    extractor = _MeanExtractor(batch_size=2)
+    inputs = np.stack([np.full((224, 224, 3), value, dtype=np.uint8) for value in range(5)])
+
+    features = extractor.extract_inputs(inputs)
+
+    assert extractor.batch_sizes == [2, 2, 1]
+    assert features.shape == (5, 3)
+    assert np.all(np.diff(features[:, 0]) > 0)
+
+
+def test_prepare_input_resizes_short_side_and_center_crops():
+    """短辺をresize_sizeに合わせてから中央をcrop_sizeで切り出す"""
+    extractor = _MeanExtractor(batch_size=1)
+    image = np.zeros((300, 600, 3), dtype=np.uint8)
+    # 左右の端は縮小後に中央のクロップから外れる
+    image[:, :100] = 255
+    image[:, -100:] = 255
+
+    crop = extractor.prepare_input(image)
+
+    assert crop.shape == (224, 224, 3)
+    assert crop.max() == 0
@@ -0,0 +1,105 @@
+"""CacheManagerのテスト"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from src.infrastructure.cache.cache_manager import CacheManager
+
+SETTINGS = {"size": 512, "use_embedded_preview": False, "decode_profile": "quality"}
+
+
+def _setup(base_dir: Path):
+    """RAWファイル・サムネイルを用意してマッピングを記録"""
+    cache_manager = CacheManager(base_dir=base_dir)
+    cache_manager.initialize()
+
+    raw_path = base_dir / "DSC00001.ARW"
+    raw_path.write_bytes(b"raw")
+    thumbnail_path = cache_manager.thumbnails_dir / "DSC00001.jpg"
+    thumbnail_path.write_bytes(b"jpg")
+
+    cache_manager.add_raw_thumbnail_mapping(raw_path, thumbnail_path, settings=SETTINGS)
+    return cache_manager, raw_path, thumbnail_path
+
+
+def test_valid_thumbnail_is_reused():
+    """RAWと設定が変わっていなければサムネイルを再利用できる"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_manager, raw_path, thumbnail_path = _setup(Path(tmp).resolve())
+
+        assert cache_manager.get_valid_thumbnail_path(raw_path, SETTINGS) == thumbnail_path
+        assert cache_manager.find_valid_thumbnails([raw_path], SETTINGS) == {
+            raw_path: thumbnail_path
+        }
+        assert cache_manager.get_all_mappings() == {"DSC00001.ARW": "thumbnails/DSC00001.jpg"}
+
+
+def test_thumbnail_invalidated_by_settings_or_source_change():
+    """変換設定やRAWの更新時刻が変わった場合は再生成が必要"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_manager, raw_path, _ = _setup(Path(tmp).resolve())
+
+        assert (
+            cache_manager.get_valid_thumbnail_path(raw_path, dict(SETTINGS, decode_profile="draft"))
+            is None
+        )
+
+        stat = raw_path.stat()
+        os.utime(raw_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert cache_manager.get_valid_thumbnail_path(raw_path, SETTINGS) is None
+
+
+def test_legacy_json_mapping_is_migrated():
+    """旧形式のmapping.jsonは初期化時に取り込まれ、再利用はされない"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = Path(tmp).resolve()
+        cache_dir = base_dir / ".cache"
+        cache_dir.mkdir()
+        (cache_dir / "mapping.json").write_text(
+            json.dumps({"DSC00001.ARW": "thumbnails/DSC00001.jpg"}), encoding="utf-8"
+        )
+        raw_path = base_dir / "DSC00001.ARW"
+        raw_path.write_bytes(b"raw")
+
+        cache_manager = CacheManager(base_dir=base_dir)
+        cache_manager.initialize()
+
+        assert not (cache_dir / "mapping.json").exists()
+        assert (cache_dir / "mapping.json.migrated").exists()
+        assert cache_manager.get_thumbnail_path(raw_path) == cache_dir / "thumbnails/DSC00001.jpg"
+        assert cache_manager.get_valid_thumbnail_path(raw_path, SETTINGS) is None
+
+
+def test_batched_mappings():
+    """複数のマッピングを一括で記録できる"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = Path(tmp).resolve()
+        cache_manager = CacheManager(base_dir=base_dir)
+        cache_manager.initialize()
+
+        mappings = []
+        for i in range(3):
+            raw_path = base_dir / f"DSC{i:05d}.ARW"
+            raw_path.write_bytes(b"raw")
+            mappings.append((raw_path, cache_manager.thumbnails_dir / f"DSC{i:05d}.jpg", SETTINGS))
+        cache_manager.add_raw_thumbnail_mappings(mappings)
+
+        assert len(cache_manager.get_all_mappings()) == 3
+
+
+def test_lookups_see_writes_from_other_instances():
+    """別インスタンス（別接続）からの書き込みもメモリ上のマッピングに反映される"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = Path(tmp).resolve()
+        cache_manager, raw_path, thumbnail_path = _setup(base_dir)
+        assert cache_manager.get_thumbnail_path(raw_path) == thumbnail_path
+
+        other_raw_path = base_dir / "DSC00002.ARW"
+        other_raw_path.write_bytes(b"raw")
+        other_thumbnail_path = cache_manager.thumbnails_dir / "DSC00002.jpg"
+        writer = CacheManager(base_dir=base_dir)
+        writer.add_raw_thumbnail_mapping(other_raw_path, other_thumbnail_path, settings=SETTINGS)
+
+        assert cache_manager.get_thumbnail_path(other_raw_path) == other_thumbnail_path
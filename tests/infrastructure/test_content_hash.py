@@ -0,0 +1,23 @@
+"""ContentHasherのテスト"""
+
+import tempfile
+from pathlib import Path
+
+from src.infrastructure.cache.content_hash import ContentHasher
+
+
+def test_hash_survives_rename_and_detects_content_change():
+    """リネームしても同じ値になり、末尾が変わると異なる値になる"""
+    with tempfile.TemporaryDirectory() as tmp:
+        original = Path(tmp) / "DSC00001.ARW"
+        original.write_bytes(b"a" * 1000 + b"b" * 1000)
+        hasher = ContentHasher(sample_size=256)
+        before = hasher.hash(original)
+
+        moved = Path(tmp) / "moved" / "renamed.ARW"
+        moved.parent.mkdir()
+        original.rename(moved)
+        assert hasher.hash(moved) == before
+
+        moved.write_bytes(b"a" * 1000 + b"b" * 999 + b"c")
+        assert hasher.hash(moved) != before
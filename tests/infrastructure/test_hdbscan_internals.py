@@ -0,0 +1,35 @@
+"""hdbscanの非公開APIへのアダプタのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+hdbscan_tree = pytest.importorskip("hdbscan._hdbscan_tree")
+
+from src.infrastructure.ml.clustering.hdbscan_internals import (  # noqa: E402
+    select_clusters,
+    single_linkage_from_spanning_tree,
+)
+
+# 0-1-2 と 3-4-5 が近く、2-3の間だけ遠い点群の最小全域木
+MINIMUM_SPANNING_TREE = [[0, 1, 0.1], [1, 2, 0.1], [3, 4, 0.1], [4, 5, 0.1], [2, 3, 5.0]]
+
+
+def test_clusters_are_selected_from_spanning_tree():
+    """2つの離れた点群の最小全域木から2つのクラスタを選択する"""
+    minimum_spanning_tree = np.array(MINIMUM_SPANNING_TREE, dtype=np.float64)
+
+    labels = select_clusters(single_linkage_from_spanning_tree(minimum_spanning_tree), 3)
+
+    assert labels[0] == labels[1] == labels[2] != labels[3] == labels[4] == labels[5]
+    assert (labels >= 0).all()
+
+
+def test_missing_internals_raise_import_error_with_supported_versions(monkeypatch):
+    """内部APIが見つからない場合は対応バージョンを示すImportErrorにする"""
+    monkeypatch.delattr(hdbscan_tree, "get_clusters")
+    single_linkage_tree = single_linkage_from_spanning_tree(
+        np.array(MINIMUM_SPANNING_TREE, dtype=np.float64)
+    )
+
+    with pytest.raises(ImportError, match="install hdbscan"):
+        select_clusters(single_linkage_tree, 3)
@@ -0,0 +1,46 @@
+"""HierarchyCacheのテスト"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.cache.hierarchy_cache import HierarchyCache  # noqa: E402
+
+
+def test_key_depends_on_vectors_and_params():
+    """キーはベクトルの内容と階層を決める設定で変わる"""
+    vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+    key = HierarchyCache.key(vectors, {"min_samples": 3})
+
+    assert HierarchyCache.key(vectors.copy(), {"min_samples": 3}) == key
+    assert HierarchyCache.key(vectors, {"min_samples": 5}) != key
+    assert HierarchyCache.key(vectors + 1, {"min_samples": 3}) != key
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """保存した木をそのまま読み込め、未保存のキーはNoneになる"""
+    cache = HierarchyCache(tmp_path)
+    single_linkage_tree = np.array([[0, 1, 0.5, 2], [2, 4, 1.0, 3]], dtype=np.float64)
+    minimum_spanning_tree = np.array([[0, 1, 0.5], [1, 2, 1.0]], dtype=np.float64)
+
+    cache.save("abc", single_linkage_tree, minimum_spanning_tree)
+    loaded = cache.load("abc")
+
+    assert loaded is not None
+    assert np.array_equal(loaded[0], single_linkage_tree)
+    assert np.array_equal(loaded[1], minimum_spanning_tree)
+    assert cache.load("missing") is None
+
+
+def test_oldest_entries_are_pruned(tmp_path):
+    """保持数を超えると更新時刻の古い階層から削除される"""
+    cache = HierarchyCache(tmp_path, max_entries=2)
+    tree = np.zeros((1, 4))
+    for index, key in enumerate(["a", "b", "c"]):
+        path = cache.save(key, tree, tree)
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+    cache.save("d", tree, tree)
+
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["c", "d"]
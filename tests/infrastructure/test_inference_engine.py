@@ -0,0 +1,78 @@
+"""InferenceEngineのテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.infrastructure.ml.models.inference_engine import InferenceEngine  # noqa: E402
+
+
+def _model():
+    """畳み込みと平均プーリングだけの小さなモジュール"""
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, 3, padding=1),
+        torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1),
+    ).eval()
+
+
+def _sample(seed, batch_size=4):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(batch_size, 3, 16, 16, generator=generator)
+
+
+@pytest.mark.parametrize("precision", InferenceEngine.PRECISIONS)
+def test_output_shape_and_dtype(monkeypatch, precision):
+    """どの精度でも出力はfp32でfp32モジュールと同じ形状になる"""
+    monkeypatch.setattr(InferenceEngine, "cpu_supports_bf16", classmethod(lambda cls: True))
+    engine = InferenceEngine(precision=precision)
+    sample = _sample(0)
+
+    output = engine.run(engine.build(_model(), sample), sample)
+
+    assert engine.precision == precision
+    assert output.shape == (4, 8, 1, 1)
+    assert output.dtype == torch.float32
+
+
+def test_bf16_falls_back_to_fp32_without_native_support(monkeypatch):
+    """bf16命令のないCPUでは警告を出してfp32で推論する"""
+    monkeypatch.setattr(InferenceEngine, "cpu_supports_bf16", classmethod(lambda cls: False))
+
+    with pytest.warns(UserWarning, match="bf16"):
+        engine = InferenceEngine(precision="bf16")
+
+    sample = _sample(0)
+    model = _model()
+    assert engine.precision == "fp32"
+    assert torch.equal(engine.run(engine.build(model, sample), sample), model(sample))
+
+
+def test_quantization_backend_prefers_qnnpack_over_fbgemm(monkeypatch):
+    """x86がない場合はqnnpackを使う"""
+    quantized = SimpleNamespace(supported_engines=["qnnpack", "fbgemm"])
+    monkeypatch.setattr(torch.backends, "quantized", quantized)
+    assert InferenceEngine.quantization_backend() == "qnnpack"
+
+    quantized.supported_engines = ["fbgemm"]
+    assert InferenceEngine.quantization_backend() == "fbgemm"
+
+
+def test_saved_calibration_makes_int8_independent_of_first_batch(tmp_path):
+    """保存したキャリブレーション状態を使うと、最初の入力が異なっても同じ量子化になる"""
+    path = tmp_path / "calibration.pt"
+    first = InferenceEngine(precision="int8", calibration_path=path)
+    assert first.calibration_fingerprint is None
+    first_model = first.build(_model(), _sample(0))
+    fingerprint = first.calibration_fingerprint
+
+    second = InferenceEngine(precision="int8", calibration_path=path)
+    second_model = second.build(_model(), _sample(1) * 3)
+
+    query = _sample(2)
+    assert fingerprint is not None
+    assert second.settings["calibration"] == fingerprint
+    assert torch.equal(first.run(first_model, query), second.run(second_model, query))
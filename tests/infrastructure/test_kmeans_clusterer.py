@@ -0,0 +1,28 @@
+"""KMeansClustererのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+from src.infrastructure.ml.clustering.kmeans_clusterer import KMeansClusterer  # noqa: E402
+
+
+def test_saved_centers_assign_new_points_to_the_nearest_cluster(tmp_path):
+    """保存したクラスタ中心を読み込めば、新しい点を最も近いクラスタに割り当てられる"""
+    rng = np.random.default_rng(0)
+    centers = np.array([[0.0, 0.0], [10.0, 10.0]])
+    vectors = np.concatenate([center + rng.normal(scale=0.5, size=(20, 2)) for center in centers])
+    clusterer = KMeansClusterer(n_clusters=2)
+    labels = clusterer.fit_predict(vectors)
+    path = tmp_path / "clusters_fine_model.npz"
+    clusterer.save_model(path, [f"img{i}" for i in range(len(vectors))])
+
+    loaded = KMeansClusterer(n_clusters=2)
+    model = loaded.load_model(path)
+    new_labels, distances = loaded.predict(np.array([[0.2, -0.1], [9.8, 10.3]]))
+
+    assert np.array_equal(model.labels[0], labels)
+    assert new_labels.tolist() == [labels[0], labels[20]]
+    assert (distances < 1.0).all()
+    assert KMeansClusterer(n_clusters=3).load_model(path) is None
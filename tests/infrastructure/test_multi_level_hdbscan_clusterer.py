@@ -0,0 +1,117 @@
+"""MultiLevelHDBSCANClustererのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.cache.hierarchy_cache import HierarchyCache  # noqa: E402
+from src.infrastructure.ml.clustering.multi_level_hdbscan_clusterer import (  # noqa: E402
+    MultiLevelHDBSCANClusterer,
+    nest_labels,
+)
+from src.infrastructure.ml.neighbors.nn_descent import NNDescentGraphBuilder  # noqa: E402
+
+
+def _assert_nested(finer, coarser):
+    """細かいクラスタがそれぞれ1つの粗いクラスタに含まれることを確認"""
+    for label in np.unique(finer):
+        assert len(np.unique(coarser[finer == label])) == 1
+
+
+def test_nest_labels_assigns_each_fine_cluster_to_its_majority():
+    """細かいクラスタは多数派の粗いクラスタにまとめられ、ラベルは連番になる"""
+    finer = np.array([0, 0, 0, 1, 1, 2, 2, 2])
+    coarser = np.array([5, 5, 7, 7, 7, 5, 9, 9])
+
+    nested = nest_labels(finer, coarser)
+
+    assert nested.tolist() == [0, 0, 0, 1, 1, 2, 2, 2]
+    _assert_nested(finer, nested)
+
+
+def _blobs():
+    """2つずつ近くに並んだ4つの塊（15点ずつ）"""
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0], [0, 3], [20, 0], [20, 3]], dtype=float)
+    return np.concatenate([center + rng.normal(scale=0.3, size=(15, 2)) for center in centers])
+
+
+def test_levels_are_extracted_from_one_fit_and_nest():
+    """全てのレベルが1回の学習から得られ、粗いレベルは細かいレベルを内包する"""
+    pytest.importorskip("hdbscan")
+    vectors = _blobs()
+
+    clusterer = MultiLevelHDBSCANClusterer(min_cluster_sizes=[5, 20], min_samples=3)
+    fine, coarse = clusterer.fit_predict_levels(vectors)
+
+    assert clusterer.get_n_clusters() == [4, 2]
+    assert (fine >= 0).all() and (coarse >= 0).all()
+    _assert_nested(fine, coarse)
+
+
+def test_cached_hierarchy_is_reused_for_new_min_cluster_sizes(tmp_path, monkeypatch):
+    """保存した階層があれば木を構築せずに別の最小クラスタサイズで選択し直せる"""
+    pytest.importorskip("hdbscan")
+    vectors = _blobs()
+    cache = HierarchyCache(tmp_path)
+    MultiLevelHDBSCANClusterer([5], min_samples=3, hierarchy_cache=cache).fit_predict_levels(
+        vectors
+    )
+
+    retuned = MultiLevelHDBSCANClusterer([20], min_samples=3, hierarchy_cache=cache)
+    monkeypatch.setattr(retuned, "_build_trees", lambda _: pytest.fail("hierarchy rebuilt"))
+    (labels,) = retuned.fit_predict_levels(vectors)
+
+    assert retuned.get_n_clusters() == [2]
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+
+def test_min_cluster_sizes_must_be_ascending():
+    """レベルの最小クラスタサイズが昇順でない場合はValueErrorが発生"""
+    with pytest.raises(ValueError, match="ascending"):
+        MultiLevelHDBSCANClusterer(min_cluster_sizes=[10, 5])
+
+
+def test_knn_graph_gives_the_same_levels_as_all_pairs():
+    """k近傍グラフの辺だけで構築した階層からも同じクラスタが得られる"""
+    pytest.importorskip("hdbscan")
+    vectors = _blobs()
+    image_ids = [str(i) for i in range(len(vectors))]
+    graph = NNDescentGraphBuilder(n_neighbors=8).update(vectors, image_ids)
+
+    clusterer = MultiLevelHDBSCANClusterer(min_cluster_sizes=[5, 20], min_samples=3)
+    fine, coarse = clusterer.fit_predict_levels(vectors, neighbor_graph=graph)
+
+    assert clusterer.get_n_clusters() == [4, 2]
+    _assert_nested(fine, coarse)
+
+
+def test_knn_graph_needs_min_samples_neighbors():
+    """近傍数がmin_samples未満のグラフはValueErrorになる"""
+    vectors = _blobs()
+    graph = NNDescentGraphBuilder(n_neighbors=2).update(
+        vectors, [str(i) for i in range(len(vectors))]
+    )
+
+    with pytest.raises(ValueError, match="min_samples"):
+        MultiLevelHDBSCANClusterer([5], min_samples=3).fit_predict_levels(vectors, graph)
+
+
+def test_saved_model_predicts_new_points_into_the_nearest_clusters(tmp_path):
+    """保存したモデルを読み込めば、新しい点を近い塊のクラスタに全レベルで割り当てられる"""
+    pytest.importorskip("hdbscan")
+    vectors = _blobs()
+    clusterer = MultiLevelHDBSCANClusterer(min_cluster_sizes=[5, 20], min_samples=3)
+    fine, coarse = clusterer.fit_predict_levels(vectors)
+    path = tmp_path / "cluster_model.npz"
+    clusterer.save_model(path, [f"img{i}" for i in range(len(vectors))])
+
+    loaded = MultiLevelHDBSCANClusterer(min_cluster_sizes=[5, 20], min_samples=3)
+    model = loaded.load_model(path)
+    (new_fine, new_coarse), distances = loaded.predict_levels(np.array([[0.1, 0.1], [20.1, 2.9]]))
+
+    assert model.size == len(vectors)
+    assert [new_fine[0], new_fine[1]] == [fine[0], fine[59]]
+    assert [new_coarse[0], new_coarse[1]] == [coarse[0], coarse[59]]
+    assert (distances < 3 * model.reference_distance).all()
+    assert MultiLevelHDBSCANClusterer([5, 10], min_samples=3).load_model(path) is None
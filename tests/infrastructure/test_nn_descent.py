@@ -0,0 +1,84 @@
+"""NNDescentGraphBuilderのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.ml.neighbors.blocked_search import nearest_neighbors  # noqa: E402
+from src.infrastructure.ml.neighbors.nn_descent import NNDescentGraphBuilder  # noqa: E402
+
+
+def _clustered_vectors(num_points, seed=0):
+    """低次元の構造を持つ32次元のベクトル"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, 4)) * 3
+    latent = centers[rng.integers(0, 20, num_points)] + rng.standard_normal((num_points, 4))
+    return (latent @ rng.standard_normal((4, 32))).astype(np.float32)
+
+
+def _recall(graph, vectors, k):
+    """総当たりの近傍に対する再現率"""
+    exact, _ = nearest_neighbors(vectors, vectors, k + 1)
+    hits = sum(len(set(graph.indices[row]) & set(exact[row, 1:])) for row in range(len(vectors)))
+    return hits / (len(vectors) * k)
+
+
+def _ids(num_points, prefix="img"):
+    return [f"{prefix}{i:05d}" for i in range(num_points)]
+
+
+def test_descent_approximates_exact_neighbors():
+    """NN-descentのグラフは総当たりの近傍をほぼ再現し、距離は近い順に並ぶ"""
+    vectors = _clustered_vectors(3000)
+    builder = NNDescentGraphBuilder(n_neighbors=10, brute_force_threshold=500)
+
+    graph = builder.update(vectors, _ids(3000))
+
+    assert graph.indices.shape == (3000, 10)
+    assert (graph.indices != np.arange(3000)[:, np.newaxis]).all()
+    assert (np.diff(graph.distances, axis=1) >= 0).all()
+    assert _recall(graph, vectors, 10) > 0.95
+
+
+def test_small_inputs_use_exact_search_and_pad_missing_neighbors():
+    """ノード数が近傍数以下の場合は足りない近傍を-1/infで埋める"""
+    vectors = _clustered_vectors(4)
+
+    graph = NNDescentGraphBuilder(n_neighbors=5).update(vectors, _ids(4))
+
+    assert (graph.indices[:, :3] >= 0).all()
+    assert (graph.indices[:, 3:] == -1).all()
+    assert np.isinf(graph.distances[:, 3:]).all()
+
+
+def test_update_reuses_unchanged_nodes_and_inserts_new_ones():
+    """前回のグラフに含まれない画像だけを組み込み、行順は新しい入力に合わせる"""
+    vectors = _clustered_vectors(3200)
+    builder = NNDescentGraphBuilder(n_neighbors=10, brute_force_threshold=500)
+    previous = builder.update(vectors[:3000], _ids(3000))
+
+    # 順序を入れ替え、200件を追加
+    order = np.random.default_rng(1).permutation(3200)
+    image_ids = [_ids(3200)[row] for row in order]
+    graph = builder.update(vectors[order], image_ids, previous)
+
+    assert graph.image_ids == image_ids
+    assert _recall(graph, vectors[order], 10) > 0.95
+    assert builder.update(vectors[order], image_ids, graph) is graph
+
+
+def test_saved_graph_is_loaded_only_with_the_same_settings(tmp_path):
+    """保存したグラフは同じ近傍数の設定でのみ読み込める"""
+    vectors = _clustered_vectors(50)
+    builder = NNDescentGraphBuilder(n_neighbors=5)
+    graph = builder.update(vectors, _ids(50))
+    path = tmp_path / "knn_graph.npz"
+
+    builder.save(graph, path)
+    loaded = builder.load(path)
+
+    assert loaded.image_ids == graph.image_ids
+    assert np.array_equal(loaded.indices, graph.indices)
+    assert np.allclose(loaded.distances, graph.distances)
+    assert NNDescentGraphBuilder(n_neighbors=8).load(path) is None
+    assert builder.load(tmp_path / "missing.npz") is None
@@ -0,0 +1,87 @@
+"""ノイズポイントの再割り当てのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.ml.clustering.noise_reassignment import (  # noqa: E402
+    cluster_centroids,
+    reassign_noise,
+)
+from src.infrastructure.ml.neighbors.blocked_search import nearest_neighbors  # noqa: E402
+
+
+def _labeled_points():
+    """3つのクラスタと、その間に散らばったノイズ点"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    labels = rng.integers(0, 3, size=200)
+    vectors += labels[:, np.newaxis] * 4.0
+    labels[rng.choice(200, size=40, replace=False)] = -1
+    return vectors, labels
+
+
+def test_centroids_match_per_cluster_means():
+    """1回の集約で求めたクラスタ中心はクラスタごとの平均と一致する"""
+    vectors, labels = _labeled_points()
+
+    unique_labels, centroids = cluster_centroids(vectors, labels)
+
+    assert unique_labels.tolist() == [0, 1, 2]
+    for label, centroid in zip(unique_labels, centroids):
+        assert np.allclose(centroid, vectors[labels == label].mean(axis=0), atol=1e-5)
+
+
+def test_blocked_nearest_neighbors_match_brute_force():
+    """ブロックに分けた距離計算は全体の総当たりと同じ近傍を返す"""
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((37, 8))
+    references = rng.standard_normal((23, 8))
+
+    indices, distances = nearest_neighbors(queries, references, k=3, block_size=50)
+
+    brute = ((queries[:, np.newaxis] - references[np.newaxis]) ** 2).sum(axis=2)
+    assert np.array_equal(indices, np.argsort(brute, axis=1)[:, :3])
+    assert np.allclose(distances, np.sort(brute, axis=1)[:, :3])
+
+
+@pytest.mark.parametrize("method", ["centroid", "core", "knn"])
+def test_every_noise_point_is_assigned_without_changing_members(method):
+    """ノイズ点は全てクラスタに割り当てられ、クラスタに属する点と入力は変わらない"""
+    vectors, labels = _labeled_points()
+    original = labels.copy()
+
+    reassigned = reassign_noise(vectors, labels, method=method, block_size=64)
+
+    assert np.array_equal(labels, original)
+    assert (reassigned >= 0).all()
+    assert np.array_equal(reassigned[original >= 0], original[original >= 0])
+
+
+def test_knn_uses_majority_of_neighbors():
+    """knnでは最も近い1点ではなく近傍の多数派のクラスタに割り当てる"""
+    vectors = np.array([[0.0], [1.1], [1.2], [1.3], [0.5]])
+    labels = np.array([0, 1, 1, 1, -1])
+
+    assert reassign_noise(vectors, labels, method="core")[-1] == 0
+    assert reassign_noise(vectors, labels, method="knn", n_neighbors=3)[-1] == 1
+
+
+def test_all_noise_is_assigned_to_one_cluster():
+    """全てノイズの場合は1つのクラスタにまとめる"""
+    labels = reassign_noise(np.zeros((4, 2)), np.full(4, -1))
+
+    assert labels.tolist() == [0, 0, 0, 0]
+
+
+def test_graph_neighbors_are_used_and_missing_rows_fall_back_to_search():
+    """k近傍グラフのクラスタに属する近傍を使い、そのような近傍がない点だけ総当たりで探す"""
+    vectors = np.array([[0.0], [1.1], [1.2], [1.3], [0.5], [0.2]])
+    labels = np.array([0, 1, 1, 1, -1, -1])
+    # 点4の近傍は（実際より遠い）クラスタ1の点、点5の近傍はノイズ点のみ
+    neighbor_indices = np.array([[5, 4], [2, 3], [1, 3], [2, 1], [3, 5], [4, -1]])
+
+    reassigned = reassign_noise(vectors, labels, method="core", neighbor_indices=neighbor_indices)
+
+    assert reassigned[4] == 1
+    assert reassigned[5] == 0
@@ -0,0 +1,47 @@
+"""ProjectionReducerのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.ml.reduction.projection_reducer import ProjectionReducer  # noqa: E402
+
+
+def test_pca_projection_is_reused_after_save_and_load(tmp_path):
+    """保存した射影を読み込むと同じ変換結果になり、設定やモデルが違えば読み込まない"""
+    vectors = np.random.default_rng(0).standard_normal((50, 32)).astype(np.float32)
+    path = tmp_path / "projection.npz"
+
+    reducer = ProjectionReducer(method="pca", n_components=8)
+    reduced = reducer.fit_transform(vectors)
+    reducer.save(path, model_name="resnet50")
+
+    reloaded = ProjectionReducer(method="pca", n_components=8)
+    assert reloaded.load(path, input_dimension=32, model_name="resnet50")
+    assert reduced.shape == (50, 8)
+    assert np.allclose(reloaded.transform(vectors), reduced, atol=1e-5)
+
+    assert not ProjectionReducer(method="pca", n_components=16).load(path, 32, "resnet50")
+    assert not ProjectionReducer(method="pca", n_components=8).load(path, 32, "resnet18")
+    assert not ProjectionReducer(method="pca", n_components=8).load(path, 64, "resnet50")
+
+
+def test_pca_components_are_capped_by_sample_count():
+    """サンプル数が指定次元より少ない場合はサンプル数まで削減する"""
+    vectors = np.random.default_rng(1).standard_normal((5, 32))
+
+    reduced = ProjectionReducer(method="pca", n_components=16).fit_transform(vectors)
+
+    assert reduced.shape == (5, 5)
+
+
+def test_projection_capped_by_sample_count_is_refit_when_samples_grow(tmp_path):
+    """サンプル数で成分数が制限された射影は、より多くの成分を学習できる場合は読み込まない"""
+    path = tmp_path / "projection.npz"
+    rng = np.random.default_rng(2)
+    reducer = ProjectionReducer(method="pca", n_components=16)
+    reducer.fit_transform(rng.standard_normal((5, 32)))
+    reducer.save(path, "resnet50")
+
+    assert ProjectionReducer(method="pca", n_components=16).load(path, 32, "resnet50", 5)
+    assert not ProjectionReducer(method="pca", n_components=16).load(path, 32, "resnet50", 40)
@@ -0,0 +1,43 @@
+"""RawHeaderReaderのテスト"""
+
+import struct
+import tempfile
+from pathlib import Path
+
+from src.infrastructure.converters.raw_header import RawHeaderReader
+
+
+def _ifd(entries, next_ifd=0):
+    """リトルエンディアンのIFDを構築（entries: (タグ, 型, 個数, 値) のリスト）"""
+    data = struct.pack("<H", len(entries))
+    for tag, value_type, count, value in entries:
+        data += struct.pack("<HHII", tag, value_type, count, value)
+    return data + struct.pack("<I", next_ifd)
+
+
+def test_reads_largest_image_from_sub_ifd():
+    """IFD0のプレビューではなくSubIFDのセンサーサイズを返す"""
+    # IFD0（160x120のプレビュー）はオフセット8、SubIFD（6000x4000）はその直後
+    ifd0_size = 2 + 3 * 12 + 4
+    sub_ifd_offset = 8 + ifd0_size
+    ifd0 = _ifd([(256, 3, 1, 160), (257, 3, 1, 120), (330, 4, 1, sub_ifd_offset)])
+    sub_ifd = _ifd([(256, 4, 1, 6000), (257, 4, 1, 4000)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = Path(tmp) / "DSC00001.ARW"
+        raw_path.write_bytes(b"II" + struct.pack("<HI", 42, 8) + ifd0 + sub_ifd)
+
+        reader = RawHeaderReader()
+        assert reader.read_dimensions(raw_path) == (6000, 4000)
+        assert reader.estimate_pixels(raw_path) == 24_000_000
+
+
+def test_falls_back_to_file_size():
+    """TIFF構造でないファイルはファイルサイズから推定する"""
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = Path(tmp) / "DSC00001.CR3"
+        raw_path.write_bytes(b"\x00\x00\x00\x18ftypcrx " + b"\x00" * 1000)
+
+        reader = RawHeaderReader()
+        assert reader.read_dimensions(raw_path) is None
+        assert reader.estimate_pixels(raw_path) == raw_path.stat().st_size
@@ -0,0 +1,39 @@
+"""AppendOnlyRowStoreのテスト"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.cache.row_store import AppendOnlyRowStore  # noqa: E402
+
+
+def test_rows_are_reloaded_by_key_and_fingerprint():
+    """保存した行は別インスタンスからも読め、フィンガープリントが違えば返さない"""
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "rows"
+        store = AppendOnlyRowStore(directory, row_shape=(2, 2, 3))
+        first = np.full((2, 2, 3), 1, dtype=np.uint8)
+        second = np.full((2, 2, 3), 2, dtype=np.uint8)
+        store.put("a", "v1", first)
+        store.put("b", "v1", second)
+        store.close()
+
+        reopened = AppendOnlyRowStore(directory, row_shape=(2, 2, 3))
+        assert np.array_equal(reopened.get("a", "v1"), first)
+        assert np.array_equal(reopened.get("b", "v1"), second)
+        assert reopened.get("a", "v2") is None
+
+
+def test_updated_row_replaces_previous_entry():
+    """同じキーで保存し直すと新しい行が使われる"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AppendOnlyRowStore(Path(tmp), row_shape=(1, 3))
+        store.put("a", "v1", np.zeros((1, 3), dtype=np.uint8))
+        store.put("a", "v2", np.ones((1, 3), dtype=np.uint8))
+
+        assert len(store) == 1
+        assert store.get("a", "v1") is None
+        assert np.array_equal(store.get("a", "v2"), np.ones((1, 3), dtype=np.uint8))
@@ -0,0 +1,20 @@
+"""ShardedFeatureExtractorのテスト"""
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from src.infrastructure.ml.models.sharded_extractor import ShardedFeatureExtractor  # noqa: E402
+
+
+def test_int8_is_rejected_before_starting_workers():
+    """int8はワーカーごとにキャリブレーションが異なるため、ワーカーを起動する前に拒否する"""
+    with pytest.raises(ValueError, match="int8"):
+        ShardedFeatureExtractor("resnet18", num_shards=2, precision="int8")
+
+
+def test_onnx_requires_model_path():
+    """onnxではエクスポート済みのモデルのパスが必要"""
+    with pytest.raises(ValueError, match="model_path"):
+        ShardedFeatureExtractor("resnet18", num_shards=2, backend="onnx")
@@ -0,0 +1,28 @@
+"""SystemResourcesのテスト"""
+
+from src.infrastructure.system.resources import SystemResources
+
+
+def _fake_topology(monkeypatch, tmp_path, allowed, node_cpu_lists):
+    """使用できるCPUとNUMAノード構成を差し替える"""
+    for index, cpu_list in enumerate(node_cpu_lists):
+        node_dir = tmp_path / f"node{index}"
+        node_dir.mkdir()
+        (node_dir / "cpulist").write_text(cpu_list + "\n")
+    monkeypatch.setattr(SystemResources, "NUMA_NODE_DIR", tmp_path)
+    monkeypatch.setattr(SystemResources, "allowed_cpus", staticmethod(lambda: list(allowed)))
+
+
+def test_partition_cpus_splits_into_contiguous_blocks(monkeypatch, tmp_path):
+    """CPUは重ならない連続したグループに均等に分割される"""
+    _fake_topology(monkeypatch, tmp_path, range(8), [])
+
+    assert SystemResources.partition_cpus(3) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+
+
+def test_partition_cpus_respects_numa_nodes(monkeypatch, tmp_path):
+    """NUMAノードの境界をまたがず、グループはノードに順に割り当てられる"""
+    _fake_topology(monkeypatch, tmp_path, range(8), ["0-1,4-5", "2-3,6-7"])
+
+    assert SystemResources.partition_cpus(4, by_numa=True) == [[0, 1], [4, 5], [2, 3], [6, 7]]
+    assert SystemResources.partition_cpus(2, by_numa=True) == [[0, 1, 4, 5], [2, 3, 6, 7]]
@@ -0,0 +1,34 @@
+"""TorchvisionFeatureExtractorのテスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+
+from src.infrastructure.ml.models.backbones import get_backbone  # noqa: E402
+from src.infrastructure.ml.models.torchvision_model import (  # noqa: E402
+    TorchvisionFeatureExtractor,
+)
+
+
+@pytest.fixture
+def weights_dir(tmp_path):
+    """乱数で初期化したresnet18のチェックポイント（ダウンロード不要）"""
+    spec = get_backbone("resnet18")
+    torch.manual_seed(0)
+    torch.save(spec._build(False).state_dict(), spec.checkpoint_path(tmp_path))
+    return tmp_path
+
+
+def test_batched_features_match_single_image_features(weights_dir):
+    """まとめて推論した特徴ベクトルは1枚ずつ推論した結果と一致する"""
+    extractor = TorchvisionFeatureExtractor("resnet18", batch_size=2, weights_dir=weights_dir)
+    rng = np.random.default_rng(0)
+    inputs = rng.integers(0, 256, size=(5, 224, 224, 3), dtype=np.uint8)
+
+    batched = extractor.extract_inputs(inputs)
+    single = np.stack([extractor.extract_inputs(inputs[i : i + 1])[0] for i in range(5)])
+
+    assert batched.shape == (5, 512)
+    np.testing.assert_allclose(batched, single, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,54 @@
+"""重いライブラリを遅延読み込みしていることのテスト"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("torch", "torchvision", "sklearn", "hdbscan", "rawpy", "onnxruntime")
+
+
+def _imported_heavy_modules(module: str) -> list:
+    """別プロセスでモジュールを読み込み、読み込まれた重いライブラリを返す"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def test_cli_entry_point_does_not_import_heavy_libraries():
+    """CLIのエントリーポイントの読み込みでは重いライブラリを読み込まない"""
+    assert _imported_heavy_modules("src.ui.cli.main") == []
+
+
+def test_help_runs_without_loading_the_pipeline():
+    """--helpはパイプラインを読み込まずに表示できる"""
+    result = subprocess.run(
+        [sys.executable, "-m", "src.ui.cli.main", "--help"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "--model" in result.stdout
+
+
+def test_xmp_worker_module_does_not_import_heavy_libraries():
+    """XMP更新のワーカーが読み込むモジュールは重いライブラリに依存しない"""
+    assert _imported_heavy_modules("src.application.use_cases.update_xmp_metadata") == []
+
+
+def test_retune_help_runs_without_loading_the_pipeline():
+    """retune --helpはパイプラインを読み込まずに表示できる"""
+    result = subprocess.run(
+        [sys.executable, "-m", "src.ui.cli.main", "retune", "--help"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "--min-cluster-size" in result.stdout